@@ -0,0 +1,271 @@
+"""
+Filename: batch.py
+Primary Author: Sean Nelson
+"""
+
+from typing import Callable
+
+import numpy as np
+
+from src.engines import step_grid
+from src.seeding import create_bit_generator, random_cells
+
+# Constants of the splitmix64 finaliser, used to mix packed words into hashes
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_grids(grids: np.ndarray) -> np.ndarray:
+    """
+    Hash each grid of a stack into 64 bits at once.
+
+    Each grid is packed to bits, every 64 bit word is mixed with its position
+    and the mixed words are summed, so the whole stack is hashed with a few
+    array operations rather than one call per grid.
+
+    Parameters
+    ----------
+    grids : np.ndarray
+        A stack of grids of shape (B, H, W), where cells equal to 1 are alive.
+
+    Returns
+    -------
+    np.ndarray
+        A uint64 array of shape (B,) holding the hash of each grid.
+    """
+    packed = np.packbits(grids == 1, axis=-1)
+    packed = packed.reshape(len(packed), packed.shape[1] * packed.shape[2])
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    words = packed.view(np.uint64)
+
+    keys = np.arange(1, words.shape[1] + 1, dtype=np.uint64) * _GOLDEN
+    mixed = words ^ keys
+    mixed ^= mixed >> np.uint64(30)
+    mixed *= _MIX_1
+    mixed ^= mixed >> np.uint64(27)
+    mixed *= _MIX_2
+    mixed ^= mixed >> np.uint64(31)
+    return mixed.sum(axis=1, dtype=np.uint64)
+
+
+class BatchCellularAutomata:
+    """
+    A class to run many independent grids of the same size and rule at once.
+
+    The grids are held as one (B, H, W) array and stepped together, so the
+    cost of each generation is a few array operations however many grids
+    there are. Alongside the grids, the population of each is tracked, along
+    with the generation it died out and the cycle it settled into, found by
+    comparing a hash of each grid against those of recent generations.
+
+    Attributes
+    ----------
+    grid_size : list
+        Size of each grid.
+    rule : Callable
+        Rule shared by every grid, which must have a lookup table.
+    seeds : list
+        The seed of each grid.
+    grids : np.ndarray
+        The uint8 grids, of shape (B, H, W).
+    generation : int
+        Number of generations since the grids were seeded.
+    max_period : int
+        The longest cycle period detected.
+    density : float
+        Chance of each cell being alive when the grids are seeded.
+    populations : np.ndarray
+        The number of live cells in each grid.
+    extinct_at : np.ndarray
+        The generation each grid died out, or -1 if it has not.
+    cycle_start : np.ndarray
+        The first generation of the cycle each grid settled into, or -1 if
+        none has been found. An extinct grid is a still life.
+    cycle_period : np.ndarray
+        The period of the cycle each grid settled into, or 0 if none has
+        been found. A period of 1 is a still life.
+
+    Methods
+    -------
+    set_seeds(seeds: list)
+        Seed each grid and reset the statistics.
+    set_grids(grids: np.ndarray)
+        Replace the grids and reset the statistics.
+    update_grids()
+        Advance every grid by one generation and update the statistics.
+    run(generations: int, stop_when_settled: bool = False)
+        Advance every grid by a number of generations.
+    get_grid(index: int)
+        Get one of the grids.
+    get_statistics()
+        Get the statistics of every grid.
+    """
+
+    def __init__(
+        self,
+        grid_size: list,
+        rule: Callable,
+        seeds: list,
+        max_period: int = 64,
+        density: float = 0.5,
+    ) -> None:
+        """
+        Initialize the BatchCellularAutomata class.
+
+        Parameters
+        ----------
+        grid_size : list
+            The size of each grid.
+        rule : Callable
+            The rule shared by every grid, which must have a lookup table.
+        seeds : list
+            The seed of each grid, as given to `CellularAutomata.set_seed`.
+        max_period : int, default is 64
+            The longest cycle period detected.
+        density : float, default is 0.5
+            The chance of each cell being alive when the grids are seeded.
+        """
+        table = getattr(rule, "table", None)
+        if table is None:
+            raise ValueError("Batches can only be run with rules with a lookup table")
+
+        self.grid_size = grid_size
+        self.rule = rule
+        self.max_period = max_period
+        self.density = density
+        self.table = table.astype(np.uint8)
+        self.set_seeds(seeds)
+
+    def set_seeds(self, seeds: list) -> None:
+        """
+        Seed each grid and reset the statistics.
+
+        Each grid is filled exactly as `CellularAutomata.set_seed` fills a
+        single grid, so a grid of the batch matches the automaton created
+        with the same seed. Grids whose seed is None start empty, while a
+        seed of 0 seeds its grid like any other.
+
+        Parameters
+        ----------
+        seeds : list
+            The seed of each grid.
+        """
+        grids = np.zeros((len(seeds), *self.grid_size), dtype=np.uint8)
+        for index, seed in enumerate(seeds):
+            if seed is not None:
+                bit_generator = create_bit_generator(seed)
+                grids[index] = random_cells(bit_generator, self.grid_size, self.density)
+
+        self.set_grids(grids)
+        self.seeds = list(seeds)
+
+    def set_grids(self, grids: np.ndarray) -> None:
+        """
+        Replace the grids and reset the statistics. The grids have no seeds.
+
+        Parameters
+        ----------
+        grids : np.ndarray
+            The new grids, of shape (B, H, W), where cells equal to 1 are
+            alive.
+        """
+        self.grids = (np.asarray(grids) == 1).view(np.uint8)
+        self.grid_size = list(self.grids.shape[1:])
+        self.seeds = [None] * len(self.grids)
+
+        self.generation = 0
+        batch_size = len(self.grids)
+        self.extinct_at = np.full(batch_size, -1)
+        self.cycle_start = np.full(batch_size, -1)
+        self.cycle_period = np.zeros(batch_size, dtype=int)
+
+        # Hashes of the most recent generations, in slots by generation
+        self._hashes = np.zeros((batch_size, self.max_period), dtype=np.uint64)
+        self._hash_generations = np.full(self.max_period, -1)
+        self._update_statistics()
+
+    def _update_statistics(self) -> None:
+        """
+        Count the population of every grid, and record the generation the
+        grids died out and the cycles they settled into.
+        """
+        self.populations = np.count_nonzero(self.grids, axis=(1, 2))
+        died = (self.populations == 0) & (self.extinct_at < 0)
+        self.extinct_at[died] = self.generation
+
+        hashes = hash_grids(self.grids)
+        matches = (self._hashes == hashes[:, None]) & (self._hash_generations >= 0)
+        found = matches.any(axis=1) & (self.cycle_period == 0)
+        if found.any():
+            # Only the first repeat of a state is seen, so only one earlier
+            # generation can match
+            earlier = np.where(matches[found], self._hash_generations, -1).max(axis=1)
+            self.cycle_start[found] = earlier
+            self.cycle_period[found] = self.generation - earlier
+
+        slot = self.generation % self.max_period
+        self._hashes[:, slot] = hashes
+        self._hash_generations[slot] = self.generation
+
+    def update_grids(self) -> None:
+        """
+        Advance every grid by one generation and update the statistics.
+        """
+        self.grids = step_grid(self.grids, self.table)
+        self.generation += 1
+        self._update_statistics()
+
+    def run(self, generations: int, stop_when_settled: bool = False) -> None:
+        """
+        Advance every grid by a number of generations.
+
+        Parameters
+        ----------
+        generations : int
+            The number of generations to advance.
+        stop_when_settled : bool, default is False
+            If true, stop early once every grid has died out or settled into
+            a cycle, as nothing more can change.
+        """
+        for _ in range(generations):
+            if stop_when_settled and (self.cycle_period > 0).all():
+                return
+            self.update_grids()
+
+    def get_grid(self, index: int) -> np.ndarray:
+        """
+        Get one of the grids.
+
+        Parameters
+        ----------
+        index : int
+            The index of the grid in the batch.
+
+        Returns
+        -------
+        np.ndarray
+            The grid, a view into the batch.
+        """
+        return self.grids[index]
+
+    def get_statistics(self) -> dict:
+        """
+        Get the statistics of every grid.
+
+        Returns
+        -------
+        dict
+            Values indexed by grid of "seed", "population", "extinct_at",
+            "cycle_start" and "cycle_period", see the attributes of the same
+            names.
+        """
+        return {
+            "seed": self.seeds,
+            "population": self.populations,
+            "extinct_at": self.extinct_at,
+            "cycle_start": self.cycle_start,
+            "cycle_period": self.cycle_period,
+        }
@@ -0,0 +1,519 @@
+"""
+Filename: benchmark.py
+Primary Author: Sean Nelson
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+from src.cellular_automata import CellularAutomata
+from src.engines import SparseTileEngine
+from src.packed_cellular_automata import PackedCellularAutomata
+from src.rules import RULES
+
+DEFAULT_SIZES = [100, 256, 1024, 4096]
+
+# The largest side of a surface drawn by the drawing benchmark, in pixels
+MAX_SURFACE_SIZE = 4096
+
+STATE_FORMATS = {"text": "state", "binary": "state", "rle": "rle"}
+
+
+def create_vectorised(size: int, rule) -> CellularAutomata:
+    """
+    Create an automaton stepped as a whole array on one thread.
+    """
+    return CellularAutomata([size, size], rule)
+
+
+def create_parallel(size: int, rule) -> CellularAutomata:
+    """
+    Create an automaton stepped in row bands on every CPU.
+    """
+    return CellularAutomata([size, size], rule, workers=os.cpu_count() or 1)
+
+
+def create_sparse(size: int, rule) -> CellularAutomata:
+    """
+    Create an automaton stepped a tile at a time.
+    """
+    ca = CellularAutomata([size, size], rule)
+    ca.set_engine(SparseTileEngine())
+    return ca
+
+
+def create_packed(size: int, rule) -> CellularAutomata:
+    """
+    Create an automaton stepped on bit-packed words.
+    """
+    return PackedCellularAutomata([size, size], rule)
+
+
+ENGINES = {
+    "vectorised": create_vectorised,
+    "parallel": create_parallel,
+    "sparse": create_sparse,
+    "packed": create_packed,
+}
+
+
+def time_operation(
+    operation: Callable[[], None],
+    setup: Callable[[], None] | None = None,
+    min_seconds: float = 0.5,
+    min_calls: int = 3,
+) -> float:
+    """
+    Time an operation, calling it repeatedly until enough time has passed.
+
+    Parameters
+    ----------
+    operation : Callable[[], None]
+        The operation to time.
+    setup : Callable[[], None], optional
+        Called before each call of the operation, outside of the timing.
+    min_seconds : float, default is 0.5
+        The least total time spent in the operation.
+    min_calls : int, default is 3
+        The least number of calls.
+
+    Returns
+    -------
+    float
+        The median time of a call in seconds, which is less affected by
+        the occasional slow call than the mean.
+    """
+    timings = []
+    while len(timings) < min_calls or sum(timings) < min_seconds:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def result(value: float, unit: str, higher_is_better: bool = True) -> dict:
+    """
+    Build a benchmark result.
+
+    Parameters
+    ----------
+    value : float
+        The measurement.
+    unit : str
+        The unit of the measurement.
+    higher_is_better : bool, default is True
+        Whether a larger value is an improvement, as for rates, rather than
+        a regression, as for times.
+
+    Returns
+    -------
+    dict
+        The result, as stored in the JSON output.
+    """
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def rule_key(rule_name: str) -> str:
+    """
+    Turn a rule name such as "Game of Life" into a key such as "game_of_life".
+    """
+    return rule_name.lower().replace(" ", "_")
+
+
+def bench_stepping(
+    sizes: list[int],
+    rule_names: list[str],
+    engines: list[str],
+    min_seconds: float = 0.5,
+) -> dict:
+    """
+    Measure the generations per second of `update_grid` for each engine, rule
+    and grid size, starting from a seeded random grid.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The sides of the square grids.
+    rule_names : list[str]
+        The names of the rules, from `RULES`.
+    engines : list[str]
+        The names of the engines, from `ENGINES`.
+    min_seconds : float, default is 0.5
+        The least time spent stepping each combination.
+
+    Returns
+    -------
+    dict
+        Results keyed "step/<engine>/<rule>/<size>".
+    """
+    results = {}
+    for engine in engines:
+        for rule_name in rule_names:
+            for size in sizes:
+                ca = ENGINES[engine](size, RULES[rule_name])
+                ca.set_seed(1)
+                seconds = time_operation(ca.update_grid, min_seconds=min_seconds)
+                ca.close()
+
+                key = f"step/{engine}/{rule_key(rule_name)}/{size}"
+                results[key] = result(1 / seconds, "gen/s")
+    return results
+
+
+def draw_cell_size(size: int) -> tuple[int, int]:
+    """
+    Choose the cell size and margin for drawing a grid, keeping its surface
+    no larger than `MAX_SURFACE_SIZE`.
+
+    Grids small enough are drawn with the application's 5 pixel cells and
+    1 pixel margins, larger ones with smaller cells and no margins.
+
+    Parameters
+    ----------
+    size : int
+        The side of the square grid.
+
+    Returns
+    -------
+    tuple[int, int]
+        The side of a cell and the margin between cells, in pixels.
+    """
+    if size * 6 + 1 <= MAX_SURFACE_SIZE:
+        return 5, 1
+    return max(1, MAX_SURFACE_SIZE // size), 0
+
+
+def bench_drawing(sizes: list[int], min_seconds: float = 0.5) -> dict:
+    """
+    Measure the frame time of `CellGrid.draw` for each grid size, on an
+    offscreen surface using SDL's dummy video driver.
+
+    Four frames are timed: a full redraw, drawing after a step, which
+    redraws only changed cells when few have changed, and drawing after a
+    step zoomed out to show the whole grid in a window about 512 pixels
+    across, which shades cell density once cells are smaller than pixels.
+    The zoomed out frame is timed for a random grid, where every part of
+    the grid changes each step, and for a few gliders on an empty grid
+    stepped by the sparse tile engine, where the cost should not grow with
+    the size of the grid.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The sides of the square grids.
+    min_seconds : float, default is 0.5
+        The least time spent drawing each grid.
+
+    Returns
+    -------
+    dict
+        Results keyed "draw/full/<size>", "draw/step/<size>",
+        "draw/zoomed-out/<size>" and "draw/zoomed-out-sparse/<size>".
+    """
+    # Imported here so the other benchmarks run without pygame or a display
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+
+    from src.cell_grid import CellGrid
+
+    pygame.display.init()
+    results = {}
+    for size in sizes:
+        # Resized after creation, so a large grid's surface is never built
+        # with the default cell size
+        cell_grid = CellGrid(RULES["Game of Life"], (1, 1), (1, 1))
+        cell_size, margin = draw_cell_size(size)
+        cell_grid.set_cell_dimensions(cell_size, cell_size, margin)
+        cell_grid.set_dimensions((size, size), (size, size))
+        cell_grid.set_window_size()
+        cell_grid.set_ca()
+        cell_grid.set_seed(1)
+
+        seconds = time_operation(
+            cell_grid.draw, setup=cell_grid.redraw, min_seconds=min_seconds
+        )
+        results[f"draw/full/{size}"] = result(seconds * 1000, "ms", False)
+
+        cell_grid.draw()
+        seconds = time_operation(
+            cell_grid.draw, setup=cell_grid.update, min_seconds=min_seconds
+        )
+        results[f"draw/step/{size}"] = result(seconds * 1000, "ms", False)
+
+        # Zoom starts fully out, with the whole grid in view
+        visible = max(1, 512 // (cell_size + margin))
+        cell_grid.set_dimensions((visible, visible), (size, size))
+        cell_grid.set_window_size()
+        cell_grid.toggle_zoom()
+        cell_grid.draw()
+        seconds = time_operation(
+            cell_grid.draw, setup=cell_grid.update, min_seconds=min_seconds
+        )
+        results[f"draw/zoomed-out/{size}"] = result(seconds * 1000, "ms", False)
+
+        grid = np.zeros((size, size), dtype=np.int8)
+        # Grids too small for a glider are left empty
+        for glider in range(16 if size > 2 else 0):
+            row = glider * 997 % (size - 2)
+            col = glider * 1231 % (size - 2)
+            grid[row : row + 3, col : col + 3] = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        cell_grid.ca.grid = grid
+        cell_grid.ca.set_engine(SparseTileEngine())
+        cell_grid.draw()
+        seconds = time_operation(
+            cell_grid.draw, setup=cell_grid.update, min_seconds=min_seconds
+        )
+        results[f"draw/zoomed-out-sparse/{size}"] = result(seconds * 1000, "ms", False)
+    pygame.display.quit()
+    return results
+
+
+def bench_state_io(
+    sizes: list[int], file_formats: list[str], min_seconds: float = 0.5
+) -> dict:
+    """
+    Measure the cells per second saved by `save_grid_to_file` and loaded by
+    `populate_grid_with_state_file`, for each format and grid size.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The sides of the square grids.
+    file_formats : list[str]
+        The formats, from `STATE_FORMATS`.
+    min_seconds : float, default is 0.5
+        The least time spent saving and loading each combination.
+
+    Returns
+    -------
+    dict
+        Results keyed "save/<format>/<size>" and "load/<format>/<size>".
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for file_format in file_formats:
+            for size in sizes:
+                ca = CellularAutomata([size, size], RULES["Game of Life"], seed=1)
+                path = os.path.join(
+                    directory, f"{file_format}.{STATE_FORMATS[file_format]}"
+                )
+
+                seconds = time_operation(
+                    lambda: ca.save_grid_to_file(path, file_format),
+                    min_seconds=min_seconds,
+                )
+                results[f"save/{file_format}/{size}"] = result(
+                    size * size / seconds, "cells/s"
+                )
+
+                seconds = time_operation(
+                    lambda: ca.populate_grid_with_state_file(path),
+                    min_seconds=min_seconds,
+                )
+                results[f"load/{file_format}/{size}"] = result(
+                    size * size / seconds, "cells/s"
+                )
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.1) -> list[dict]:
+    """
+    Compare results against a baseline, finding those which got worse.
+
+    Parameters
+    ----------
+    results : dict
+        The results, keyed by benchmark name.
+    baseline : dict
+        The baseline results, keyed by benchmark name. Benchmarks missing
+        from either are ignored.
+    tolerance : float, default is 0.1
+        The fraction a result may get worse by before it is a regression,
+        allowing for noise between runs.
+
+    Returns
+    -------
+    list[dict]
+        The regressions, each with the benchmark's name, its baseline and
+        current values, and its change as a fraction of the baseline, where
+        negative changes are worse.
+    """
+    regressions = []
+    for name, current in results.items():
+        if name not in baseline or not baseline[name]["value"]:
+            continue
+        before = baseline[name]["value"]
+        change = (current["value"] - before) / before
+        if not current["higher_is_better"]:
+            change = -change
+        if change < -tolerance:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline": before,
+                    "value": current["value"],
+                    "change": change,
+                }
+            )
+    return regressions
+
+
+def get_machine() -> dict:
+    """
+    Describe the machine and versions the benchmarks ran with, since results
+    are only comparable on the same machine.
+
+    Returns
+    -------
+    dict
+        The Python and numpy versions, platform and number of CPUs.
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line parser.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+        The parser for the benchmark's arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.benchmark",
+        description=(
+            "Measure stepping, drawing and state file performance, and compare "
+            "against a baseline."
+        ),
+    )
+    parser.add_argument(
+        "--suites",
+        nargs="+",
+        choices=["step", "draw", "io"],
+        default=["step", "draw", "io"],
+        help="the benchmarks to run (default all)",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="the sides of the square grids (default 100 256 1024 4096)",
+    )
+    parser.add_argument(
+        "--rules",
+        nargs="+",
+        choices=list(RULES),
+        default=list(RULES),
+        metavar="RULE",
+        help="the rules stepped (default all)",
+    )
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=list(ENGINES),
+        default=list(ENGINES),
+        help="the engines stepped (default all)",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=list(STATE_FORMATS),
+        default=list(STATE_FORMATS),
+        help="the state file formats saved and loaded (default all)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="the least seconds spent on each measurement (default 0.5)",
+    )
+    parser.add_argument(
+        "-o", "--output", help="a JSON file to write results to, instead of stdout"
+    )
+    parser.add_argument(
+        "--baseline", help="a JSON file of earlier results to compare against"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help=(
+            "the fraction a result may get worse than the baseline before it "
+            "counts as a regression (default 0.1)"
+        ),
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the benchmarks from the command line.
+
+    Parameters
+    ----------
+    argv : list[str], optional
+        The command line arguments, defaulting to those of the process.
+
+    Returns
+    -------
+    int
+        The exit status, 1 if any result regressed from the baseline.
+    """
+    args = build_parser().parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+
+    results = {}
+    if "step" in args.suites:
+        results.update(
+            bench_stepping(args.sizes, args.rules, args.engines, args.min_time)
+        )
+    if "draw" in args.suites:
+        results.update(bench_drawing(args.sizes, args.min_time))
+    if "io" in args.suites:
+        results.update(bench_state_io(args.sizes, args.formats, args.min_time))
+
+    report = {"machine": get_machine(), "results": results}
+    if baseline is not None:
+        report["regressions"] = compare(results, baseline, args.tolerance)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    for regression in report.get("regressions", []):
+        print(
+            f"Regression: {regression['name']} {regression['baseline']:.4g} -> "
+            f"{regression['value']:.4g} ({regression['change']:+.1%})",
+            file=sys.stderr,
+        )
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
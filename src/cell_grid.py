@@ -5,10 +5,19 @@ Primary Author: Steven Taylor
 
 from typing import Callable
 
+import numpy as np
 import pygame
 
 from src import colours
 from src.cellular_automata import CellularAutomata
+from src.density_pyramid import DensityPyramid
+from src.engines import UniverseViewport
+from src.rendering import (
+    build_pixel_index,
+    cell_codes,
+    render_cells,
+    render_density,
+)
 
 from src.painter import Painter
 
@@ -41,17 +50,22 @@ class CellGrid:
     window_size : tuple[int, int]
         The size of the grid window.
     grid_surface : pygame.Surface
-        The actual surface of the grid.
+        The surface the visible cells are drawn on when not zoomed, the size
+        of the window however large the grid is.
     visible_surface : pygame.Surface
         The visible surface of the grid.
     scaled_window : pygame.Surface
-        The scaled window of the grid for zooming.
+        The scaled window of the grid for zooming, kept between draws until
+        the view or the cells in it change.
     allow_zoom : bool
         Whether zooming is allowed or not.
     zoom : float
         The current zoom level.
-    visible_offset : tuple[int, int]
-        The offset of the visible area from the top-left corner of the grid.
+    visible_offset : tuple[float, float]
+        The offset of the visible area from the top-left corner of the grid
+        surface, in pixels of the grid surface.
+    zoom_area : pygame.Rect
+        The area of the grid surface shown when zoomed.
     bg_colour : tuple[int, int, int]
         The color of the background of the grid.
     empty_space_colour : tuple[int, int, int]
@@ -60,6 +74,33 @@ class CellGrid:
         The color of the cells in the grid.
     painter : Painter
         The painter object used to draw on the grid.
+    hover_mask : np.ndarray or None
+        The cells of a preview drawn over the grid, such as a stamp under the
+        mouse, or None if there is no preview. It is never written to the
+        automaton.
+    hover_origin : tuple[int, int]
+        The row and column of the grid under the top left of the preview.
+    pixel_rows : np.ndarray
+        The cell row drawn in each pixel row of the grid surface, or -1 for
+        grid lines.
+    pixel_cols : np.ndarray
+        The cell column drawn in each pixel column of the grid surface, or -1
+        for grid lines.
+    drawn_cells : np.ndarray or None
+        The palette codes of the cells last drawn onto the grid surface, or
+        None if the next draw must redraw every cell.
+    max_dirty_cells : int
+        The most changed cells drawn one by one before the whole grid is
+        redrawn in a single blit instead.
+    view_cells : np.ndarray or None
+        The palette codes of the cells last drawn onto the scaled window, or
+        None if the next zoomed draw must draw the view again.
+    density_pyramid : DensityPyramid
+        The live cells counted in blocks at several resolutions, for drawing
+        the grid zoomed far out.
+    min_grid_line_size : float
+        The smallest size of a cell on screen, in pixels, drawn with grid
+        lines. Smaller cells are drawn as shading of how many are alive.
 
     Methods
     -------
@@ -69,6 +110,8 @@ class CellGrid:
         Sets the dimensions of the grid.
     set_window_size():
         Sets the size of the grid window.
+    get_grid_pixel_size():
+        Gets the size of the whole grid in pixels.
     toggle_zoom():
         Toggles zooming.
     zoom_in():
@@ -77,12 +120,16 @@ class CellGrid:
         Zooms out the grid.
     set_zoom(out):
         Sets the zoom level of the grid.
+    pan(dx, dy):
+        Moves the visible area of the zoomed grid.
+    screen_to_cell(pos, padding):
+        Gets the cell shown at a position on screen.
     set_seed(seed):
         Sets the seed for the cellular automata.
     set_rule(rule):
         Sets the rule for the cellular automata.
-    set_ca():
-        Sets the cellular automata object.
+    set_ca(ca):
+        Sets the cellular automata object, new or given.
     update():
         Updates the state of the cellular automata.
     set_painter():
@@ -93,10 +140,24 @@ class CellGrid:
         Paints on the grid.
     erase(previous_pos, current_pos, padding, brush_size):
         Erases from the grid.
+    set_hover(top, left, mask):
+        Shows a preview over the grid.
+    reset_hovered():
+        Removes the preview.
+    hover_window(top, left, height, width):
+        Gets which cells of a window are under the preview.
     is_position_in_grid(row, col):
         Checks if a position is within the grid boundaries.
+    redraw():
+        Makes the next draw redraw the whole grid.
+    get_cell_rect(row, col):
+        Gets the area of the grid surface a cell is drawn in.
     draw(surface):
-        Draws the grid.
+        Draws the grid and returns the areas which changed.
+    draw_view():
+        Draws only the cells in the zoomed view and scales them to the window.
+    draw_density():
+        Draws the zoomed view shaded by the density of live cells.
     print_params():
         Prints the parameters of the grid.
     """
@@ -175,16 +236,28 @@ class CellGrid:
         self.width = None
         self.height = None
         self.window_size = None
-        self.grid_surface = None  # Actual grid's surface
+        self.grid_surface = None  # The visible cells' surface
         self.visible_surface = None  # The visible surface
         self.scaled_window = None
 
+        # Rendering state kept between frames
+        self.pixel_rows = None
+        self.pixel_cols = None
+        self.drawn_cells = None
+        self.max_dirty_cells = 1000
+        self.view_cells = None
+        self.view_key = None
+        self.view_source = None
+        self.density_pyramid = DensityPyramid()
+        self.min_grid_line_size = 3
+
         # Zoom toggled off by default
         self.allow_zoom = False
 
         # Parameters for moving the grid
         self.zoom = 1.0
-        self.visible_offset = (0, 0)
+        self.visible_offset = None
+        self.zoom_area = None
 
         # Setup cell dimension defaults
         self.set_cell_dimensions(5, 5, 1)
@@ -192,6 +265,7 @@ class CellGrid:
         # Setup default number of cells in grid
         self.set_dimensions(visible_dimensions, grid_dimensions)
         self.set_window_size()
+        self.ca = None
         self.set_ca()
 
         # Setup Painter object
@@ -203,7 +277,8 @@ class CellGrid:
         self.cell_colour = colours.RED
         self.hovered_colour = colours.LIGHT_RED
 
-        self.hovered_cells = []
+        self.hover_mask = None
+        self.hover_origin = (0, 0)
 
         # debug
         # self.print_params()
@@ -251,9 +326,10 @@ class CellGrid:
         """
         Set the size of the window displaying the grid.
 
-        This method calculates the size of the grid surface and the
-        visible surface based on thegrid dimensions and cell dimensions,
-        and then sets the window size.
+        This method calculates the size of the window from the visible
+        dimensions and cell dimensions, and makes the surfaces the grid is
+        drawn on the size of the window. Nothing is sized by the whole grid,
+        so the memory used does not grow with it.
         """
         grid_window_height = (
             (self.height * self.cell_height)
@@ -267,23 +343,45 @@ class CellGrid:
             + self.cell_margin
         )
 
-        actual_grid_height = (
-            (self.grid_height * self.cell_height)
-            + (self.grid_height * self.cell_margin)
-            + self.cell_margin
+        window_size = (grid_window_width, grid_window_height)
+        self.grid_surface = pygame.Surface(window_size)
+        self.visible_surface = self.grid_surface
+        self.scaled_window = pygame.Surface(window_size)
+        # Pixels past the last cell of a grid smaller than the window are
+        # drawn as margin
+        self.pixel_rows = build_pixel_index(
+            min(self.height, self.grid_height),
+            self.cell_height,
+            self.cell_margin,
+            stop=grid_window_height,
         )
-
-        actual_grid_width = (
-            (self.grid_width * self.cell_width)
-            + (self.grid_width * self.cell_margin)
-            + self.cell_margin
+        self.pixel_cols = build_pixel_index(
+            min(self.width, self.grid_width),
+            self.cell_width,
+            self.cell_margin,
+            stop=grid_window_width,
         )
+        self.redraw()
 
-        self.grid_surface = pygame.Surface((actual_grid_width, actual_grid_height))
-        self.visible_surface = pygame.Surface((grid_window_width, grid_window_height))
-
+        self.window_size = window_size
+        # The view starts centred on the grid
+        self.visible_offset = None
         self.set_zoom()
-        self.window_size = (grid_window_width, grid_window_height)
+
+    def get_grid_pixel_size(self) -> tuple[int, int]:
+        """
+        Get the size of the whole grid in pixels, with its grid lines, as if
+        it were drawn unzoomed.
+
+        Returns
+        -------
+        tuple[int, int]
+            The width and height of the grid in pixels.
+        """
+        return (
+            self.grid_width * (self.cell_width + self.cell_margin) + self.cell_margin,
+            self.grid_height * (self.cell_height + self.cell_margin) + self.cell_margin,
+        )
 
     def toggle_zoom(self) -> None:
         """
@@ -292,6 +390,7 @@ class CellGrid:
         If zoom is currently allowed, it will be disallowed, and vice versa.
         """
         self.allow_zoom = not self.allow_zoom
+        self.redraw()
 
     def zoom_in(self) -> None:
         """
@@ -330,25 +429,75 @@ class CellGrid:
             else:
                 self.zoom *= 1.1
 
-        self.zoom_size = (
-            int(self.grid_surface.get_width() / self.zoom),
-            int(self.grid_surface.get_height() / self.zoom),
-        )
-
-        self.zoom_area = pygame.Rect(0, 0, *self.zoom_size)
-        if (
-            self.zoom_area.height > self.grid_surface.get_height()
-            or self.zoom_area.width > self.grid_surface.get_height()
-        ):
+        grid_width, grid_height = self.get_grid_pixel_size()
+        self.zoom_size = (int(grid_width / self.zoom), int(grid_height / self.zoom))
+        if self.zoom_size[0] > grid_width or self.zoom_size[1] > grid_height:
             # Clamp max size to overall grid size
-            self.zoom_area = self.grid_surface.get_rect()
+            self.zoom_size = (grid_width, grid_height)
             self.zoom = prev_zoom
 
-        self.zoom_area.center = (
-            int(self.grid_surface.get_width() / 2),
-            int(self.grid_surface.get_height() / 2),
+        # Zoom about the centre of the current view
+        if self.visible_offset is None:
+            centre = (grid_width / 2, grid_height / 2)
+        else:
+            centre = self.zoom_area.center
+        self.visible_offset = (
+            centre[0] - self.zoom_size[0] / 2,
+            centre[1] - self.zoom_size[1] / 2,
+        )
+        self.pan(0, 0)
+
+    def pan(self, dx: float, dy: float) -> None:
+        """
+        Move the visible area of the zoomed grid, keeping it inside the grid.
+
+        Parameters
+        ----------
+        dx : float
+            The distance to move right, in pixels on screen.
+        dy : float
+            The distance to move down, in pixels on screen.
+        """
+        grid_width, grid_height = self.get_grid_pixel_size()
+        x = self.visible_offset[0] + dx * self.zoom_size[0] / self.window_size[0]
+        y = self.visible_offset[1] + dy * self.zoom_size[1] / self.window_size[1]
+        self.visible_offset = (
+            min(max(x, 0), grid_width - self.zoom_size[0]),
+            min(max(y, 0), grid_height - self.zoom_size[1]),
+        )
+        self.zoom_area = pygame.Rect(
+            round(self.visible_offset[0]),
+            round(self.visible_offset[1]),
+            *self.zoom_size,
         )
 
+    def screen_to_cell(self, pos: tuple, padding: tuple) -> tuple[int, int]:
+        """
+        Get the cell shown at a position on screen, following the zoom and
+        pan of the view.
+
+        Parameters
+        ----------
+        pos : tuple
+            The position on screen.
+        padding : tuple
+            The padding around the grid.
+
+        Returns
+        -------
+        tuple[int, int]
+            The row and column of the cell, which may be outside the grid.
+        """
+        x = pos[0] - padding[0]
+        y = pos[1] - padding[1]
+        if self.allow_zoom:
+            x = self.zoom_area.left + x * self.zoom_area.width / self.window_size[0]
+            y = self.zoom_area.top + y * self.zoom_area.height / self.window_size[1]
+
+        col = int(x // (self.cell_width + self.cell_margin))
+        row = int(y // (self.cell_height + self.cell_margin))
+        return row, col
+
     def set_seed(self, seed: int | list[int] | None) -> None:
         """
         Set the seed for the cellular automata.
@@ -371,6 +520,7 @@ class CellGrid:
             The function that defines the rule for the cellular automata.
         """
         self.rule = rule
+        self.ca.rule = rule
 
     def update_rule(self, rule_name: str) -> None:
         """
@@ -383,13 +533,46 @@ class CellGrid:
         """
         self.ca.update_rule(self.rule)
 
-    def set_ca(self) -> None:
-        """
-        Initialize the cellular automata with the current rule and seed.
+    def set_ca(self, ca: CellularAutomata | UniverseViewport | None = None) -> None:
         """
+        Set the cellular automata shown by the grid. Any automaton it
+        replaces is closed, releasing its engine's threads.
+
+        Without an automaton, one is made with the current rule and seed,
+        recording its history so earlier generations can be returned to and
+        checking it for cycles. An automaton given is shown as it is, and the
+        grid takes its size, so one such as a `MappedCellularAutomata` larger
+        than memory can be viewed, as only the cells in view are read from
+        it. An `UnboundedUniverse` is shown through a `UniverseViewport` onto
+        it, with the grid as the viewport's window. Cells born and died are
+        only counted when enabled on the automaton, as they cost a comparison
+        every step.
+
+        Parameters
+        ----------
+        ca : CellularAutomata or UniverseViewport, optional
+            The automaton to show, or None to make a new one.
+        """
+        # The automaton being replaced may hold worker threads
+        if self.ca is not None and self.ca is not ca:
+            self.ca.close()
+
+        if ca is not None:
+            self.ca = ca
+            self.rule = ca.rule
+            self.seed = ca.seed
+            if list(ca.grid_size) != [self.grid_height, self.grid_width]:
+                self.set_dimensions((self.height, self.width), ca.grid_size)
+                self.set_window_size()
+            self.redraw()
+            return
+
         self.ca = CellularAutomata(
             [self.grid_height, self.grid_width], self.rule, self.seed
         )
+        self.ca.enable_history()
+        self.ca.enable_cycle_detection()
+        self.redraw()
 
     def update(self) -> None:
         """
@@ -414,14 +597,13 @@ class CellGrid:
         padding : tuple
             The padding around the grid.
         """
-        col = (pos[0] - padding[0]) // (self.cell_width + self.cell_margin)
-        row = (pos[1] - padding[1]) // (self.cell_height + self.cell_margin)
+        row, col = self.screen_to_cell(pos, padding)
 
         if not self.is_position_in_grid(row, col):
             return
 
         # invert cell state
-        self.ca.grid[row][col] = not self.ca.grid[row][col]
+        self.ca.set_cell(row, col, int(not self.ca.get_cell(row, col)))
 
         print(f"Mouse down: {pos} at Grid: {row},{col}")
 
@@ -470,14 +652,72 @@ class CellGrid:
         """
         self.painter(previous_pos, current_pos, padding, brush_size, erase=True)
 
-    def reset_hovered(self):
+    def set_hover(self, top: int, left: int, mask: np.ndarray) -> None:
         """
-        Resets the previously hovered cells and clears the list
+        Show a preview over the grid, drawn over the empty cells it covers in
+        the hovered colour. Only the mask is kept, so moving the preview costs
+        the size of the mask rather than of the grid, and the automaton never
+        sees it.
 
+        Parameters
+        ----------
+        top : int
+            The row of the grid under the top of the mask.
+        left : int
+            The column of the grid under the left of the mask.
+        mask : np.ndarray
+            A boolean array, true for the cells of the preview.
         """
-        for row, col in self.hovered_cells:
-            self.ca.grid[row][col] = max(0, self.ca.grid[row][col])
-        self.hovered_cells = []
+        self.hover_mask = mask
+        self.hover_origin = (top, left)
+
+    def reset_hovered(self) -> None:
+        """
+        Remove the preview from over the grid.
+        """
+        self.hover_mask = None
+
+    def hover_window(
+        self, top: int, left: int, height: int, width: int
+    ) -> np.ndarray | None:
+        """
+        Get which cells of a window are under the preview.
+
+        Parameters
+        ----------
+        top : int
+            The row of the grid at the top of the window.
+        left : int
+            The column of the grid at the left of the window.
+        height : int
+            The number of rows in the window.
+        width : int
+            The number of columns in the window.
+
+        Returns
+        -------
+        np.ndarray or None
+            A boolean array the size of the window, true for the cells under
+            the preview, or None if the preview is outside the window.
+        """
+        if self.hover_mask is None:
+            return None
+
+        # The rows and columns covered by both the window and the preview
+        row, col = self.hover_origin
+        first_row, first_col = max(row, top), max(col, left)
+        last_row = min(row + self.hover_mask.shape[0], top + height)
+        last_col = min(col + self.hover_mask.shape[1], left + width)
+        if first_row >= last_row or first_col >= last_col:
+            return None
+
+        hovered = np.zeros((height, width), dtype=bool)
+        hovered[
+            first_row - top : last_row - top, first_col - left : last_col - left
+        ] = self.hover_mask[
+            first_row - row : last_row - row, first_col - col : last_col - col
+        ]
+        return hovered
 
     def is_position_in_grid(self, row, col) -> bool:
         """
@@ -500,71 +740,256 @@ class CellGrid:
 
         return row_in_bounds and col_in_bounds
 
-    def draw(self, surface: pygame.Surface | None = None) -> None:
+    def redraw(self) -> None:
+        """
+        Make the next draw redraw the whole grid rather than only the cells
+        which changed.
+        """
+        self.drawn_cells = None
+        self.view_cells = None
+        self.view_key = None
+
+    def get_colours(self) -> list[tuple[int, int, int]]:
         """
-        Draw the grid onto a surface.
+        Get the colours the grid is drawn in.
+
+        Returns
+        -------
+        list[tuple[int, int, int]]
+            The margin, dead, alive and hovered colours, in palette order.
+        """
+        return [
+            self.bg_colour,
+            self.empty_space_colour,
+            self.cell_colour,
+            self.hovered_colour,
+        ]
+
+    def get_cell_rect(self, row: int, col: int) -> pygame.Rect:
+        """
+        Get the area of the grid surface a cell is drawn in.
+
+        Parameters
+        ----------
+        row : int
+            The row index.
+        col : int
+            The column index.
+
+        Returns
+        -------
+        pygame.Rect
+            The area of the cell, excluding its margin.
+        """
+        return pygame.Rect(
+            (self.cell_margin + self.cell_width) * col + self.cell_margin,
+            (self.cell_margin + self.cell_height) * row + self.cell_margin,
+            self.cell_width,
+            self.cell_height,
+        )
+
+    def draw(self, surface: pygame.Surface | None = None) -> list[pygame.Rect]:
+        """
+        Draw the visible cells of the grid onto a surface.
+
+        Only the cells which fit in the window are read, through the
+        automaton's `get_window`, so the cost depends on the size of the
+        window rather than of the grid, and any engine providing it can be
+        drawn.
+
+        The grid surface keeps what was drawn on it, so when only a few
+        cells differ from the last draw just those cells are drawn again.
+        Otherwise, and for other surfaces, every cell and grid line is drawn
+        in a single blit of a pixel array, whose cost does not depend on how
+        many cells are alive.
+
+        When zoomed, only the cells in view are drawn, see `draw_view`, and
+        when zoomed out far enough their density is drawn instead, see
+        `draw_density`.
 
         Parameters
         ----------
         surface : pygame.Surface, optional
-            The surface onto which the grid is drawn.
+            The surface onto which the grid is drawn, the size of the window.
             If None, the grid's surface is used.
+
+        Returns
+        -------
+        list[pygame.Rect]
+            The areas of the visible surface which changed, for passing on to
+            `pygame.display.update`.
         """
         if not surface:
             surface = self.grid_surface
-        surface.fill(self.empty_space_colour)
-
-        for row in range(self.grid_height):
-            # Draw Horizontal Grid Lines
-            row_line_start = (0, (self.cell_margin + self.cell_height) * row)
-            row_line_end = (
-                self.grid_surface.get_height(),
-                (self.cell_margin + self.cell_height) * row,
-            )
-            pygame.draw.line(
-                surface,
-                self.bg_colour,
-                row_line_start,
-                row_line_end,
-                self.cell_margin,
-            )
+            if self.allow_zoom:
+                return self.draw_view()
+        # Only drawing density needs the changed tiles
+        self.ca.disable_change_tracking()
+
+        # The palette code of every visible cell, with the preview over them
+        rows = min(self.height, self.grid_height)
+        cols = min(self.width, self.grid_width)
+        grid = self.ca.get_window(0, 0, rows, cols)
+        codes = cell_codes(np.asarray(grid), self.hover_window(0, 0, rows, cols))
+
+        changed = None
+        if surface is self.grid_surface and self.drawn_cells is not None:
+            changed = np.nonzero(codes != self.drawn_cells)
+            if len(changed[0]) > self.max_dirty_cells:
+                changed = None
+
+        colours = self.get_colours()
+        if changed is not None:
+            dirty_rects = []
+            for row, col in zip(*(index.tolist() for index in changed)):
+                cell_rect = self.get_cell_rect(row, col)
+                surface.fill(colours[codes[row, col]], cell_rect)
+                dirty_rects.append(cell_rect)
+        else:
+            render_cells(surface, codes, self.pixel_rows, self.pixel_cols, colours)
+            dirty_rects = [surface.get_rect()]
 
-            for col in range(self.grid_width):
-                # Draw Vertical Grid Lines
-                if row == 0:
-                    col_line_start = ((self.cell_width + self.cell_margin) * col, 0)
-                    col_line_end = (
-                        (self.cell_width + self.cell_margin) * col,
-                        self.grid_surface.get_width(),
-                    )
-                    pygame.draw.line(
-                        surface,
-                        self.bg_colour,
-                        col_line_start,
-                        col_line_end,
-                        self.cell_margin,
-                    )
-                colour = self.cell_colour
-
-                # Draw Alive and Hovered Cells
-                if self.ca.grid[row][col] == 0:
-                    continue
-                elif self.ca.grid[row][col] == -1:
-                    colour = self.hovered_colour
-                start_pos = (
-                    (self.cell_margin + self.cell_width) * col + self.cell_margin,
-                    (self.cell_margin + self.cell_height) * row + self.cell_margin,
-                )
-                cell_rect = pygame.Rect(start_pos, (self.cell_width, self.cell_height))
-                pygame.draw.rect(surface, colour, cell_rect)
+        if surface is self.grid_surface:
+            self.drawn_cells = codes
+            self.visible_surface = self.grid_surface
+        return dirty_rects
 
-        if self.allow_zoom:
-            self.visible_surface.blit(self.grid_surface, (0, 0), self.zoom_area)
-            self.visible_surface = pygame.transform.scale(
-                self.visible_surface, self.window_size
-            )
+    def draw_view(self) -> list[pygame.Rect]:
+        """
+        Draw the cells in the zoomed view and scale them to fill the window.
+
+        Only the cells overlapping the zoom area are read from the automaton
+        and drawn, so the cost depends on the size of the view rather than
+        of the grid. The scaled window is kept, and drawn again only when
+        the view moves or a cell in it changes. Cells smaller on screen than
+        `min_grid_line_size` are drawn by `draw_density` instead.
+
+        Returns
+        -------
+        list[pygame.Rect]
+            The whole scaled window if it was drawn again, or nothing.
+        """
+        view = self.zoom_area
+        cell_pixels = min(
+            self.window_size[0] / view.width * (self.cell_width + self.cell_margin),
+            self.window_size[1] / view.height * (self.cell_height + self.cell_margin),
+        )
+        if cell_pixels < self.min_grid_line_size:
+            return self.draw_density()
+        self.ca.disable_change_tracking()
+
+        first_row = view.top // (self.cell_height + self.cell_margin)
+        first_col = view.left // (self.cell_width + self.cell_margin)
+        last_row = min(
+            (view.bottom - 1) // (self.cell_height + self.cell_margin),
+            self.grid_height - 1,
+        )
+        last_col = min(
+            (view.right - 1) // (self.cell_width + self.cell_margin),
+            self.grid_width - 1,
+        )
+
+        window = self.ca.get_window(
+            first_row, first_col, last_row - first_row + 1, last_col - first_col + 1
+        )
+        window = np.asarray(window)
+        codes = cell_codes(
+            window, self.hover_window(first_row, first_col, *window.shape)
+        )
+
+        key = (tuple(view), self.window_size)
+        if (
+            key == self.view_key
+            and self.view_cells is not None
+            and np.array_equal(codes, self.view_cells)
+        ):
+            self.visible_surface = self.scaled_window
+            return []
+
+        # Pixel indices of the view, relative to the first cell read
+        pixel_rows = build_pixel_index(
+            self.grid_height, self.cell_height, self.cell_margin, view.top, view.bottom
+        )
+        pixel_cols = build_pixel_index(
+            self.grid_width, self.cell_width, self.cell_margin, view.left, view.right
+        )
+        pixel_rows = np.where(pixel_rows >= 0, pixel_rows - first_row, -1)
+        pixel_cols = np.where(pixel_cols >= 0, pixel_cols - first_col, -1)
+
+        if self.view_source is None or self.view_source.get_size() != view.size:
+            self.view_source = pygame.Surface(view.size)
+        render_cells(
+            self.view_source, codes, pixel_rows, pixel_cols, self.get_colours()
+        )
+        pygame.transform.scale(self.view_source, self.window_size, self.scaled_window)
+
+        self.view_key = key
+        self.view_cells = codes
+        self.visible_surface = self.scaled_window
+        return [self.scaled_window.get_rect()]
+
+    def draw_density(self) -> list[pygame.Rect]:
+        """
+        Draw the zoomed view without grid lines, shading each pixel of the
+        window by the share of live cells in the block under it.
+
+        The blocks come from the level of the density pyramid whose blocks
+        are about a pixel across, so the cost of drawing depends on the size
+        of the window, however many cells share each pixel. The pyramid is
+        kept up to date by summing only the tiles of the grid which changed,
+        which the automaton records as it steps and is edited, so the grid is
+        only compared in full after it was replaced, such as by loading.
+
+        Returns
+        -------
+        list[pygame.Rect]
+            The whole scaled window if it was drawn again, or nothing.
+        """
+        pyramid = self.density_pyramid
+        if self.ca.change_tile_size != pyramid.tile_size:
+            self.ca.enable_change_tracking(pyramid.tile_size)
+        changed_tiles = self.ca.take_changed_tiles()
+        if changed_tiles is None or pyramid.shape != (
+            self.grid_height,
+            self.grid_width,
+        ):
+            # Nothing is known about which cells changed, so compare them all
+            cells = self.ca.get_window(0, 0, self.grid_height, self.grid_width)
+            changed = pyramid.update(np.asarray(cells))
         else:
-            self.visible_surface = self.grid_surface
+            changed = pyramid.update_tiles(changed_tiles, self.ca.get_window)
+
+        view = self.zoom_area
+        key = ("density", tuple(view), self.window_size)
+        if key == self.view_key and not changed:
+            self.visible_surface = self.scaled_window
+            return []
+
+        # The cell under the centre of each pixel of the window
+        window_width, window_height = self.window_size
+        xs = view.left + (np.arange(window_width) + 0.5) * view.width / window_width
+        ys = view.top + (np.arange(window_height) + 0.5) * view.height / window_height
+        pixel_cols = (xs // (self.cell_width + self.cell_margin)).astype(int)
+        pixel_rows = (ys // (self.cell_height + self.cell_margin)).astype(int)
+
+        cells_per_pixel = max(
+            view.width / window_width / (self.cell_width + self.cell_margin),
+            view.height / window_height / (self.cell_height + self.cell_margin),
+        )
+        level = pyramid.get_level(cells_per_pixel)
+        block_rows, block_cols = pyramid.get_blocks(level)
+        render_density(
+            self.scaled_window,
+            pyramid.levels[level],
+            pyramid.areas[level],
+            np.minimum(pixel_rows >> level, block_rows - 1),
+            np.minimum(pixel_cols >> level, block_cols - 1),
+            [self.empty_space_colour, self.cell_colour],
+        )
+
+        self.view_key = key
+        self.visible_surface = self.scaled_window
+        return [self.scaled_window.get_rect()]
 
     # debug
     def print_params(self) -> None:
@@ -578,7 +1003,7 @@ class CellGrid:
             )
         )
         print(f"Grid Dimensions: {self.grid_width} x {self.grid_height}")
-        print(f"Grid Size: {self.grid_surface.get_size()}")
+        print(f"Grid Size: {self.get_grid_pixel_size()}")
         print(f"Grid Window Size: {self.window_size}")
         print(f"Grid Background Colour: {self.bg_colour}")
         print(f"Empty Space Colour: {self.empty_space_colour}")
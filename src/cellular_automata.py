@@ -5,10 +5,67 @@ Primary Author: Sean Nelson
 
 from typing import Callable
 
-import ast
 import numpy as np
 
-from src.rules import game_of_life_rule, rule_30, rule_90, rule_110, rule_184
+from src.cycle_detection import CycleDetector, fingerprint
+from src.engines import ParallelEngine, step_grid
+from src.history import GenerationHistory
+from src.rules import RULES, get_rule
+from src.seeding import create_bit_generator, random_cells
+from src.state_io import load_state, parse_seed, save_state
+
+
+def _reduce_axis(
+    changed: np.ndarray, unit: int, tile_size: int, tiles: int
+) -> np.ndarray | None:
+    """
+    Reduce the first axis of an array of changed units to one entry per
+    tile, or return None if neither of the unit and tile size divides the
+    other.
+    """
+    if tile_size % unit == 0:
+        group = tile_size // unit
+        if len(changed) != tiles * group:
+            padded = np.zeros((tiles * group,) + changed.shape[1:], dtype=bool)
+            padded[: len(changed)] = changed
+            changed = padded
+        return changed.reshape((tiles, group) + changed.shape[1:]).any(axis=1)
+    if unit % tile_size == 0:
+        return np.repeat(changed, unit // tile_size, axis=0)[:tiles]
+    return None
+
+
+def reduce_tiles(
+    changed: np.ndarray, unit: tuple[int, int], tile_size: int, tiles: tuple[int, int]
+) -> np.ndarray | None:
+    """
+    Find which square tiles of a grid hold a change, from a boolean array of
+    the units of the grid which changed, such as cells, packed words or the
+    tiles of an engine.
+
+    Parameters
+    ----------
+    changed : np.ndarray
+        A boolean array, true for each unit which changed.
+    unit : tuple[int, int]
+        The number of rows and columns of cells in a unit.
+    tile_size : int
+        The side of a tile in cells.
+    tiles : tuple[int, int]
+        The number of rows and columns of tiles covering the grid.
+
+    Returns
+    -------
+    np.ndarray or None
+        A boolean array per tile, or None if the units do not line up with
+        the tiles, so each side of a unit must divide the tile size or be a
+        multiple of it.
+    """
+    rows = _reduce_axis(np.asarray(changed, dtype=bool), unit[0], tile_size, tiles[0])
+    if rows is None:
+        return None
+    cols = _reduce_axis(rows.T, unit[1], tile_size, tiles[1])
+    return None if cols is None else cols.T
 
 
 class CellularAutomata:
@@ -23,28 +80,111 @@ class CellularAutomata:
         Rule function to evolve the cellular automaton.
     seed : int | list[int] | None
         Seed for the random number generator or specific initial grid.
+    density : float
+        Chance of each cell being alive when the grid is seeded.
+    bit_generator : np.random.MT19937 | None
+        The automaton's own random number generator, created from the seed.
     grid : np.ndarray
         Grid for the cellular automaton.
+    workers : int
+        Number of threads used to step the grid.
+    engine : ParallelEngine | SparseTileEngine | None
+        Engine stepping the grid, or None to step the whole grid on one thread.
+    active_tiles : np.ndarray | None
+        Tiles the engine will recompute on the next step, if it tracks them.
+    generation : int
+        Number of generations since the grid was seeded or loaded.
+    history : GenerationHistory | None
+        Recent generations that can be returned to, if history is enabled.
+    cycle_detector : CycleDetector | None
+        Fingerprints of recent generations, if cycle detection is enabled.
+    cycle : tuple[int, int] | None
+        The first generation and period of the cycle the grid has settled
+        into, once one has been detected.
+    count_changes : bool
+        Whether cells born and died are counted each generation.
+    births : int
+        Number of cells born in the last generation, if counted.
+    deaths : int
+        Number of cells which died in the last generation, if counted.
+    change_tile_size : int | None
+        Side of the tiles whose changes are recorded, or None if changes are
+        not recorded.
+    changed_tiles : np.ndarray | None
+        Tiles with a cell stepped or edited since `take_changed_tiles` was
+        last called, or None if any cell may have changed.
 
     Methods
     -------
+    clear_grid()
+        Replace the grid with an empty grid.
     set_seed(seed: int | list[int] | None)
         Set the seed for the random number generator or specific initial grid.
+    set_workers(workers: int)
+        Set the number of threads used to step the grid.
+    set_engine(engine)
+        Set the engine used to step the grid.
+    close()
+        Release the engine's resources.
+    enable_history(memory_budget: int, keyframe_interval: int)
+        Start remembering recent generations so they can be returned to.
+    enable_cycle_detection(max_entries: int)
+        Start checking each generation for a repeat of an earlier one.
+    reset_cycle_detection()
+        Forget the generations checked for cycles so far.
+    get_fingerprint()
+        Get a hash of the grid's live cells.
+    enable_change_counts()
+        Start counting the cells born and died each generation.
+    disable_change_counts()
+        Stop counting the cells born and died each generation.
+    enable_change_tracking(tile_size: int)
+        Start recording which tiles of the grid change.
+    disable_change_tracking()
+        Stop recording which tiles of the grid change.
+    take_changed_tiles()
+        Get the tiles which changed since the last call.
     populate_grid_with_seed()
-        Populate the grid using the current seed.
-    populate_grid_with_state_file(file_path: str, load_seed: bool = True)
+        Populate the grid using the current seed and density.
+    populate_grid_with_state_file(file_path: str, load_seed: bool = True,
+                                  load_rule: bool = False)
         Populate the grid with state from a specified file.
     interpret_seed_str(seed_str)
         Interpret and set the seed from a string.
+    get_rule_table()
+        Get the lookup table of the current rule, if it has one.
     update_grid()
+        Advance the grid by one generation and record it in the history.
+    advance_grid()
         Update the grid based on the rule function.
+    step_back()
+        Return to the previous generation from the history.
+    jump_to_generation(generation: int)
+        Rewind or run the grid to a generation.
     get_grid()
         Get the current grid.
-    save_grid_to_file(file_name: str)
+    get_population()
+        Count the live cells of the grid.
+    get_window(top: int, left: int, height: int, width: int)
+        Get a rectangular window of the grid.
+    get_cell(row: int, col: int)
+        Get the state of a single cell.
+    set_cell(row: int, col: int, value: int)
+        Set the state of a single cell.
+    fill_mask(top: int, left: int, mask: np.ndarray, value: int)
+        Set the state of every cell covered by a mask.
+    save_grid_to_file(file_name: str, file_format: str | None = None)
         Save the current grid to a file.
     """
 
-    def __init__(self, grid_size: list, rule: Callable, seed: int | list[int] = None):
+    def __init__(
+        self,
+        grid_size: list,
+        rule: Callable,
+        seed: int | list[int] = None,
+        workers: int = 1,
+        density: float = 0.5,
+    ):
         """
         Initialize the CellularAutomata class.
 
@@ -56,23 +196,305 @@ class CellularAutomata:
             The function defining the rule of the cellular automaton.
         seed : int, list[int], optional
             The seed for the random number generator or specific initial grid. Default is None.
+        workers : int, default is 1
+            The number of threads used to step the grid.
+        density : float, default is 0.5
+            The chance of each cell being alive when the grid is seeded.
+        """
+        self._init_attributes(grid_size, rule, seed, density, workers)
+
+        # Create empty grid
+        self.clear_grid()
+        if seed is not None:
+            self.set_seed(seed)
+
+    def _init_attributes(
+        self,
+        grid_size: list,
+        rule: Callable,
+        seed: int | list[int] | None,
+        density: float,
+        workers: int,
+    ) -> None:
+        """
+        Set up every attribute but the grid, which subclasses store in their
+        own way. Shared by the constructors of every kind of automaton.
         """
         self.grid_size = grid_size
         self.rule = rule
         self.seed = seed
+        self.density = density
+        self.bit_generator = None
 
-        # Create empty grid
-        self.grid = np.zeros((self.grid_size[0], self.grid_size[1]), dtype=int)
-        if seed:
-            self.set_seed(seed)
+        self.engine = None
+        self.set_workers(workers)
+
+        self.generation = 0
+        self.history = None
+        self.cycle_detector = None
+        self.count_changes = False
+        self.births = 0
+        self.deaths = 0
+        self.change_tile_size = None
+        self.changed_tiles = None
+        self._tracked_buffer = None
+
+        self.rule_functions = dict(RULES)
+
+    def clear_grid(self) -> None:
+        """
+        Replace the grid with an empty grid.
+        """
+        self.grid = np.zeros((self.grid_size[0], self.grid_size[1]), dtype=np.int8)
+
+    def set_workers(self, workers: int) -> None:
+        """
+        Set the number of threads used to step the grid.
+
+        Parameters
+        ----------
+        workers : int
+            The number of threads. With more than one, the grid is split into
+            row bands which are stepped concurrently.
+        """
+        self.workers = workers
+        self.set_engine(ParallelEngine(workers) if workers > 1 else None)
+
+    def set_engine(self, engine) -> None:
+        """
+        Set the engine used to step the grid.
+
+        Parameters
+        ----------
+        engine : ParallelEngine, SparseTileEngine or None
+            The engine, or None to step the whole grid on one thread.
+        """
+        if self.engine is not None:
+            self.engine.close()
 
-        self.rule_functions = {
-            "Game of Life": game_of_life_rule,
-            "Rule 30": rule_30,
-            "Rule 90": rule_90,
-            "Rule 110": rule_110,
-            "Rule 184": rule_184,
-        }
+        self.engine = engine
+
+    def close(self) -> None:
+        """
+        Release the engine's resources, such as its worker threads. The
+        automaton steps on one thread afterwards.
+        """
+        self.set_engine(None)
+
+    def enable_history(
+        self, memory_budget: int = 64 * 1024 * 1024, keyframe_interval: int = 64
+    ) -> None:
+        """
+        Start remembering recent generations so they can be returned to.
+
+        Parameters
+        ----------
+        memory_budget : int, default is 64 MiB
+            The most bytes the history keeps before forgetting the oldest
+            generations.
+        keyframe_interval : int, default is 64
+            The number of generations between full copies of the grid.
+        """
+        self.history = GenerationHistory(memory_budget, keyframe_interval)
+        self.history.record(self.get_grid(), self.generation)
+
+    def enable_cycle_detection(self, max_entries: int = 4096) -> None:
+        """
+        Start checking each generation for a repeat of an earlier one.
+
+        Parameters
+        ----------
+        max_entries : int, default is 4096
+            The most generations remembered, and so the longest period that
+            can be detected.
+        """
+        self.cycle_detector = CycleDetector(max_entries)
+        self.cycle_detector.check(self.get_fingerprint(), self.generation)
+
+    def reset_cycle_detection(self) -> None:
+        """
+        Forget the generations checked for cycles so far, for example after
+        cells were edited.
+        """
+        if self.cycle_detector is not None:
+            self.cycle_detector.clear()
+
+    @property
+    def cycle(self) -> tuple[int, int] | None:
+        """
+        The first generation and period of the cycle the grid has settled
+        into, or None if none has been detected. A period of 1 is a still
+        life.
+        """
+        if self.cycle_detector is None:
+            return None
+        return self.cycle_detector.cycle
+
+    def get_fingerprint(self) -> bytes:
+        """
+        Get a hash of the grid's live cells.
+
+        Returns
+        -------
+        bytes
+            A fingerprint equal for equal grids.
+        """
+        return fingerprint(self.get_grid())
+
+    def enable_change_counts(self) -> None:
+        """
+        Start counting the cells born and died each generation, in `births`
+        and `deaths`. They are counted as the grid steps, from the grids
+        before and after, so counting costs a comparison of the two but no
+        copy of the grid.
+        """
+        self.count_changes = True
+
+    def disable_change_counts(self) -> None:
+        """
+        Stop counting the cells born and died each generation.
+        """
+        self.count_changes = False
+
+    def enable_change_tracking(self, tile_size: int = 64) -> None:
+        """
+        Start recording which tiles of the grid change, by stepping or by
+        editing cells, so they can be read with `take_changed_tiles` without
+        comparing the whole grid. Until the first call to
+        `take_changed_tiles`, any cell may have changed.
+
+        Parameters
+        ----------
+        tile_size : int, default is 64
+            The side of a tile in cells, best a power of two so the tiles
+            line up with packed words and with the tiles of engines.
+        """
+        self.change_tile_size = tile_size
+        self.changed_tiles = None
+
+    def disable_change_tracking(self) -> None:
+        """
+        Stop recording which tiles of the grid change.
+        """
+        self.change_tile_size = None
+        self.changed_tiles = None
+
+    def take_changed_tiles(self) -> np.ndarray | None:
+        """
+        Get the tiles with a cell stepped or edited since the last call, and
+        start recording afresh.
+
+        Returns
+        -------
+        np.ndarray or None
+            A boolean array per tile of `change_tile_size` cells, or None if
+            changes are not recorded or any cell may have changed, such as
+            after the grid was seeded, loaded or rewound.
+        """
+        if self.change_tile_size is None:
+            return None
+
+        tiles = self.changed_tiles
+        if self._grid_buffer() is not self._tracked_buffer:
+            tiles = None
+        size = self.change_tile_size
+        self.changed_tiles = np.zeros(
+            (-(-self.grid_size[0] // size), -(-self.grid_size[1] // size)), dtype=bool
+        )
+        self._tracked_buffer = self._grid_buffer()
+        return tiles
+
+    def _grid_buffer(self) -> np.ndarray:
+        """
+        Get the array the cells are stored in. Assigning a different array
+        means any cell may have changed.
+        """
+        return self.grid
+
+    def _forget_changes(self) -> None:
+        """
+        Record that any cell may have changed, for grids replaced in place.
+        """
+        self.changed_tiles = None
+
+    def _mark_changed(
+        self, top: int, left: int, height: int = 1, width: int = 1
+    ) -> None:
+        """
+        Record that a region of cells was edited, for the engine and for the
+        changed tiles.
+        """
+        if self.engine is not None:
+            self.engine.mark_changed(top, left, height, width)
+        if self.changed_tiles is not None:
+            size = self.change_tile_size
+            self.changed_tiles[
+                top // size : (top + height - 1) // size + 1,
+                left // size : (left + width - 1) // size + 1,
+            ] = True
+
+    def _record_step_tiles(
+        self, changed: np.ndarray | None, unit: tuple[int, int] = (1, 1), top: int = 0
+    ) -> None:
+        """
+        Record the tiles changed by a step, from a boolean array of the units
+        of the grid which changed, or None if they are not known. A band of
+        rows starting at row `top` may be given, with units one row high.
+        """
+        if self.changed_tiles is None:
+            return
+        if changed is None:
+            self.changed_tiles = None
+            return
+
+        size = self.change_tile_size
+        first, skipped = divmod(top, size)
+        if skipped:
+            # Line the band up with the tiles it overlaps
+            padding = np.zeros((skipped,) + changed.shape[1:], dtype=bool)
+            changed = np.concatenate([padding, changed])
+        tile_rows = min(
+            self.changed_tiles.shape[0] - first, -(-len(changed) * unit[0] // size)
+        )
+
+        tiles = reduce_tiles(
+            changed, unit, size, (tile_rows, self.changed_tiles.shape[1])
+        )
+        if tiles is None:
+            self.changed_tiles = None
+        else:
+            self.changed_tiles[first : first + tile_rows] |= tiles
+
+    def _record_step(self, old: np.ndarray, new: np.ndarray, engine=None) -> None:
+        """
+        Count the cells born and died in a step and record the tiles it
+        changed, from the grids before and after it, or from the engine which
+        took it if it stepped in place or tracks its changed tiles.
+        """
+        if self.count_changes and new is old:
+            self.births, self.deaths = engine.births, engine.deaths
+        elif self.count_changes:
+            self.births = int(np.count_nonzero(new > old))
+            self.deaths = int(np.count_nonzero(old > new))
+
+        if self.changed_tiles is None:
+            return
+        engine_tiles = getattr(engine, "changed_tiles", None)
+        if engine_tiles is not None:
+            self._record_step_tiles(engine_tiles, (engine.tile_size,) * 2)
+        elif new is old:
+            # Stepped in place without saying where, so anything may differ
+            self._record_step_tiles(None)
+        else:
+            self._record_step_tiles(old != new)
+
+    @property
+    def active_tiles(self) -> np.ndarray | None:
+        """
+        The tiles the engine will recompute on the next step, as a boolean
+        array per tile, or None if the engine does not track them.
+        """
+        return getattr(self.engine, "active_tiles", None)
 
     def set_seed(self, seed: int | list[int] | None):
         """
@@ -81,15 +503,18 @@ class CellularAutomata:
         Parameters
         ----------
         seed : int, list[int], None
-            The seed for the random number generator or specific initial grid.
+            The seed for the random number generator or specific initial grid,
+            or None for an empty grid.
         """
         self.seed = seed
-        # Clear grid if setting no seed
-        if not seed:
-            self.grid = np.zeros((self.grid_size[0], self.grid_size[1]), dtype=int)
+        self.generation = 0
+        self.reset_cycle_detection()
+        # Clear grid if setting no seed. A seed of 0 seeds the grid.
+        if seed is None or seed == []:
+            self.clear_grid()
             return
 
-        np.random.seed(seed)
+        self.bit_generator = create_bit_generator(seed)
         self.populate_grid_with_seed()
 
     def update_rule(self, rule_name: str) -> None:
@@ -99,43 +524,61 @@ class CellularAutomata:
         Parameters
         ----------
         rule_name : str
-            The rule function to be update the ca.
+            The rule function to be update the ca, either a name from
+            `rule_functions` or "B3/S23" style notation.
         """
-        rule_function = self.rule_functions[rule_name]
+        if rule_name in self.rule_functions:
+            rule_function = self.rule_functions[rule_name]
+        else:
+            rule_function = get_rule(rule_name)
 
         self.rule = rule_function
 
     def populate_grid_with_seed(self) -> None:
         """
-        Populate the grid using the current seed.
+        Populate the grid using the current seed and density.
+
+        Cells are drawn from the automaton's own generator, carrying on from
+        its last draw, and stored one byte per cell.
         """
-        self.grid = np.random.randint(2, size=(self.grid_size[0], self.grid_size[1]))
+        if self.bit_generator is None:
+            self.bit_generator = create_bit_generator(self.seed)
+        self.grid = random_cells(
+            self.bit_generator, self.grid_size, self.density, np.int8
+        )
 
     def populate_grid_with_state_file(
-        self, file_path: str, load_seed: bool = True
+        self, file_path: str, load_seed: bool = True, load_rule: bool = False
     ) -> None:
         """
         Populate the grid with the state from a specified file.
 
+        Text, bit-packed binary and RLE files are all accepted, with the
+        format detected from the start of the file. States larger than the
+        grid are cropped, and smaller states fill its top left corner.
+
         Parameters
         ----------
         file_path : str
             The path to the file.
         load_seed : bool, default is True
             If true, load the seed from the file.
+        load_rule : bool, default is False
+            If true, load the rule from the file, if it records one.
         """
-        with open(file_path, "r") as file:
-            lines = file.readlines()
+        state, seed, rule = load_state(file_path)
+        self.generation = 0
+        self.reset_cycle_detection()
         if load_seed:
-            self.interpret_seed_str(lines[0])
-
-        state_width = len(lines[1]) - 1
-        state_height = len(lines) - 1
-        self.grid = np.zeros(self.grid_size)
+            self.seed = seed
+        if load_rule and rule:
+            self.rule = get_rule(rule)
 
-        for i in range(min(self.grid_size[0], state_height)):
-            for j in range(min(self.grid_size[1], state_width)):
-                self.grid[i][j] = lines[i + 1][j]
+        height = min(self.grid_size[0], state.shape[0])
+        width = min(self.grid_size[1], state.shape[1])
+        grid = np.zeros(self.grid_size, dtype=np.int8)
+        grid[:height, :width] = state[:height, :width]
+        self.grid = grid
 
     def interpret_seed_str(self, seed_str) -> None:
         """
@@ -146,19 +589,120 @@ class CellularAutomata:
         seed_str : str
             The string from which to interpret the seed.
         """
-        raw_seed = seed_str.split(":")[1]
-        self.seed = ast.literal_eval(raw_seed)
+        self.seed = parse_seed(seed_str)
+
+    def get_rule_table(self) -> np.ndarray | None:
+        """
+        Get the lookup table of the current rule, if it has one.
+
+        Returns
+        -------
+        np.ndarray or None
+            The 18 entry lookup table of the rule, or None if the rule is a
+            custom function that must be applied cell by cell.
+        """
+        return getattr(self.rule, "table", None)
 
     def update_grid(self) -> None:
         """
-        Update the grid based on the rule function.
+        Advance the grid by one generation, record it in the history and
+        check it for cycles.
+
+        The grid is recorded before stepping as well, so cells edited since
+        the last step are remembered.
+        """
+        if self.history is not None:
+            self.history.record(self.get_grid(), self.generation)
+
+        detector = self.cycle_detector
+        if detector is not None and detector.last_generation != self.generation:
+            # Edited, rewound or reloaded since the last check
+            detector.check(self.get_fingerprint(), self.generation)
+
+        if self._grid_buffer() is not self._tracked_buffer:
+            # Replaced since changes were last recorded
+            self._forget_changes()
+        self.advance_grid()
+        self._tracked_buffer = self._grid_buffer()
+        self.generation += 1
+
+        if self.history is not None:
+            self.history.record(self.get_grid(), self.generation)
+        if detector is not None:
+            detector.check(self.get_fingerprint(), self.generation)
+
+    def advance_grid(self) -> None:
+        """
+        Update the grid based on the rule function, counting the cells born
+        and died if enabled.
+
+        Rules with a lookup table step the whole grid at once, other rules
+        fall back to calling the rule function for every cell.
         """
-        new_grid = np.zeros(self.grid_size, dtype=int)
+        table = self.get_rule_table()
+        grid = self.get_grid()
+        if table is not None and self.engine is not None:
+            self.grid = self.engine.step(grid, table)
+            self._record_step(grid, self.grid, self.engine)
+            return
+        if table is not None:
+            self.grid = step_grid(grid, table)
+            self._record_step(grid, self.grid)
+            return
+
+        new_grid = np.zeros(self.grid_size, dtype=np.int8)
         for i in range(self.grid_size[0]):
             for j in range(self.grid_size[1]):
-                new_grid[i, j] = self.rule(self.grid, i, j)
+                new_grid[i, j] = self.rule(grid, i, j)
+        self._record_step(grid, new_grid)
         self.grid = new_grid
 
+    def step_back(self) -> bool:
+        """
+        Return to the previous generation from the history.
+
+        Returns
+        -------
+        bool
+            True if the grid stepped back, or False if the previous generation
+            is not in the history.
+        """
+        if self.history is None or self.generation == 0:
+            return False
+
+        self.history.record(self.get_grid(), self.generation)
+        if self.generation - 1 < self.history.oldest:
+            return False
+
+        self.jump_to_generation(self.generation - 1)
+        return True
+
+    def jump_to_generation(self, generation: int) -> None:
+        """
+        Rewind or run the grid to a generation.
+
+        Earlier generations are rebuilt from the history, without stepping,
+        and later generations are run to.
+
+        Parameters
+        ----------
+        generation : int
+            The generation to move to.
+        """
+        if generation >= self.generation:
+            for _ in range(generation - self.generation):
+                self.update_grid()
+            return
+
+        if self.history is None:
+            raise ValueError("History is not enabled")
+        self.history.record(self.get_grid(), self.generation)
+
+        grid = self.history.rewind(generation)
+        self.grid = grid.astype(self.get_grid().dtype)
+        self.generation = generation
+        self.reset_cycle_detection()
+
     def get_grid(self) -> np.ndarray:
         """
         Get the current grid.
@@ -170,7 +714,115 @@ class CellularAutomata:
         """
         return self.grid
 
-    def save_grid_to_file(self, file_name: str) -> None:
+    def get_population(self) -> int:
+        """
+        Count the live cells of the grid.
+
+        Returns
+        -------
+        int
+            The number of cells equal to 1.
+        """
+        return int(np.count_nonzero(self.get_grid() == 1))
+
+    def get_window(self, top: int, left: int, height: int, width: int) -> np.ndarray:
+        """
+        Get a rectangular window of the grid.
+
+        Parameters
+        ----------
+        top : int
+            The row at the top of the window.
+        left : int
+            The column at the left of the window.
+        height : int
+            The number of rows in the window.
+        width : int
+            The number of columns in the window.
+
+        Returns
+        -------
+        np.ndarray
+            The cells of the grid inside the window.
+        """
+        return self.grid[top : top + height, left : left + width]
+
+    def get_cell(self, row: int, col: int) -> int:
+        """
+        Get the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row index of the cell.
+        col : int
+            The column index of the cell.
+
+        Returns
+        -------
+        int
+            The state of the cell.
+        """
+        return int(self.grid[row, col])
+
+    def set_cell(self, row: int, col: int, value: int) -> None:
+        """
+        Set the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row index of the cell.
+        col : int
+            The column index of the cell.
+        value : int
+            The new state of the cell.
+        """
+        if (value == 1) != (self.grid[row, col] == 1):
+            self.reset_cycle_detection()
+        self.grid[row, col] = value
+        self._mark_changed(row, col)
+
+    def _clip_mask(
+        self, top: int, left: int, mask: np.ndarray
+    ) -> tuple[int, int, np.ndarray]:
+        """
+        Clip a mask placed on the grid to the grid's bounds, returning the
+        new top left corner and the part of the mask inside the grid.
+        """
+        height, width = self.grid_size
+        rows = slice(max(-top, 0), max(min(height - top, mask.shape[0]), 0))
+        cols = slice(max(-left, 0), max(min(width - left, mask.shape[1]), 0))
+        return max(top, 0), max(left, 0), mask[rows, cols]
+
+    def fill_mask(self, top: int, left: int, mask: np.ndarray, value: int) -> None:
+        """
+        Set the state of every cell covered by a mask in a single assignment.
+        Parts of the mask outside the grid are ignored.
+
+        Parameters
+        ----------
+        top : int
+            The row of the grid under the top of the mask.
+        left : int
+            The column of the grid under the left of the mask.
+        mask : np.ndarray
+            A boolean array, true for the cells to set.
+        value : int
+            The new state of the cells.
+        """
+        top, left, mask = self._clip_mask(top, left, mask)
+        if not mask.any():
+            return
+
+        height, width = mask.shape
+        window = self.grid[top : top + height, left : left + width]
+        if ((window[mask] == 1) != (value == 1)).any():
+            self.reset_cycle_detection()
+        window[mask] = value
+        self._mark_changed(top, left, height, width)
+
+    def save_grid_to_file(self, file_name: str, file_format: str | None = None) -> None:
         """
         Save the current grid to a file.
 
@@ -178,11 +830,12 @@ class CellularAutomata:
         ----------
         file_name : str
             The name of the file to which the grid should be saved.
+        file_format : str, optional
+            One of "text", "binary" or "rle". Defaults to "rle" for files
+            ending in .rle, and "text" otherwise.
         """
-        with open(file_name, "w") as file:
-            file.write(f"Seed:{self.seed}\n")
-            for i in range(self.grid_size[0]):
-                file.write(
-                    "".join(str(int(self.grid[i, j])) for j in range(self.grid_size[1]))
-                    + "\n"
-                )
+        if file_format is None:
+            file_format = "rle" if file_name.endswith(".rle") else "text"
+
+        rule = getattr(self.rule, "notation", None)
+        save_state(file_name, self.get_grid(), self.seed, rule, file_format)
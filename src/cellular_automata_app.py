@@ -9,6 +9,7 @@ import pygame
 import pygame_gui
 import random
 import math
+import time
 
 from pygame_gui.elements import (
     UIButton,
@@ -23,6 +24,10 @@ from pygame_gui.windows import UIFileDialog, UIConfirmationDialog
 
 from src import rules
 from src.cell_grid import CellGrid
+from src.mapped_cellular_automata import MappedCellularAutomata
+from src.metrics import FrameMetrics, MetricsHUD
+from src.scheduler import FixedStepScheduler
+from src.state_io import detect_format, read_binary_header
 
 
 class CellularAutomataApp:
@@ -50,7 +55,14 @@ class CellularAutomataApp:
         self.spped_slider_label = None
         self.speed_slider = None
         self.pause_button = None
+        self.previous_button = None
         self.next_button = None
+        self.generation_label = None
+        self.jump_text_entry = None
+        self.jump_button = None
+        self.cycle_label = None
+        self.pause_on_cycle = True
+        self.found_cycle = None
 
         self.seed_panel = None
         self.random_seed_button = None
@@ -68,7 +80,10 @@ class CellularAutomataApp:
         self.file_dialog = None
         self.overwrite_dialog = None
 
+        # Frames are drawn at self.fps while generations run at their own rate
         self.fps = 60
+        self.scheduler = FixedStepScheduler(60)
+        self.speed_label_age = 0.0
 
         # Utilities Panel
         self.utilities_panel = None
@@ -83,6 +98,17 @@ class CellularAutomataApp:
         self.previous_mouse_pos = None
         self.moved = False
 
+        # Areas of the window covered by UI elements in the last frame
+        self.previous_ui_rects = None
+
+        # Measurements of each frame, shown by the HUD toggled with F3
+        self.metrics = FrameMetrics()
+        self.metrics_hud = MetricsHUD(pygame.Rect(1180, 50, 210, 280))
+        self.hud_was_visible = False
+        self.frame_generations = 0
+        self.frame_births = 0
+        self.frame_deaths = 0
+
         self.create_ui()
 
         self.clock = pygame.time.Clock()
@@ -119,18 +145,20 @@ class CellularAutomataApp:
         """
         This method creates the control panel of the user interface. This panel
         contains a slider to adjust the speed of iterations, a button to pause
-        or play the cellular automata simulation, and a button to manually
-        advance to the next state of the simulation.
+        or play the cellular automata simulation, buttons to manually step back
+        to the previous state or advance to the next state of the simulation,
+        an entry to jump to a chosen generation, and a label reporting when
+        the grid has settled into a cycle.
         """
         self.control_panel = UIPanel(
-            pygame.Rect(48, 48, 200, 126),
+            pygame.Rect(48, 48, 200, 231),
             starting_layer_height=4,
             manager=self.ui_manager,
         )
 
         self.spped_slider_label = UILabel(
             panel_item_rect,
-            "Speed: 60 Iterations/s",
+            "Speed: 60 gen/s",
             manager=self.ui_manager,
             container=self.control_panel,
         )
@@ -138,17 +166,31 @@ class CellularAutomataApp:
         self.speed_slider = UIHorizontalSlider(
             panel_item_rect,
             60,
-            (10, 120),
+            (1, 2000),
             manager=self.ui_manager,
             container=self.control_panel,
             anchors={"top_target": self.spped_slider_label},
         )
 
-        self.pause_button = UIButton(
+        self.previous_button = UIButton(
             pygame.Rect(
                 panel_item_rect.x,
                 panel_item_rect.y * 2,
-                83,
+                55,
+                panel_item_rect.height,
+            ),
+            "Prev",
+            manager=self.ui_manager,
+            container=self.control_panel,
+            object_id="#previous_button",
+            anchors={"top_target": self.speed_slider},
+        )
+
+        self.pause_button = UIButton(
+            pygame.Rect(
+                70,
+                panel_item_rect.y * 2,
+                55,
                 panel_item_rect.height,
             ),
             "Play",
@@ -160,9 +202,9 @@ class CellularAutomataApp:
 
         self.next_button = UIButton(
             pygame.Rect(
-                101,
+                130,
                 panel_item_rect.y * 2,
-                83,
+                55,
                 panel_item_rect.height,
             ),
             "Next",
@@ -172,6 +214,50 @@ class CellularAutomataApp:
             anchors={"top_target": self.speed_slider},
         )
 
+        self.generation_label = UILabel(
+            panel_item_rect,
+            "Generation: 0",
+            manager=self.ui_manager,
+            container=self.control_panel,
+            anchors={"top_target": self.pause_button},
+        )
+
+        self.jump_text_entry = UITextEntryLine(
+            pygame.Rect(
+                panel_item_rect.x,
+                panel_item_rect.y,
+                110,
+                panel_item_rect.height,
+            ),
+            manager=self.ui_manager,
+            container=self.control_panel,
+            object_id="#jump_text_entry",
+            placeholder_text="Generation",
+            anchors={"top_target": self.generation_label},
+        )
+
+        self.jump_button = UIButton(
+            pygame.Rect(
+                125,
+                panel_item_rect.y,
+                60,
+                panel_item_rect.height,
+            ),
+            "Jump",
+            manager=self.ui_manager,
+            container=self.control_panel,
+            object_id="#jump_button",
+            anchors={"top_target": self.generation_label},
+        )
+
+        self.cycle_label = UILabel(
+            panel_item_rect,
+            "No cycle found",
+            manager=self.ui_manager,
+            container=self.control_panel,
+            anchors={"top_target": self.jump_text_entry},
+        )
+
     def create_seed_panel(self, panel_item_rect: pygame.Rect) -> None:
         """
         This method creates the seed panel of the user interface. The seed panel
@@ -260,7 +346,7 @@ class CellularAutomataApp:
         )
 
         self.rules_dropdown = UIDropDownMenu(
-            ["Game of Life", "Rule 30", "Rule 90", "Rule 110", "Rule 184"],
+            list(rules.RULES),
             "Game of Life",
             panel_item_rect,
             manager=self.ui_manager,
@@ -308,18 +394,9 @@ class CellularAutomataApp:
             anchors={"top_target": self.rules_panel},
         )
 
+        # Stamp shapes are listed from the library's index, without reading them
         self.brush_type_dropdown = UIDropDownMenu(
-            [
-                "Circle",
-                "Block",
-                "Beehive",
-                "Blinker",
-                "Glider",
-                "Glider Gun",
-                "Beacon",
-                "Bomb",
-                "David Hilbert",
-            ],
+            ["Circle"] + self.cell_grid.painter.stamp_tool.library.names(),
             "Circle",
             panel_item_rect,
             manager=self.ui_manager,
@@ -416,22 +493,15 @@ class CellularAutomataApp:
         rule_string : str
             The name of the rule to be set for the cellular automata grid.
             The rule names correspondto predefined rule sets,
-            including "Game of Life", "Rule 30", "Rule 90", "Rule 110", and "Rule 184".
-        """
-        rule = None
-        if rule_string == "Game of Life":
-            rule = rules.game_of_life_rule
-        elif rule_string == "Rule 30":
-            rule = rules.rule_30
-        elif rule_string == "Rule 90":
-            rule = rules.rule_90
-        elif rule_string == "Rule 110":
-            rule = rules.rule_110
-        elif rule_string == "Rule 184":
-            rule = rules.rule_184
-
-        if rule:
-            self.cell_grid.set_rule(rule)
+            including "Game of Life", "Rule 30", "Rule 90", "Rule 110", and "Rule 184",
+            or any Life-like rule written in "B3/S23" notation.
+        """
+        try:
+            rule = rules.get_rule(rule_string)
+        except ValueError:
+            return
+
+        self.cell_grid.set_rule(rule)
 
     def set_utility(self, utility: str) -> None:
         """
@@ -477,16 +547,91 @@ class CellularAutomataApp:
         if self.is_paused:
             self.pause_button.set_text("Pause")
             self.is_paused = False
+            self.scheduler.reset()
         else:
             self.pause_button.set_text("Play")
             self.is_paused = True
+        self.update_speed_label()
 
     def next(self) -> None:
         """
         This method updates the cell grid once if the application is currently paused.
         """
         if self.is_paused:
-            self.cell_grid.update()
+            self.step_generation()
+
+    def step_generation(self) -> None:
+        """
+        This method advances the cell grid by one generation, counting the
+        generation towards this frame's metrics, along with the cells born
+        and died in it while they are being counted.
+        """
+        self.cell_grid.update()
+        ca = self.cell_grid.ca
+        self.frame_generations += 1
+        if ca.count_changes:
+            self.frame_births += ca.births
+            self.frame_deaths += ca.deaths
+
+    def export_metrics(self) -> None:
+        """
+        This method saves the recent frame metrics to a timestamped CSV file in
+        the working directory.
+        """
+        path = time.strftime("metrics_%Y%m%d_%H%M%S.csv")
+        self.metrics.save_csv(path)
+        print(f"Saved metrics to {path}")
+
+    def previous(self) -> None:
+        """
+        This method returns the cell grid to its previous generation from the
+        history if the application is currently paused.
+        """
+        if self.is_paused:
+            self.cell_grid.ca.step_back()
+
+    def jump_to_generation(self) -> None:
+        """
+        This method moves the cell grid to the generation entered in the jump
+        entry. Earlier generations are restored from the history, and later
+        generations are simulated.
+        """
+        try:
+            generation = int(self.jump_text_entry.get_text().strip())
+        except ValueError:
+            return
+
+        try:
+            self.cell_grid.ca.jump_to_generation(generation)
+        except ValueError as error:
+            print(error)
+
+    def update_generation_label(self) -> None:
+        """
+        This method shows the current generation and, when it does not reach
+        back to the start, the oldest generation the history can return to.
+        """
+        ca = self.cell_grid.ca
+        text = f"Generation: {ca.generation}"
+        if ca.history is not None and ca.history.oldest:
+            text += f" (from {ca.history.oldest})"
+        if self.generation_label.text != text:
+            self.generation_label.set_text(text)
+
+    def update_cycle_label(self) -> None:
+        """
+        This method shows whether the grid has settled into a still life or a
+        repeating cycle, and from which generation.
+        """
+        cycle = self.cell_grid.ca.cycle
+        if cycle is None:
+            text = "No cycle found"
+        elif cycle[1] == 1:
+            text = f"Still life from {cycle[0]}"
+        else:
+            text = f"Period {cycle[1]} from {cycle[0]}"
+        if self.cycle_label.text != text:
+            self.cycle_label.set_text(text)
 
     def save_state(self, path: str) -> None:
         """
@@ -514,22 +659,52 @@ class CellularAutomataApp:
             return
 
         _, ext = os.path.splitext(path)
-        if not ext == ".state":
+        if ext not in (".state", ".rle"):
             path += ".state"
 
-        self.cell_grid.reset_hovered()
-        self.cell_grid.ca.save_grid_to_file(path)
+        self.cell_grid.ca.save_grid_to_file(path, self.get_state_format(path))
+
+    def get_state_format(self, path: str) -> str:
+        """
+        This method chooses the format a grid state is saved in: RLE for .rle
+        files, and the compact bit-packed binary format for .state files.
+
+        Parameters
+        ----------
+        path : str
+            The file path the grid state is saved to.
+        """
+        return "rle" if path.endswith(".rle") else "binary"
 
     def load_state(self, path: str) -> None:
         """
         This method loads a previously saved state of the cellular automata
         grid from a file.
 
+        Binary state files with more rows or columns than the grid are opened
+        memory-mapped rather than cropped, and the grid takes their size.
+        Only the cells in view are then read from the file, so grids larger
+        than memory can be viewed and stepped, which changes the file.
+
         Parameters
         ----------
         path : str
             The file path to load the grid state from.
         """
+        if detect_format(path) == "binary":
+            header, _ = read_binary_header(path)
+            if (
+                header["height"] > self.cell_grid.grid_height
+                or header["width"] > self.cell_grid.grid_width
+            ):
+                self.cell_grid.set_ca(MappedCellularAutomata(path))
+                if self.metrics_hud.visible:
+                    self.cell_grid.ca.enable_change_counts()
+                self.previous_ui_rects = None
+                if self.cell_grid.ca.seed is not None:
+                    self.seed_text_entry.set_text(str(self.cell_grid.ca.seed))
+                return
+
         self.cell_grid.ca.populate_grid_with_state_file(path)
         if self.cell_grid.ca.seed:
             self.seed_text_entry.set_text(str(self.cell_grid.ca.seed))
@@ -556,7 +731,7 @@ class CellularAutomataApp:
             initial_file_path="grid_states/",
             allow_picking_directories=False,
             allow_existing_files_only=load,
-            allowed_suffixes={".state"},
+            allowed_suffixes={".state", ".rle"},
         )
         self.file_dialog.load = load
 
@@ -601,10 +776,25 @@ class CellularAutomataApp:
         elif event.button == 5:  # scroll down
             self.cell_grid.zoom_out()
 
+    def process_mousedrag(self, event: pygame.event.Event) -> None:
+        """
+        This method handles mouse motion with the right button held, panning
+        the zoomed cell grid so its cells follow the mouse.
+
+        Parameters
+        ----------
+        event : pygame.event.Event
+            The pygame event object for the mouse motion event.
+        """
+        if event.buttons[2] and self.cell_grid.allow_zoom:
+            self.cell_grid.pan(-event.rel[0], -event.rel[1])
+
     def process_keypress(self, event: pygame.event.Event) -> None:
         """
         This method handles key press events. It supports pausing/unpausing
-        the application, stepping through the simulation, and toggling debug mode.
+        the application, stepping forwards and backwards through the simulation,
+        toggling zoom with F2, toggling the metrics HUD with F3 and exporting
+        metrics with F4.
 
         Parameters
         ----------
@@ -615,6 +805,21 @@ class CellularAutomataApp:
             self.pause()
         if event.key == pygame.K_RETURN:
             self.next()
+        if event.key == pygame.K_LEFT:
+            self.previous()
+        if event.key == pygame.K_F2:
+            self.cell_grid.toggle_zoom()
+            # The zoomed and unzoomed grids cover different areas
+            self.previous_ui_rects = None
+        if event.key == pygame.K_F3:
+            self.metrics_hud.toggle()
+            # Cells born and died are only counted while they are shown
+            if self.metrics_hud.visible:
+                self.cell_grid.ca.enable_change_counts()
+            else:
+                self.cell_grid.ca.disable_change_counts()
+        if event.key == pygame.K_F4:
+            self.export_metrics()
         # if event.key == pygame.K_d:
         #     self.debug_mode = not self.debug_mode
         #     self.ui_manager.set_visual_debug_mode(self.debug_mode)
@@ -633,6 +838,10 @@ class CellularAutomataApp:
             self.pause()
         if event.ui_element == self.next_button:
             self.next()
+        if event.ui_element == self.previous_button:
+            self.previous()
+        if event.ui_element == self.jump_button:
+            self.jump_to_generation()
 
         if event.ui_element == self.random_seed_button:
             new_seed = random.randint(0, 100000)
@@ -726,7 +935,8 @@ class CellularAutomataApp:
         event : pygame.event.Event
             The pygame event object for the confirmation dialog confirmed event.
         """
-        self.cell_grid.ca.save_grid_to_file(self.overwrite_dialog.overwrite_path)
+        path = self.overwrite_dialog.overwrite_path
+        self.cell_grid.ca.save_grid_to_file(path, self.get_state_format(path))
 
     def process_events(self) -> None:
         """
@@ -751,6 +961,8 @@ class CellularAutomataApp:
                 event.button == 4 or event.button == 5
             ):
                 self.process_mousewheel(event)
+            if event.type == pygame.MOUSEMOTION:
+                self.process_mousedrag(event)
             if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
                 if event.type != pygame_gui.UI_BUTTON_PRESSED:
                     self.drawing = False
@@ -784,8 +996,8 @@ class CellularAutomataApp:
                 self.process_confirmation_dialog_confirmed(event)
 
             if self.speed_slider.has_moved_recently:
-                self.fps = self.speed_slider.get_current_value()
-                self.spped_slider_label.set_text(f"Speed: {self.fps} Iterations/s")
+                self.scheduler.set_rate(self.speed_slider.get_current_value())
+                self.update_speed_label()
 
             if self.brush_size_slider.has_moved_recently:
                 self.brush_size = self.brush_size_slider.get_current_value()
@@ -794,8 +1006,58 @@ class CellularAutomataApp:
         if self.drawing:
             self.process_mouseclick()
 
-        if not self.is_paused:
-            self.cell_grid.update()
+    def update_simulation(self, time_delta: float) -> None:
+        """
+        This method runs the generations due since the last frame while the
+        simulation is playing, and refreshes the speed label twice a second.
+
+        Parameters
+        ----------
+        time_delta : float
+            The time in seconds since the last frame.
+        """
+        if self.is_paused:
+            return
+
+        self.scheduler.run(self.step_generation, time_delta)
+
+        # Pause once when the grid first settles into a cycle, so playing on
+        # afterwards is not interrupted again
+        cycle = self.cell_grid.ca.cycle
+        if cycle is not None and cycle != self.found_cycle and self.pause_on_cycle:
+            self.pause()
+        self.found_cycle = cycle
+
+        self.speed_label_age += time_delta
+        if self.speed_label_age >= 0.5:
+            self.speed_label_age = 0.0
+            self.update_speed_label()
+
+    def update_speed_label(self) -> None:
+        """
+        This method shows the target generations per second on the speed label,
+        along with the rate actually achieved while the simulation is playing.
+        """
+        target = int(self.scheduler.rate)
+        if self.is_paused:
+            self.spped_slider_label.set_text(f"Speed: {target} gen/s")
+        else:
+            achieved = round(self.scheduler.achieved_rate)
+            self.spped_slider_label.set_text(f"Speed: {achieved}/{target} gen/s")
+
+    def get_ui_rects(self) -> list[pygame.Rect]:
+        """
+        This method returns the areas of the window covered by visible UI
+        elements, including dialogs and tooltips drawn over the grid.
+        """
+        root_container = self.ui_manager.get_root_container()
+        return [
+            pygame.Rect(element.rect)
+            for element in self.ui_manager.get_sprite_group()
+            if element is not root_container
+            and element.visible
+            and element.image is not None
+        ]
 
     def run(self) -> None:
         """
@@ -804,21 +1066,70 @@ class CellularAutomataApp:
         """
         while self.is_running:
             time_delta = self.clock.tick(self.fps) / 1000.0
+            self.frame_generations = self.frame_births = self.frame_deaths = 0
 
             self.moved = False
             self.process_events()
 
+            simulate_start = time.perf_counter()
+            self.update_simulation(time_delta)
+
+            ui_start = time.perf_counter()
+            self.update_generation_label()
+            self.update_cycle_label()
             self.ui_manager.update(time_delta)
 
+            render_start = time.perf_counter()
             self.window_surface.blit(self.background, (0, 0))
 
             # draw grid on window
-            self.cell_grid.draw()
+            grid_rects = self.cell_grid.draw()
 
             self.window_surface.blit(self.cell_grid.visible_surface, self.grid_padding)
-            self.ui_manager.draw_ui(self.window_surface)
 
-            pygame.display.update()
+            ui_draw_start = time.perf_counter()
+            self.ui_manager.draw_ui(self.window_surface)
+            ui_rects = self.get_ui_rects()
+            ui_draw_time = time.perf_counter() - ui_draw_start
+
+            # The HUD shows the previous frame, as this one is still running
+            hud_visible = self.metrics_hud.visible
+            if hud_visible:
+                self.metrics_hud.draw(self.window_surface, self.metrics)
+            if hud_visible or self.hud_was_visible:
+                ui_rects.append(self.metrics_hud.rect)
+            self.hud_was_visible = hud_visible
+
+            # Only flush the cells which changed and the UI, including where
+            # UI elements were last frame in case they moved or closed
+            if self.previous_ui_rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(
+                    [rect.move(self.grid_padding) for rect in grid_rects]
+                    + ui_rects
+                    + self.previous_ui_rects
+                )
+            self.previous_ui_rects = ui_rects
+            frame_end = time.perf_counter()
+
+            # Counting live cells reads the whole grid, so it is only done
+            # while the count is shown
+            population = 0
+            if self.metrics_hud.visible:
+                population = self.cell_grid.ca.get_population()
+            self.metrics.record(
+                simulate_ms=(ui_start - simulate_start) * 1000,
+                render_ms=(frame_end - render_start - ui_draw_time) * 1000,
+                ui_ms=(render_start - ui_start + ui_draw_time) * 1000,
+                generations=self.frame_generations,
+                generations_per_second=(
+                    0.0 if self.is_paused else self.scheduler.achieved_rate
+                ),
+                population=population,
+                births=self.frame_births,
+                deaths=self.frame_deaths,
+            )
 
         pygame.display.quit()
         pygame.quit()
@@ -0,0 +1,140 @@
+"""
+Filename: cycle_detection.py
+Primary Author: Sean Nelson
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Iterable
+
+import numpy as np
+
+
+def fingerprint_packed(shape: tuple[int, int], chunks: Iterable[np.ndarray]) -> bytes:
+    """
+    Get a fingerprint of a grid already packed into bits.
+
+    Parameters
+    ----------
+    shape : tuple[int, int]
+        The number of rows and columns in the grid.
+    chunks : Iterable[np.ndarray]
+        The packed grid, whole or in consecutive pieces such as bands of rows.
+
+    Returns
+    -------
+    bytes
+        A 16 byte BLAKE2b digest of the shape and packed grid.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(shape, dtype=np.int64).tobytes())
+    for chunk in chunks:
+        digest.update(np.ascontiguousarray(chunk).data)
+    return digest.digest()
+
+
+def fingerprint(grid: np.ndarray) -> bytes:
+    """
+    Get a fingerprint of a grid's live cells.
+
+    The grid is packed to one bit per cell before hashing, so hashing reads
+    an eighth of the bytes a uint8 grid holds.
+
+    Parameters
+    ----------
+    grid : np.ndarray
+        The grid, where cells equal to 1 are alive.
+
+    Returns
+    -------
+    bytes
+        A 16 byte BLAKE2b digest of the grid.
+    """
+    return fingerprint_packed(np.shape(grid), [np.packbits(np.asarray(grid) == 1)])
+
+
+class CycleDetector:
+    """
+    A class to notice when a grid returns to an earlier state, after which it
+    repeats the same generations forever.
+
+    The fingerprint of each generation is kept in a table of bounded size,
+    forgetting the oldest first, so cycles with periods up to the table size
+    are found. A period of 1 is a still life, including an empty grid.
+
+    Attributes
+    ----------
+    max_entries : int
+        The most fingerprints kept.
+    cycle : tuple[int, int] or None
+        The first generation of the cycle and its period, once found.
+    last_generation : int or None
+        The generation checked most recently.
+
+    Methods
+    -------
+    clear()
+        Forget every fingerprint and any cycle found.
+    check(key, generation)
+        Record a generation's fingerprint and check whether it repeats an
+        earlier one.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        """
+        Initialize the CycleDetector class.
+
+        Parameters
+        ----------
+        max_entries : int, default is 4096
+            The most fingerprints kept.
+        """
+        self.max_entries = max_entries
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Forget every fingerprint and any cycle found.
+        """
+        self.cycle = None
+        self.last_generation = None
+        self._seen = OrderedDict()
+
+    def check(self, key: bytes, generation: int) -> tuple[int, int] | None:
+        """
+        Record a generation's fingerprint and check whether it repeats an
+        earlier one.
+
+        Generations must be checked in order. Checking any generation other
+        than the next one, such as after rewinding or reseeding, starts
+        again.
+
+        Parameters
+        ----------
+        key : bytes
+            The fingerprint of the grid, from `fingerprint`.
+        generation : int
+            The generation of the grid.
+
+        Returns
+        -------
+        tuple[int, int] or None
+            The first generation of the cycle and its period, or None if no
+            cycle has been found.
+        """
+        if self.last_generation is None or generation != self.last_generation + 1:
+            self.clear()
+        self.last_generation = generation
+
+        if self.cycle is not None:
+            return self.cycle
+
+        start = self._seen.get(key)
+        if start is not None:
+            self.cycle = (start, generation - start)
+            return self.cycle
+
+        self._seen[key] = generation
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return None
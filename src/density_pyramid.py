@@ -0,0 +1,289 @@
+"""
+Filename: density_pyramid.py
+Primary Author: Steven Taylor
+"""
+
+from typing import Callable
+
+import numpy as np
+
+
+def downsample(counts: np.ndarray) -> np.ndarray:
+    """
+    Sum each 2x2 block of an array, padding odd sides with zeros.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        The array to downsample.
+
+    Returns
+    -------
+    np.ndarray
+        An array half the size each way, rounded up, of block sums.
+    """
+    height, width = counts.shape
+    counts = np.pad(counts, ((0, height % 2), (0, width % 2)))
+    return sum_blocks(counts)
+
+
+def sum_blocks(counts: np.ndarray) -> np.ndarray:
+    """
+    Sum each 2x2 block over the last two axes of an array with even sides.
+
+    Adding the four strided quarters is several times faster than summing a
+    reshaped array over two axes.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        The array to sum, with an even number of rows and columns.
+
+    Returns
+    -------
+    np.ndarray
+        An int32 array half the size each way of block sums.
+    """
+    sums = np.add(counts[..., ::2, ::2], counts[..., 1::2, ::2], dtype=np.int32)
+    sums += counts[..., ::2, 1::2]
+    sums += counts[..., 1::2, 1::2]
+    return sums
+
+
+class DensityPyramid:
+    """
+    A class to keep the number of live cells in blocks of a grid at several
+    resolutions, for drawing a grid zoomed out so far that many cells share
+    a pixel.
+
+    Level 0 holds each cell, and each level above sums 2x2 blocks of the one
+    below, so level k counts the live cells in blocks of 2^k by 2^k cells.
+    The grid is split into square tiles, and when the grid changes only the
+    blocks inside the tiles which changed are summed again. The tiles which
+    changed are found by comparing the whole grid, or are given by whoever
+    changed it.
+
+    Attributes
+    ----------
+    tile_size : int
+        The side of a tile in cells, a power of two.
+    shape : tuple[int, int] or None
+        The number of rows and columns of the grid, or None before a grid
+        has been added.
+    levels : list[np.ndarray]
+        The number of live cells in each block of each level, padded to
+        whole tiles at the levels within a tile. Level 0 is uint8 to keep
+        comparing and summing it cheap, and the levels above are int32.
+    areas : list[np.ndarray]
+        The number of cells of the grid in each block of each level, which
+        is fewer than 4^k for blocks overlapping the edge of the grid.
+
+    Methods
+    -------
+    build(cells: np.ndarray)
+        Sum every level of the pyramid from a grid.
+    update(cells: np.ndarray)
+        Bring the pyramid up to date with a grid, summing only changed tiles.
+    update_tiles(changed_tiles: np.ndarray, read_window: Callable)
+        Bring the pyramid up to date, reading only tiles known to have changed.
+    get_level(cells_per_pixel: float)
+        Get the lowest level whose blocks are at least a pixel across.
+    get_blocks(level: int)
+        Get the number of rows and columns of blocks of a level.
+    """
+
+    def __init__(self, tile_size: int = 64) -> None:
+        """
+        Initialize the DensityPyramid class.
+
+        Parameters
+        ----------
+        tile_size : int, default is 64
+            The side of a tile in cells, rounded up to a power of two.
+        """
+        self.tile_size = 1 << max(int(tile_size) - 1, 0).bit_length()
+        self.tile_levels = self.tile_size.bit_length() - 1
+        self.shape = None
+        self.levels = []
+        self.areas = []
+
+    def _build_levels(self, base: np.ndarray) -> list[np.ndarray]:
+        """
+        Sum every level of a pyramid from its level 0.
+        """
+        levels = [base]
+        while max(levels[-1].shape) > 1:
+            levels.append(downsample(levels[-1]))
+        return levels
+
+    def build(self, cells: np.ndarray) -> None:
+        """
+        Sum every level of the pyramid from a grid.
+
+        Parameters
+        ----------
+        cells : np.ndarray
+            The grid, where cells equal to 1 are alive.
+        """
+        self.shape = cells.shape
+        height, width = cells.shape
+        padded = (-height % self.tile_size, -width % self.tile_size)
+
+        alive = np.pad((cells == 1).view(np.uint8), ((0, padded[0]), (0, padded[1])))
+        inside = np.pad(
+            np.ones(cells.shape, dtype=np.uint8), ((0, padded[0]), (0, padded[1]))
+        )
+        self.levels = self._build_levels(alive)
+        self.areas = self._build_levels(inside)
+
+    def update(self, cells: np.ndarray) -> bool:
+        """
+        Bring the pyramid up to date with a grid, summing only the blocks
+        inside the tiles which changed, and every block of the levels above
+        a tile, which are small.
+
+        Parameters
+        ----------
+        cells : np.ndarray
+            The grid, where cells equal to 1 are alive.
+
+        Returns
+        -------
+        bool
+            True if any cell changed since the last update.
+        """
+        if cells.shape != self.shape:
+            self.build(cells)
+            return True
+
+        height, width = cells.shape
+        base = self.levels[0]
+        alive = cells == 1
+        changed = np.zeros(base.shape, dtype=bool)
+        np.not_equal(alive, base[:height, :width], out=changed[:height, :width])
+
+        tile = self.tile_size
+        tile_rows, tile_cols = base.shape[0] // tile, base.shape[1] // tile
+        changed_tiles = changed.reshape(tile_rows, tile, tile_cols, tile).any(
+            axis=(1, 3)
+        )
+        rows, cols = np.nonzero(changed_tiles)
+        if len(rows) == 0:
+            return False
+
+        base[:height, :width] = alive
+        self._sum_tiles(rows, cols)
+        return True
+
+    def update_tiles(
+        self,
+        changed_tiles: np.ndarray,
+        read_window: Callable[[int, int, int, int], np.ndarray],
+    ) -> bool:
+        """
+        Bring the pyramid up to date from the tiles known to have changed
+        since the last update, such as from
+        `CellularAutomata.take_changed_tiles`, reading only their cells. The
+        cost depends on how much of the grid changed rather than on its size.
+
+        Parameters
+        ----------
+        changed_tiles : np.ndarray
+            A boolean array per tile, true for the tiles which changed.
+        read_window : Callable[[int, int, int, int], np.ndarray]
+            A function reading the cells of the grid in a window from its
+            top, left, height and width, such as
+            `CellularAutomata.get_window`.
+
+        Returns
+        -------
+        bool
+            True if any tile changed.
+        """
+        rows, cols = np.nonzero(changed_tiles)
+        if len(rows) == 0:
+            return False
+
+        height, width = self.shape
+        tile = self.tile_size
+        base = self.levels[0]
+        if len(rows) * 2 > changed_tiles.size:
+            base[:height, :width] = read_window(0, 0, height, width) == 1
+            self._sum_tiles(rows, cols)
+            return True
+
+        # Runs of changed tiles along a row of tiles are read at once
+        flat = rows * changed_tiles.shape[1] + cols
+        starts = np.flatnonzero((np.diff(flat, prepend=-2) != 1) | (cols == 0))
+        stops = np.append(starts[1:], len(rows))
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            top, left = int(rows[start]) * tile, int(cols[start]) * tile
+            bottom = min(top + tile, height)
+            right = min((int(cols[stop - 1]) + 1) * tile, width)
+            window = read_window(top, left, bottom - top, right - left)
+            base[top:bottom, left:right] = window == 1
+
+        self._sum_tiles(rows, cols)
+        return True
+
+    def _sum_tiles(self, rows: np.ndarray, cols: np.ndarray) -> None:
+        """
+        Sum the levels above level 0 again in the tiles which changed, and in
+        full above the size of a tile.
+        """
+        tile = self.tile_size
+        base = self.levels[0]
+        tile_rows, tile_cols = base.shape[0] // tile, base.shape[1] // tile
+        # Gathering tiles only pays off when few of them changed
+        every_tile = len(rows) * 2 > tile_rows * tile_cols
+        for level in range(1, len(self.levels)):
+            if level > self.tile_levels or every_tile:
+                self.levels[level] = downsample(self.levels[level - 1])
+                continue
+
+            # Each tile covers a square of blocks at this level, so the
+            # changed tiles are gathered, summed and scattered back at once
+            below = tile >> (level - 1)
+            side = below // 2
+            blocks = self.levels[level - 1].reshape(tile_rows, below, tile_cols, below)
+            self.levels[level].reshape(tile_rows, side, tile_cols, side)[
+                rows, :, cols, :
+            ] = sum_blocks(blocks[rows, :, cols, :])
+
+    def get_level(self, cells_per_pixel: float) -> int:
+        """
+        Get the lowest level whose blocks are at least a pixel across, so
+        every cell is counted in the pixel it is drawn in.
+
+        Parameters
+        ----------
+        cells_per_pixel : float
+            The number of cells across a pixel.
+
+        Returns
+        -------
+        int
+            The level.
+        """
+        if cells_per_pixel <= 1:
+            return 0
+        level = int(np.ceil(np.log2(cells_per_pixel)))
+        return min(level, len(self.levels) - 1)
+
+    def get_blocks(self, level: int) -> tuple[int, int]:
+        """
+        Get the number of rows and columns of blocks of a level which
+        overlap the grid, leaving out the padding.
+
+        Parameters
+        ----------
+        level : int
+            The level.
+
+        Returns
+        -------
+        tuple[int, int]
+            The number of rows and columns.
+        """
+        height, width = self.shape
+        return -(-height >> level), -(-width >> level)
@@ -0,0 +1,7 @@
+from src.engines.bitpacked import count_bits, pack_grid, step_packed, unpack_grid
+from src.engines.hashlife import HashLifeUniverse
+from src.engines.parallel import ParallelEngine
+from src.engines.sparse import SparseTileEngine
+from src.engines.unbounded import UnboundedUniverse
+from src.engines.vectorised import build_lookup_table, count_neighbours, step_grid
+from src.engines.viewport import UniverseViewport
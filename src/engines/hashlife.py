@@ -0,0 +1,600 @@
+"""
+Filename: hashlife.py
+Primary Author: Sean Nelson
+"""
+
+import json
+
+import numpy as np
+
+from src.state_io import load_rle, load_state
+
+
+class _Node:
+    """
+    A square quadtree node of side 2 ** level. Nodes are hash-consed, so two
+    nodes with the same contents are the same object, unless the pattern
+    alone once filled the cache part way through a step.
+    """
+
+    __slots__ = ("level", "nw", "ne", "sw", "se", "population")
+
+    def __init__(self, level, nw=None, ne=None, sw=None, se=None, population=0):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+
+_OFF = _Node(0, population=0)
+_ON = _Node(0, population=1)
+
+
+class HashLifeUniverse:
+    """
+    An unbounded Life-like universe stepped with the HashLife algorithm.
+
+    The universe is a quadtree of hash-consed nodes, and the result of
+    advancing each node is memoised, so repetitive patterns can be advanced
+    by 2 ** k generations in a single step. Unlike `CellularAutomata` the
+    plane does not wrap round, so gliders leave the pattern for good.
+
+    Attributes
+    ----------
+    rule : LifeLikeRule
+        The rule of the universe. Rules with birth on 0 neighbours are not
+        supported, as they would fill the infinite plane.
+    generation : int
+        The number of generations the universe has been advanced.
+    max_cache_entries : int
+        The most nodes and memoised results kept in the cache. It is garbage
+        collected whenever it fills, including part way through a step.
+        Each entry takes roughly 200 bytes.
+
+    Methods
+    -------
+    from_grid(grid, top=0, left=0)
+        Replace the universe with the live cells of a grid.
+    load_state_file(file_path)
+        Replace the universe with the grid of a state file.
+    stamp(shape, row, col)
+        Set the live cells of a shape onto the universe.
+    load_shape_file(shape_file_name, row, col)
+        Stamp a shape from a JSON shape file onto the universe.
+    get_cell(row, col)
+        Get the state of a single cell.
+    set_cell(row, col, value)
+        Set the state of a single cell.
+    advance(generations)
+        Advance the universe by a number of generations.
+    to_grid(top, left, height, width)
+        Get a window of the universe as a dense grid.
+    get_window(top, left, height, width)
+        Get a window of the universe as a dense grid.
+    to_cellular_automata(ca, top=0, left=0)
+        Copy a window of the universe onto a cellular automaton's grid.
+    collect_garbage()
+        Drop memoised results and nodes unreachable from the universe.
+    """
+
+    def __init__(self, rule, max_cache_entries: int = 1_000_000) -> None:
+        """
+        Initialize the HashLifeUniverse class.
+
+        Parameters
+        ----------
+        rule : LifeLikeRule
+            The rule of the universe.
+        max_cache_entries : int, default is 1,000,000
+            The most nodes and memoised results kept in the cache.
+        """
+        if rule.table[0] == 1:
+            raise ValueError("HashLife does not support rules with birth on B0")
+
+        self.rule = rule
+        self.max_cache_entries = max_cache_entries
+        self.generation = 0
+
+        self._table = [int(state) for state in rule.table]
+        self._nodes = {}
+        self._results = {}
+        self._empty_nodes = [_OFF]
+        self._in_use = []
+
+        self._root = self._empty(3)
+        self._top = 0
+        self._left = 0
+
+    @property
+    def population(self) -> int:
+        """
+        The number of live cells in the universe.
+        """
+        return self._root.population
+
+    @property
+    def cache_size(self) -> int:
+        """
+        The number of nodes and memoised results currently cached.
+        """
+        return len(self._nodes) + len(self._results)
+
+    def _join(self, nw: _Node, ne: _Node, sw: _Node, se: _Node) -> _Node:
+        """
+        Get the canonical node made of four child nodes.
+        """
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            if len(self._nodes) + len(self._results) >= self.max_cache_entries:
+                self._trim_cache()
+            population = nw.population + ne.population + sw.population + se.population
+            node = _Node(nw.level + 1, nw, ne, sw, se, population)
+            self._nodes[key] = node
+        return node
+
+    def _empty(self, level: int) -> _Node:
+        """
+        Get the canonical empty node of a level.
+        """
+        while len(self._empty_nodes) <= level:
+            child = self._empty_nodes[-1]
+            self._empty_nodes.append(self._join(child, child, child, child))
+        return self._empty_nodes[level]
+
+    def _centre(self, node: _Node) -> _Node:
+        """
+        Get the node of half the size at the centre of a node.
+        """
+        return self._join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _expand(self) -> None:
+        """
+        Double the size of the root, keeping its contents at the centre.
+        """
+        root = self._root
+        empty = self._empty(root.level - 1)
+        self._root = self._join(
+            self._join(empty, empty, empty, root.nw),
+            self._join(empty, empty, root.ne, empty),
+            self._join(empty, root.sw, empty, empty),
+            self._join(root.se, empty, empty, empty),
+        )
+        offset = 1 << (root.level - 1)
+        self._top -= offset
+        self._left -= offset
+
+    def _contains(self, row: int, col: int) -> bool:
+        """
+        Check if a cell lies within the root node.
+        """
+        size = 1 << self._root.level
+        return (
+            self._top <= row < self._top + size
+            and self._left <= col < self._left + size
+        )
+
+    def _build(self, cells: np.ndarray, level: int) -> _Node:
+        """
+        Build the node of a square array of side 2 ** level.
+        """
+        if level == 0:
+            return _ON if cells[0, 0] else _OFF
+        if not cells.any():
+            return self._empty(level)
+
+        half = 1 << (level - 1)
+        return self._join(
+            self._build(cells[:half, :half], level - 1),
+            self._build(cells[:half, half:], level - 1),
+            self._build(cells[half:, :half], level - 1),
+            self._build(cells[half:, half:], level - 1),
+        )
+
+    def from_grid(self, grid: np.ndarray, top: int = 0, left: int = 0) -> None:
+        """
+        Replace the universe with the live cells of a grid.
+
+        Parameters
+        ----------
+        grid : np.ndarray
+            The grid, where cells equal to 1 are alive.
+        top : int, default is 0
+            The row of the universe the top of the grid is placed at.
+        left : int, default is 0
+            The column of the universe the left of the grid is placed at.
+        """
+        height, width = np.shape(grid)
+        level = max(3, int(np.ceil(np.log2(max(height, width, 1)))))
+
+        cells = np.zeros((1 << level, 1 << level), dtype=np.uint8)
+        cells[:height, :width] = np.asarray(grid) == 1
+
+        self._root = self._build(cells, level)
+        self._top = top
+        self._left = left
+        self.generation = 0
+
+    def load_state_file(self, file_path: str) -> None:
+        """
+        Replace the universe with the grid of a state file.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the state file, in any format `load_state` reads.
+        """
+        grid, _, _ = load_state(file_path)
+        self.from_grid(grid)
+
+    def stamp(self, shape: list[list[int]], row: int, col: int) -> None:
+        """
+        Set the live cells of a shape onto the universe.
+
+        Parameters
+        ----------
+        shape : list[list[int]]
+            The grid representation of the shape.
+        row : int
+            The row the top of the shape is placed at.
+        col : int
+            The column the left of the shape is placed at.
+        """
+        for row_offset, shape_row in enumerate(shape):
+            for col_offset, cell in enumerate(shape_row):
+                if cell == 1:
+                    self.set_cell(row + row_offset, col + col_offset, 1)
+
+    def load_shape_file(self, shape_file_name: str, row: int, col: int) -> None:
+        """
+        Stamp a shape from a pattern file onto the universe, such as one of
+        the RLE stamp shapes in `src/shapes`. Files ending in ".json" are
+        read in the older JSON shape format.
+
+        Parameters
+        ----------
+        shape_file_name : str
+            The path to the RLE or JSON shape file.
+        row : int
+            The row the top of the shape is placed at.
+        col : int
+            The column the left of the shape is placed at.
+        """
+        if shape_file_name.endswith(".json"):
+            with open(shape_file_name, "r") as shape_file:
+                shape = json.load(shape_file)["shape"]
+        else:
+            shape, _ = load_rle(shape_file_name)
+
+        self.stamp(shape, row, col)
+
+    def get_cell(self, row: int, col: int) -> int:
+        """
+        Get the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row of the cell.
+        col : int
+            The column of the cell.
+
+        Returns
+        -------
+        int
+            1 if the cell is alive, otherwise 0.
+        """
+        if not self._contains(row, col):
+            return 0
+
+        node = self._root
+        row -= self._top
+        col -= self._left
+        while node.level > 0:
+            half = 1 << (node.level - 1)
+            if row < half:
+                node = node.nw if col < half else node.ne
+            else:
+                node = node.sw if col < half else node.se
+            row %= half
+            col %= half
+        return node.population
+
+    def set_cell(self, row: int, col: int, value: int) -> None:
+        """
+        Set the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row of the cell.
+        col : int
+            The column of the cell.
+        value : int
+            The new state of the cell, alive only if equal to 1.
+        """
+        while not self._contains(row, col):
+            self._expand()
+
+        leaf = _ON if value == 1 else _OFF
+        self._root = self._set(self._root, row - self._top, col - self._left, leaf)
+
+    def _set(self, node: _Node, row: int, col: int, leaf: _Node) -> _Node:
+        """
+        Get a copy of a node with one leaf replaced.
+        """
+        if node.level == 0:
+            return leaf
+
+        half = 1 << (node.level - 1)
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+        if row < half and col < half:
+            nw = self._set(nw, row, col, leaf)
+        elif row < half:
+            ne = self._set(ne, row, col - half, leaf)
+        elif col < half:
+            sw = self._set(sw, row - half, col, leaf)
+        else:
+            se = self._set(se, row - half, col - half, leaf)
+        return self._join(nw, ne, sw, se)
+
+    def _life_4x4(self, node: _Node) -> _Node:
+        """
+        Advance the centre 2x2 cells of a 4x4 node by one generation.
+        """
+        cells = [
+            [node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+            [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+            [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+            [node.sw.sw, node.sw.se, node.se.sw, node.se.se],
+        ]
+        cells = [[cell.population for cell in row] for row in cells]
+
+        next_cells = []
+        for row in (1, 2):
+            for col in (1, 2):
+                neighbours = (
+                    sum(
+                        sum(cells[r][col - 1 : col + 2])
+                        for r in (row - 1, row, row + 1)
+                    )
+                    - cells[row][col]
+                )
+                state = self._table[9 * cells[row][col] + neighbours]
+                next_cells.append(_ON if state else _OFF)
+        return self._join(*next_cells)
+
+    def _step(self, node: _Node, step_level: int) -> _Node:
+        """
+        Advance a node by 2 ** step_level generations, returning its centre.
+
+        The step level must be at most the node's level minus two, so that
+        no cell outside the node can influence the returned centre.
+        """
+        if node.population == 0:
+            return self._empty(node.level - 1)
+
+        key = (node, step_level)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+
+        if node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            join = self._join
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+
+            # Nine overlapping sub-nodes of half the size
+            subnodes = [
+                [nw, join(nw.ne, ne.nw, nw.se, ne.sw), ne],
+                [
+                    join(nw.sw, nw.se, sw.nw, sw.ne),
+                    join(nw.se, ne.sw, sw.ne, se.nw),
+                    join(ne.sw, ne.se, se.nw, se.ne),
+                ],
+                [sw, join(sw.ne, se.nw, sw.se, se.sw), se],
+            ]
+            # Nodes this step still needs are kept if the cache is trimmed
+            in_use = [node, *subnodes[1], subnodes[0][1], subnodes[2][1]]
+            self._in_use.append(in_use)
+
+            full_speed = step_level == node.level - 2
+            first_level = step_level - 1 if full_speed else step_level
+            stepped = []
+            for row in subnodes:
+                stepped.append([self._step(sub, first_level) for sub in row])
+                in_use.extend(stepped[-1])
+
+            quadrants = []
+            for row in (0, 1):
+                for col in (0, 1):
+                    quadrant = join(
+                        stepped[row][col],
+                        stepped[row][col + 1],
+                        stepped[row + 1][col],
+                        stepped[row + 1][col + 1],
+                    )
+                    if full_speed:
+                        in_use.append(quadrant)
+                        quadrants.append(self._step(quadrant, step_level - 1))
+                    else:
+                        quadrants.append(self._centre(quadrant))
+                    in_use.append(quadrants[-1])
+            result = join(*quadrants)
+            self._in_use.pop()
+
+        if len(self._nodes) + len(self._results) >= self.max_cache_entries:
+            self._trim_cache()
+        self._results[key] = result
+        return result
+
+    def _advance_power_of_two(self, step_level: int) -> None:
+        """
+        Advance the universe by 2 ** step_level generations.
+        """
+        # Pad until the pattern sits in the centre quarter of a root large
+        # enough that nothing can grow past the centre during the step
+        while (
+            self._root.level < step_level + 3
+            or self._centre(self._centre(self._root)).population
+            != self._root.population
+        ):
+            self._expand()
+
+        offset = 1 << (self._root.level - 2)
+        self._root = self._step(self._root, step_level)
+        self._top += offset
+        self._left += offset
+        self.generation += 1 << step_level
+
+    def advance(self, generations: int) -> None:
+        """
+        Advance the universe by a number of generations.
+
+        The generations are split into powers of two, each of which is a
+        single memoised step, so far-future states take time roughly
+        logarithmic in the number of generations for regular patterns.
+
+        Parameters
+        ----------
+        generations : int
+            The number of generations to advance.
+        """
+        step_level = 0
+        while generations:
+            if generations & 1:
+                self._advance_power_of_two(step_level)
+            generations >>= 1
+            step_level += 1
+
+    def _trim_cache(self) -> None:
+        """
+        Make room in a full cache part way through a step, so that a single
+        large step stays within `max_cache_entries`.
+
+        Nodes reachable from the universe or from the steps in progress are
+        kept, with the most recent memoised results and their nodes until
+        half the cache is used, so the step carries on without repeating
+        most of its work. If the nodes in use alone fill the cache they are
+        no longer shared with equal nodes made afterwards.
+        """
+        roots = [self._root, *self._empty_nodes[1:]]
+        roots += [node for in_use in self._in_use for node in in_use]
+        nodes = self._reachable(roots)
+        if len(nodes) >= self.max_cache_entries:
+            self._nodes = {}
+            self._results = {}
+            return
+
+        # The most recent results are the likeliest to be needed again
+        results = {}
+        budget = self.max_cache_entries // 2
+        for key in reversed(self._results):
+            if len(nodes) + len(results) >= budget:
+                break
+            result = self._results[key]
+            self._reachable([key[0], result], nodes)
+            results[key] = result
+        self._nodes = nodes
+        self._results = results
+
+    @staticmethod
+    def _nodes_key(node: _Node) -> tuple:
+        """
+        Get the key of a node in the node cache, its four children.
+        """
+        return (node.nw, node.ne, node.sw, node.se)
+
+    def _reachable(self, roots, nodes: dict | None = None) -> dict:
+        """
+        Find the nodes reachable from some nodes, keyed by their children as
+        in the node cache, adding them to `nodes` if given.
+        """
+        nodes = {} if nodes is None else nodes
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = self._nodes_key(node)
+            if key in nodes:
+                continue
+            nodes[key] = node
+            stack.extend(key)
+        return nodes
+
+    def collect_garbage(self) -> None:
+        """
+        Drop memoised results and nodes unreachable from the universe.
+        """
+        self._results = {}
+        self._nodes = self._reachable([self._root, *self._empty_nodes[1:]])
+
+    def to_grid(self, top: int, left: int, height: int, width: int) -> np.ndarray:
+        """
+        Get a window of the universe as a dense grid.
+
+        Parameters
+        ----------
+        top : int
+            The row of the universe at the top of the window.
+        left : int
+            The column of the universe at the left of the window.
+        height : int
+            The number of rows in the window.
+        width : int
+            The number of columns in the window.
+
+        Returns
+        -------
+        np.ndarray
+            A uint8 array of ones and zeros.
+        """
+        grid = np.zeros((height, width), dtype=np.uint8)
+        self._write(self._root, self._top - top, self._left - left, grid)
+        return grid
+
+    get_window = to_grid
+
+    def _write(self, node: _Node, row: int, col: int, grid: np.ndarray) -> None:
+        """
+        Write the live cells of a node at a position of a grid.
+        """
+        size = 1 << node.level
+        if (
+            node.population == 0
+            or row >= grid.shape[0]
+            or col >= grid.shape[1]
+            or row + size <= 0
+            or col + size <= 0
+        ):
+            return
+        if node.level == 0:
+            grid[row, col] = 1
+            return
+
+        half = size >> 1
+        self._write(node.nw, row, col, grid)
+        self._write(node.ne, row, col + half, grid)
+        self._write(node.sw, row + half, col, grid)
+        self._write(node.se, row + half, col + half, grid)
+
+    def to_cellular_automata(self, ca, top: int = 0, left: int = 0) -> None:
+        """
+        Copy a window of the universe onto a cellular automaton's grid.
+
+        Parameters
+        ----------
+        ca : CellularAutomata
+            The cellular automaton, whose grid size sets the window size.
+        top : int, default is 0
+            The row of the universe at the top of the window.
+        left : int, default is 0
+            The column of the universe at the left of the window.
+        """
+        ca.grid = self.to_grid(top, left, ca.grid_size[0], ca.grid_size[1]).astype(
+            np.int8
+        )
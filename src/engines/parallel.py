@@ -0,0 +1,161 @@
+"""
+Filename: parallel.py
+Primary Author: Sean Nelson
+"""
+
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def step_band(
+    grid: np.ndarray, table: np.ndarray, out: np.ndarray, start: int, stop: int
+) -> None:
+    """
+    Advance a band of rows of a toroidal grid by one generation.
+
+    The band is read with a one row halo above and below, wrapping round the
+    torus, and its next generation is written into the same rows of `out`.
+
+    Parameters
+    ----------
+    grid : np.ndarray
+        The current grid.
+    table : np.ndarray
+        The 18 entry lookup table of the rule.
+    out : np.ndarray
+        The grid the next generation is written into.
+    start : int
+        The first row of the band.
+    stop : int
+        The row after the last row of the band.
+    """
+    height = grid.shape[0]
+    if 0 < start and stop < height:
+        band = grid[start - 1 : stop + 1]
+    else:
+        band = grid[np.arange(start - 1, stop + 1) % height]
+    alive = (band == 1).view(np.uint8)
+
+    row_sums = alive + np.roll(alive, 1, axis=1) + np.roll(alive, -1, axis=1)
+    index = row_sums[:-2] + row_sums[1:-1] + row_sums[2:]
+    index += alive[1:-1] * np.uint8(8)
+    out[start:stop] = table[index]
+
+
+class ParallelEngine:
+    """
+    A stepping engine that splits the grid into row bands and steps them
+    concurrently on a pool of worker threads.
+
+    NumPy releases the GIL inside its array operations, so the bands run in
+    parallel while sharing the grid in memory. Each generation is written
+    into a second buffer, and the two buffers swap roles every step.
+
+    Attributes
+    ----------
+    workers : int
+        The number of worker threads.
+    min_band_rows : int
+        The fewest rows given to a worker, so small grids are not split into
+        bands too small to be worth scheduling.
+
+    Methods
+    -------
+    step(grid, table)
+        Advance the grid by one generation.
+    mark_changed(row, col, height=1, width=1)
+        Mark a region of cells as changed outside the engine.
+    close()
+        Shut down the worker threads. Engines which are dropped without
+        being closed shut them down when they are garbage collected.
+    """
+
+    def __init__(self, workers: int | None = None, min_band_rows: int = 64) -> None:
+        """
+        Initialize the ParallelEngine class.
+
+        Parameters
+        ----------
+        workers : int, optional
+            The number of worker threads. Defaults to the number of CPUs.
+        min_band_rows : int, default is 64
+            The fewest rows given to a worker.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.min_band_rows = min_band_rows
+
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._buffers = []
+        # Engines dropped without being closed still release their threads
+        self._finalizer = weakref.finalize(self, self._pool.shutdown, wait=False)
+
+    def _get_output_buffer(self, grid: np.ndarray, dtype: np.dtype) -> np.ndarray:
+        """
+        Get the buffer to write the next generation into, which is whichever
+        of the two buffers does not hold the current grid.
+        """
+        if any(
+            buffer.shape != grid.shape or buffer.dtype != dtype
+            for buffer in self._buffers
+        ):
+            self._buffers = []
+        if len(self._buffers) < 2:
+            self._buffers.append(np.empty(grid.shape, dtype=dtype))
+
+        if self._buffers[0] is grid:
+            return self._buffers[1]
+        return self._buffers[0]
+
+    def step(self, grid: np.ndarray, table: np.ndarray) -> np.ndarray:
+        """
+        Advance the grid by one generation.
+
+        Parameters
+        ----------
+        grid : np.ndarray
+            The current grid.
+        table : np.ndarray
+            The 18 entry lookup table of the rule.
+
+        Returns
+        -------
+        np.ndarray
+            The next generation. This buffer is reused for the generation
+            after next, so copy it if it must outlive two steps.
+        """
+        out = self._get_output_buffer(grid, table.dtype)
+
+        height = grid.shape[0]
+        band_rows = max(self.min_band_rows, -(-height // self.workers))
+        bands = [
+            (start, min(start + band_rows, height))
+            for start in range(0, height, band_rows)
+        ]
+
+        if len(bands) == 1:
+            step_band(grid, table, out, 0, height)
+            return out
+
+        futures = [
+            self._pool.submit(step_band, grid, table, out, start, stop)
+            for start, stop in bands
+        ]
+        for future in futures:
+            future.result()
+        return out
+
+    def mark_changed(self, row: int, col: int, height: int = 1, width: int = 1) -> None:
+        """
+        Mark a region of cells as changed outside the engine. Every row band
+        is recomputed each step, so nothing needs to be tracked.
+        """
+
+    def close(self) -> None:
+        """
+        Shut down the worker threads, waiting for any step in progress.
+        """
+        self._finalizer.detach()
+        self._pool.shutdown()
@@ -0,0 +1,216 @@
+"""
+Filename: sparse.py
+Primary Author: Sean Nelson
+"""
+
+import numpy as np
+
+from src.engines.vectorised import step_grid
+
+
+def _dilate(tiles: np.ndarray) -> np.ndarray:
+    """
+    Add the eight toroidal neighbours of every set tile to a tile mask.
+    """
+    rows = tiles | np.roll(tiles, 1, axis=0) | np.roll(tiles, -1, axis=0)
+    return rows | np.roll(rows, 1, axis=1) | np.roll(rows, -1, axis=1)
+
+
+class SparseTileEngine:
+    """
+    A stepping engine that only recomputes the tiles of the grid that could
+    have changed.
+
+    The grid is split into square tiles. A tile can only change if it or one
+    of its neighbours changed in the previous generation, so each step only
+    the tiles that changed, plus their neighbours, are recomputed. Still and
+    empty areas cost nothing, and a settled grid costs close to its active
+    area. The grid is updated in place while few tiles are active.
+
+    Changes made outside the engine must be reported with `mark_changed`,
+    which `CellularAutomata.set_cell` does. Assigning a different grid array
+    resets the engine so every tile is recomputed.
+
+    Attributes
+    ----------
+    tile_size : int
+        The side of a tile in cells.
+    dense_fraction : float
+        The fraction of active tiles above which the whole grid is stepped
+        at once instead of tile by tile.
+    changed_tiles : np.ndarray
+        A boolean array per tile of the tiles which changed in the last
+        generation or were marked as changed since.
+    active_tiles : np.ndarray
+        A boolean array per tile of the tiles the next step will recompute.
+    births : int | None
+        The number of cells born in the last step, counted as the active
+        tiles are written, or None if the whole grid was stepped into a new
+        array, which can be compared with the old one instead.
+    deaths : int | None
+        The number of cells which died in the last step, or None if the
+        whole grid was stepped into a new array.
+
+    Methods
+    -------
+    step(grid, table)
+        Advance the grid by one generation.
+    mark_changed(row, col, height=1, width=1)
+        Mark a region of cells as changed outside the engine.
+    reset()
+        Recompute every tile on the next step.
+    close()
+        Release the engine's resources.
+    """
+
+    def __init__(self, tile_size: int = 32, dense_fraction: float = 0.5) -> None:
+        """
+        Initialize the SparseTileEngine class.
+
+        Parameters
+        ----------
+        tile_size : int, default is 32
+            The side of a tile in cells.
+        dense_fraction : float, default is 0.5
+            The fraction of active tiles above which the whole grid is
+            stepped at once.
+        """
+        self.tile_size = tile_size
+        self.dense_fraction = dense_fraction
+
+        self.changed_tiles = None
+        self.births = None
+        self.deaths = None
+        self._grid = None
+
+    @property
+    def active_tiles(self) -> np.ndarray | None:
+        """
+        A boolean array per tile of the tiles the next step will recompute.
+        """
+        if self.changed_tiles is None:
+            return None
+        return _dilate(self.changed_tiles)
+
+    def _tile_shape(self, grid: np.ndarray) -> tuple[int, int]:
+        """
+        Get the number of tile rows and columns covering a grid.
+        """
+        return (
+            -(-grid.shape[0] // self.tile_size),
+            -(-grid.shape[1] // self.tile_size),
+        )
+
+    def reset(self) -> None:
+        """
+        Recompute every tile on the next step.
+        """
+        self._grid = None
+        self.changed_tiles = None
+
+    def mark_changed(self, row: int, col: int, height: int = 1, width: int = 1) -> None:
+        """
+        Mark a region of cells as changed outside the engine.
+
+        Parameters
+        ----------
+        row : int
+            The top row of the region.
+        col : int
+            The left column of the region.
+        height : int, default is 1
+            The number of rows in the region.
+        width : int, default is 1
+            The number of columns in the region.
+        """
+        if self.changed_tiles is None:
+            return
+
+        size = self.tile_size
+        self.changed_tiles[
+            max(row, 0) // size : (row + height - 1) // size + 1,
+            max(col, 0) // size : (col + width - 1) // size + 1,
+        ] = True
+
+    def _changed_tiles_between(self, old: np.ndarray, new: np.ndarray) -> np.ndarray:
+        """
+        Find the tiles which differ between two whole grids.
+        """
+        tile_rows, tile_cols = self._tile_shape(old)
+        size = self.tile_size
+        diff = np.zeros((tile_rows * size, tile_cols * size), dtype=bool)
+        diff[: old.shape[0], : old.shape[1]] = old != new
+        return diff.reshape(tile_rows, size, tile_cols, size).any(axis=(1, 3))
+
+    def step(self, grid: np.ndarray, table: np.ndarray) -> np.ndarray:
+        """
+        Advance the grid by one generation.
+
+        Parameters
+        ----------
+        grid : np.ndarray
+            The current grid.
+        table : np.ndarray
+            The 18 entry lookup table of the rule.
+
+        Returns
+        -------
+        np.ndarray
+            The next generation, which is `grid` updated in place unless most
+            tiles were active.
+        """
+        if grid is not self._grid or self.changed_tiles is None:
+            self.changed_tiles = np.ones(self._tile_shape(grid), dtype=bool)
+
+        active = _dilate(self.changed_tiles)
+        if active.mean() > self.dense_fraction or not grid.flags.c_contiguous:
+            new_grid = step_grid(grid, table)
+            self.changed_tiles = self._changed_tiles_between(grid, new_grid)
+            self.births = self.deaths = None
+            self._grid = new_grid
+            return new_grid
+
+        tile_rows, tile_cols = np.nonzero(active)
+        self.changed_tiles = np.zeros_like(active)
+        if len(tile_rows) == 0:
+            self.births = self.deaths = 0
+            self._grid = grid
+            return grid
+
+        height, width = grid.shape
+        size = self.tile_size
+        offsets = np.arange(-1, size + 1)
+
+        # Rows and columns of each active tile with a one cell halo, wrapped
+        # round the torus
+        rows = tile_rows[:, None] * size + offsets
+        cols = tile_cols[:, None] * size + offsets
+        patches = grid[(rows % height)[:, :, None], (cols % width)[:, None, :]]
+        alive = (patches == 1).view(np.uint8)
+
+        row_sums = alive[:, :, :-2] + alive[:, :, 1:-1] + alive[:, :, 2:]
+        index = row_sums[:, :-2] + row_sums[:, 1:-1] + row_sums[:, 2:]
+        index += alive[:, 1:-1, 1:-1] * np.uint8(8)
+        new_cells = table[index]
+
+        # Tiles on the bottom and right edges may overhang the grid
+        inner_rows = rows[:, 1:-1]
+        inner_cols = cols[:, 1:-1]
+        in_grid = (inner_rows < height)[:, :, None] & (inner_cols < width)[:, None, :]
+        differs = (new_cells != patches[:, 1:-1, 1:-1]) & in_grid
+        self.changed_tiles[tile_rows, tile_cols] = differs.any(axis=(1, 2))
+
+        flat_index = inner_rows[:, :, None] * width + inner_cols[:, None, :]
+        changed_cells = new_cells[differs]
+        np.put(grid, flat_index[differs], changed_cells)
+        # Every changed cell was either born or died
+        self.births = int(np.count_nonzero(changed_cells == 1))
+        self.deaths = len(changed_cells) - self.births
+
+        self._grid = grid
+        return grid
+
+    def close(self) -> None:
+        """
+        Release the engine's resources.
+        """
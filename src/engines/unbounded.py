@@ -0,0 +1,269 @@
+"""
+Filename: unbounded.py
+Primary Author: Sean Nelson
+"""
+
+import numpy as np
+
+# Cells are stored as int64 keys of row * _SPAN + col, offset so that
+# coordinates within +/- 2 ** 30 of the origin give positive keys. A
+# neighbour's key is then the cell's key plus a constant.
+_OFFSET = 1 << 30
+_SPAN = 1 << 31
+_NEIGHBOUR_OFFSETS = np.array(
+    [
+        row * _SPAN + col
+        for row in (-1, 0, 1)
+        for col in (-1, 0, 1)
+        if not (row == 0 and col == 0)
+    ],
+    dtype=np.int64,
+)
+
+
+def _encode(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Encode cell coordinates as keys.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if rows.size and (np.abs(rows).max() >= _OFFSET or np.abs(cols).max() >= _OFFSET):
+        raise OverflowError("Cells must lie within 2 ** 30 of the origin")
+    return (rows + _OFFSET) * _SPAN + (cols + _OFFSET)
+
+
+def _decode(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decode keys into cell rows and columns.
+    """
+    return keys // _SPAN - _OFFSET, keys % _SPAN - _OFFSET
+
+
+class UnboundedUniverse:
+    """
+    An unbounded Life-like universe stored as the set of its live cells.
+
+    Live cells are kept as a sorted array of integer keys, so memory and the
+    time to step are proportional to the live population rather than to a
+    preallocated grid, and patterns grow without wrapping round.
+
+    Attributes
+    ----------
+    rule : LifeLikeRule
+        The rule of the universe. Rules with birth on 0 neighbours are not
+        supported, as they would fill the infinite plane.
+    generation : int
+        The number of generations the universe has been advanced.
+
+    Methods
+    -------
+    from_grid(grid, top=0, left=0)
+        Replace the universe with the live cells of a grid.
+    get_cell(row, col)
+        Get the state of a single cell.
+    set_cell(row, col, value)
+        Set the state of a single cell.
+    set_cells(rows, cols, value)
+        Set the state of many cells at once.
+    get_cells()
+        Get the coordinates of every live cell.
+    update_grid()
+        Advance the universe by one generation.
+    advance(generations)
+        Advance the universe by a number of generations.
+    bounding_box()
+        Get the smallest box containing every live cell.
+    get_window(top, left, height, width)
+        Get a window of the universe as a dense grid.
+    """
+
+    def __init__(self, rule) -> None:
+        """
+        Initialize the UnboundedUniverse class.
+
+        Parameters
+        ----------
+        rule : LifeLikeRule
+            The rule of the universe.
+        """
+        if rule.table[0] == 1:
+            raise ValueError("Unbounded universes do not support birth on B0")
+
+        self.rule = rule
+        self.generation = 0
+        self._keys = np.empty(0, dtype=np.int64)
+
+    @property
+    def population(self) -> int:
+        """
+        The number of live cells in the universe.
+        """
+        return len(self._keys)
+
+    def from_grid(self, grid: np.ndarray, top: int = 0, left: int = 0) -> None:
+        """
+        Replace the universe with the live cells of a grid.
+
+        Parameters
+        ----------
+        grid : np.ndarray
+            The grid, where cells equal to 1 are alive.
+        top : int, default is 0
+            The row of the universe the top of the grid is placed at.
+        left : int, default is 0
+            The column of the universe the left of the grid is placed at.
+        """
+        rows, cols = np.nonzero(np.asarray(grid) == 1)
+        self._keys = _encode(rows + top, cols + left)
+        self.generation = 0
+
+    def get_cell(self, row: int, col: int) -> int:
+        """
+        Get the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row of the cell.
+        col : int
+            The column of the cell.
+
+        Returns
+        -------
+        int
+            1 if the cell is alive, otherwise 0.
+        """
+        key = _encode(row, col)
+        index = np.searchsorted(self._keys, key)
+        return int(index < len(self._keys) and self._keys[index] == key)
+
+    def set_cell(self, row: int, col: int, value: int) -> None:
+        """
+        Set the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row of the cell.
+        col : int
+            The column of the cell.
+        value : int
+            The new state of the cell, alive only if equal to 1.
+        """
+        self.set_cells([row], [col], value)
+
+    def set_cells(self, rows: np.ndarray, cols: np.ndarray, value: int) -> None:
+        """
+        Set the state of many cells at once.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            The rows of the cells.
+        cols : np.ndarray
+            The columns of the cells.
+        value : int
+            The new state of the cells, alive only if equal to 1.
+        """
+        keys = _encode(rows, cols)
+        if value == 1:
+            self._keys = np.union1d(self._keys, keys)
+        else:
+            self._keys = np.setdiff1d(self._keys, keys, assume_unique=False)
+
+    def get_cells(self) -> np.ndarray:
+        """
+        Get the coordinates of every live cell.
+
+        Returns
+        -------
+        np.ndarray
+            An array of shape (population, 2) of rows and columns.
+        """
+        return np.stack(_decode(self._keys), axis=1)
+
+    def update_grid(self) -> None:
+        """
+        Advance the universe by one generation.
+        """
+        live = self._keys
+        table = self.rule.table
+
+        # Every cell with a live neighbour, and how many live neighbours it has
+        neighbours = (live[None, :] + _NEIGHBOUR_OFFSETS[:, None]).ravel()
+        candidates, counts = np.unique(neighbours, return_counts=True)
+
+        index = np.searchsorted(live, candidates)
+        alive = np.zeros(len(candidates), dtype=bool)
+        in_range = index < len(live)
+        alive[in_range] = live[index[in_range]] == candidates[in_range]
+
+        next_keys = candidates[table[9 * alive + counts] == 1]
+
+        # Live cells with no live neighbours are not candidates
+        if table[9] == 1:
+            isolated = np.setdiff1d(live, candidates, assume_unique=True)
+            next_keys = np.union1d(next_keys, isolated)
+
+        self._keys = next_keys
+        self.generation += 1
+
+    def advance(self, generations: int) -> None:
+        """
+        Advance the universe by a number of generations.
+
+        Parameters
+        ----------
+        generations : int
+            The number of generations to advance.
+        """
+        for _ in range(generations):
+            self.update_grid()
+
+    def bounding_box(self) -> tuple[int, int, int, int] | None:
+        """
+        Get the smallest box containing every live cell.
+
+        Returns
+        -------
+        tuple[int, int, int, int] or None
+            The top row, left column, bottom row and right column of the
+            box, inclusive, or None if there are no live cells.
+        """
+        if not len(self._keys):
+            return None
+
+        rows, cols = _decode(self._keys)
+        return int(rows[0]), int(cols.min()), int(rows[-1]), int(cols.max())
+
+    def get_window(self, top: int, left: int, height: int, width: int) -> np.ndarray:
+        """
+        Get a window of the universe as a dense grid.
+
+        Parameters
+        ----------
+        top : int
+            The row of the universe at the top of the window.
+        left : int
+            The column of the universe at the left of the window.
+        height : int
+            The number of rows in the window.
+        width : int
+            The number of columns in the window.
+
+        Returns
+        -------
+        np.ndarray
+            A uint8 array of ones and zeros.
+        """
+        window = np.zeros((height, width), dtype=np.uint8)
+
+        # Keys are sorted by row, so the window's rows are one contiguous run
+        start = np.searchsorted(self._keys, _encode(top, 1 - _OFFSET))
+        stop = np.searchsorted(
+            self._keys, _encode(top + height - 1, _OFFSET - 1), side="right"
+        )
+        rows, cols = _decode(self._keys[start:stop])
+        in_window = (cols >= left) & (cols < left + width)
+        window[rows[in_window] - top, cols[in_window] - left] = 1
+        return window
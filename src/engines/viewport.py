@@ -0,0 +1,314 @@
+"""
+Filename: viewport.py
+Primary Author: Sean Nelson
+"""
+
+import numpy as np
+
+from src.rules import get_rule
+from src.seeding import create_bit_generator, random_cells
+
+
+class UniverseViewport:
+    """
+    A window of fixed size onto an unbounded universe, which `CellGrid` can
+    show and edit in place of a `CellularAutomata`.
+
+    Cells are read and edited in the coordinates of the window, which are
+    offset by its position in the universe, and stepping steps the whole
+    universe. Nothing wraps round the edges of the window, so patterns
+    leaving it carry on outside, and can be followed by moving it.
+
+    Changed tiles are not recorded, so drawing the density of the window
+    compares its cells in full, which costs the size of the window.
+
+    Attributes
+    ----------
+    universe : UnboundedUniverse
+        The universe shown.
+    grid_size : list[int]
+        The number of rows and columns in the window.
+    top : int
+        The row of the universe at the top of the window.
+    left : int
+        The column of the universe at the left of the window.
+    density : float
+        Chance of each cell being alive when the window is seeded.
+    seed : int | list[int] | None
+        The seed the window was last filled from.
+    change_tile_size : None
+        Always None, as changed tiles are not recorded.
+    count_changes : bool
+        Always False, as cells born and died are not counted.
+    history : None
+        Always None, as earlier generations are not kept.
+    cycle : None
+        Always None, as cycles are not checked for.
+
+    Methods
+    -------
+    move_to(top, left)
+        Move the window to a position in the universe.
+    get_window(top, left, height, width)
+        Get a rectangular window of the view as a dense grid.
+    get_cell(row, col)
+        Get the state of a single cell.
+    set_cell(row, col, value)
+        Set the state of a single cell.
+    fill_mask(top, left, mask, value)
+        Set the state of every cell covered by a mask.
+    set_seed(seed)
+        Replace the universe with random cells filling the window.
+    update_grid()
+        Advance the universe by one generation.
+    update_rule(rule_name)
+        Update the rule of the universe.
+    get_population()
+        Get the number of live cells in the universe.
+    enable_change_tracking(tile_size)
+        Accept a request to record changed tiles, which are not recorded.
+    disable_change_tracking()
+        Stop recording changed tiles.
+    take_changed_tiles()
+        Get the tiles changed since the last call, which are never known.
+    close()
+        Release the window's resources, of which there are none.
+    """
+
+    def __init__(
+        self,
+        universe,
+        grid_size: list[int],
+        top: int = 0,
+        left: int = 0,
+        density: float = 0.5,
+    ) -> None:
+        """
+        Initialize the UniverseViewport class.
+
+        Parameters
+        ----------
+        universe : UnboundedUniverse
+            The universe shown.
+        grid_size : list[int]
+            The number of rows and columns in the window.
+        top : int, default is 0
+            The row of the universe at the top of the window.
+        left : int, default is 0
+            The column of the universe at the left of the window.
+        density : float, default is 0.5
+            The chance of each cell being alive when the window is seeded.
+        """
+        self.universe = universe
+        self.grid_size = list(grid_size)
+        self.top = top
+        self.left = left
+        self.density = density
+        self.seed = None
+
+        self.change_tile_size = None
+        self.count_changes = False
+        self.births = 0
+        self.deaths = 0
+        self.history = None
+        self.cycle = None
+
+    @property
+    def rule(self):
+        """
+        The rule of the universe.
+        """
+        return self.universe.rule
+
+    @rule.setter
+    def rule(self, rule) -> None:
+        if rule.table[0] == 1:
+            raise ValueError("Unbounded universes do not support birth on B0")
+        self.universe.rule = rule
+
+    @property
+    def generation(self) -> int:
+        """
+        The number of generations the universe has been advanced.
+        """
+        return self.universe.generation
+
+    def move_to(self, top: int, left: int) -> None:
+        """
+        Move the window to a position in the universe.
+
+        Parameters
+        ----------
+        top : int
+            The row of the universe at the top of the window.
+        left : int
+            The column of the universe at the left of the window.
+        """
+        self.top = top
+        self.left = left
+
+    def get_window(self, top: int, left: int, height: int, width: int) -> np.ndarray:
+        """
+        Get a rectangular window of the view as a dense grid.
+
+        Parameters
+        ----------
+        top : int
+            The row of the view at the top of the window.
+        left : int
+            The column of the view at the left of the window.
+        height : int
+            The number of rows in the window.
+        width : int
+            The number of columns in the window.
+
+        Returns
+        -------
+        np.ndarray
+            A uint8 array of ones and zeros.
+        """
+        return self.universe.get_window(self.top + top, self.left + left, height, width)
+
+    def get_cell(self, row: int, col: int) -> int:
+        """
+        Get the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row of the cell in the view.
+        col : int
+            The column of the cell in the view.
+
+        Returns
+        -------
+        int
+            1 if the cell is alive, otherwise 0.
+        """
+        return self.universe.get_cell(self.top + row, self.left + col)
+
+    def set_cell(self, row: int, col: int, value: int) -> None:
+        """
+        Set the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row of the cell in the view.
+        col : int
+            The column of the cell in the view.
+        value : int
+            The new state of the cell, alive only if equal to 1.
+        """
+        self.universe.set_cell(self.top + row, self.left + col, value)
+
+    def fill_mask(self, top: int, left: int, mask: np.ndarray, value: int) -> None:
+        """
+        Set the state of every cell covered by a mask at once. Parts of the
+        mask outside the view are ignored, as they could not be seen.
+
+        Parameters
+        ----------
+        top : int
+            The row of the view under the top of the mask.
+        left : int
+            The column of the view under the left of the mask.
+        mask : np.ndarray
+            A boolean array, true for the cells to set.
+        value : int
+            The new state of the cells, alive only if equal to 1.
+        """
+        rows, cols = np.nonzero(mask)
+        rows = rows + top
+        cols = cols + left
+        inside = (
+            (rows >= 0)
+            & (rows < self.grid_size[0])
+            & (cols >= 0)
+            & (cols < self.grid_size[1])
+        )
+        self.universe.set_cells(
+            rows[inside] + self.top, cols[inside] + self.left, value
+        )
+
+    def set_seed(self, seed: int | list[int] | None) -> None:
+        """
+        Replace the universe with random cells filling the window, drawn as
+        `CellularAutomata.set_seed` draws them, or empty it if the seed is
+        None.
+
+        Parameters
+        ----------
+        seed : int, list[int], None
+            The seed for the random number generator.
+        """
+        self.seed = seed
+        cells = np.zeros(self.grid_size, dtype=np.uint8)
+        if seed is not None:
+            cells = random_cells(
+                create_bit_generator(seed), self.grid_size, self.density
+            )
+        self.universe.from_grid(cells, self.top, self.left)
+
+    def update_grid(self) -> None:
+        """
+        Advance the universe by one generation.
+        """
+        self.universe.advance(1)
+
+    def update_rule(self, rule_name) -> None:
+        """
+        Update the rule of the universe.
+
+        Parameters
+        ----------
+        rule_name : str or LifeLikeRule
+            The rule, or its name or "B3/S23" style notation.
+        """
+        if isinstance(rule_name, str):
+            rule_name = get_rule(rule_name)
+        self.rule = rule_name
+
+    def get_population(self) -> int:
+        """
+        Get the number of live cells in the universe, inside the window or
+        not.
+
+        Returns
+        -------
+        int
+            The number of live cells.
+        """
+        return self.universe.population
+
+    def enable_change_tracking(self, tile_size: int = 64) -> None:
+        """
+        Accept a request to record which tiles change. The universe does not
+        record them, so `take_changed_tiles` always returns None.
+
+        Parameters
+        ----------
+        tile_size : int, default is 64
+            The side of a tile in cells.
+        """
+
+    def disable_change_tracking(self) -> None:
+        """
+        Stop recording which tiles change, which are not recorded.
+        """
+
+    def take_changed_tiles(self) -> None:
+        """
+        Get the tiles changed since the last call, which are never known.
+
+        Returns
+        -------
+        None
+            Any cell may have changed.
+        """
+        return None
+
+    def close(self) -> None:
+        """
+        Release the window's resources, of which there are none.
+        """
@@ -0,0 +1,299 @@
+"""
+Filename: headless.py
+Primary Author: Sean Nelson
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+from src.cellular_automata import CellularAutomata
+from src.mapped_cellular_automata import MappedCellularAutomata
+from src.packed_cellular_automata import PackedCellularAutomata
+from src.rules import game_of_life_rule, get_rule
+from src.state_io import detect_format, load_state, read_binary_header
+
+
+def read_state_size(file_path: str) -> tuple[int, int]:
+    """
+    Read the grid size of a state file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    tuple[int, int]
+        The number of rows and columns in the file.
+    """
+    if detect_format(file_path) == "binary":
+        header, _ = read_binary_header(file_path)
+        return header["height"], header["width"]
+    return load_state(file_path)[0].shape
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line parser.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+        The parser for the headless runner's arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.headless",
+        description="Run a cellular automaton without opening a window.",
+    )
+
+    start = parser.add_mutually_exclusive_group()
+    start.add_argument(
+        "--state", help="a text, binary or RLE state file to load the grid from"
+    )
+    start.add_argument("--seed", type=int, help="a seed to randomly fill the grid")
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=0.5,
+        help="the chance of each cell being alive when seeding (default 0.5)",
+    )
+
+    parser.add_argument(
+        "--rule",
+        help=(
+            'a rule name such as "Rule 30", or B/S notation such as B36/S23, '
+            "defaulting to the state file's rule or the Game of Life"
+        ),
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        nargs=2,
+        metavar=("ROWS", "COLS"),
+        help="the grid size, defaulting to the state file's size or 150 150",
+    )
+    parser.add_argument(
+        "-n",
+        "--generations",
+        type=int,
+        required=True,
+        help="the number of generations to run",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=1,
+        help="report every this many generations (default 1)",
+    )
+    parser.add_argument(
+        "--stats", help="a CSV file to write statistics to, instead of stdout"
+    )
+    parser.add_argument(
+        "--snapshots", help="a directory to save the grid to at each report"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "binary", "rle"],
+        default="binary",
+        help="the format snapshots are saved in (default binary)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="the number of threads used to step an unpacked grid in memory",
+    )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="store the grid as packed bits, for very large grids",
+    )
+    parser.add_argument(
+        "--mapped",
+        action="store_true",
+        help=(
+            "memory-map a binary --state file and step it in place, for grids "
+            "larger than memory"
+        ),
+    )
+    parser.add_argument(
+        "--stop-on-cycle",
+        action="store_true",
+        help="stop early once the grid settles into a still life or cycle",
+    )
+    return parser
+
+
+def create_automaton(args: argparse.Namespace) -> CellularAutomata:
+    """
+    Create the cellular automaton described by the command line arguments.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed arguments.
+
+    Returns
+    -------
+    CellularAutomata
+        The automaton with its starting grid.
+    """
+    if args.workers > 1 and (args.packed or args.mapped):
+        raise ValueError("--workers cannot be used with --packed or --mapped")
+    if args.mapped:
+        if not args.state or detect_format(args.state) != "binary":
+            raise ValueError("--mapped needs a binary --state file")
+        return MappedCellularAutomata(
+            args.state, get_rule(args.rule) if args.rule else None
+        )
+
+    rule = get_rule(args.rule) if args.rule else game_of_life_rule
+
+    size = args.size
+    if size is None:
+        size = read_state_size(args.state) if args.state else (150, 150)
+
+    if args.packed:
+        ca = PackedCellularAutomata(list(size), rule, density=args.density)
+    else:
+        ca = CellularAutomata(
+            list(size), rule, workers=args.workers, density=args.density
+        )
+
+    if args.state:
+        ca.populate_grid_with_state_file(args.state, load_rule=not args.rule)
+    elif args.seed is not None:
+        ca.set_seed(args.seed)
+    return ca
+
+
+def run(
+    ca: CellularAutomata,
+    generations: int,
+    interval: int,
+    stats_file,
+    snapshot_dir: str | None = None,
+    snapshot_format: str = "binary",
+    stop_on_cycle: bool = False,
+) -> None:
+    """
+    Run an automaton, reporting statistics at regular intervals.
+
+    Parameters
+    ----------
+    ca : CellularAutomata
+        The automaton to run.
+    generations : int
+        The number of generations to run.
+    interval : int
+        Report every this many generations, as well as before the first and
+        after the last.
+    stats_file : file
+        The file CSV rows of generation, population, elapsed seconds and
+        generations per second since the last report are written to.
+    snapshot_dir : str, optional
+        A directory the grid is saved to at each report.
+    snapshot_format : str, default is "binary"
+        The format snapshots are saved in, one of "text", "binary" or "rle".
+    stop_on_cycle : bool, default is False
+        If true, check every generation for a repeat of an earlier one and
+        stop with a final report once the grid settles into a cycle, which
+        is described on stderr.
+    """
+    writer = csv.writer(stats_file)
+    writer.writerow(["generation", "population", "seconds", "generations_per_second"])
+
+    if snapshot_dir:
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    def report(generation: int, elapsed: float, rate: float) -> None:
+        population = ca.get_population()
+        writer.writerow([generation, population, f"{elapsed:.6f}", f"{rate:.1f}"])
+        stats_file.flush()
+        if snapshot_dir:
+            extension = "rle" if snapshot_format == "rle" else "state"
+            ca.save_grid_to_file(
+                os.path.join(snapshot_dir, f"generation_{generation:08d}.{extension}"),
+                snapshot_format,
+            )
+
+    report(0, 0.0, 0.0)
+
+    if stop_on_cycle and ca.cycle_detector is None:
+        ca.enable_cycle_detection()
+
+    elapsed = 0.0
+    generation = 0
+    while generation < generations and ca.cycle is None:
+        steps = min(interval, generations - generation)
+
+        # Only stepping is timed, not reporting or saving snapshots
+        start = time.perf_counter()
+        for step in range(steps):
+            ca.update_grid()
+            if ca.cycle is not None:
+                steps = step + 1
+                break
+        taken = time.perf_counter() - start
+
+        generation += steps
+        elapsed += taken
+        report(generation, elapsed, steps / taken if taken > 0 else 0.0)
+
+    if ca.cycle is not None:
+        first, period = ca.cycle
+        print(
+            f"Cycle of period {period} from generation {first}, "
+            f"found at generation {generation}",
+            file=sys.stderr,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the headless runner from the command line.
+
+    Parameters
+    ----------
+    argv : list[str], optional
+        The command line arguments, defaulting to those of the process.
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.interval < 1:
+        parser.error("--interval must be at least 1")
+
+    try:
+        ca = create_automaton(args)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    stats_file = open(args.stats, "w", newline="") if args.stats else sys.stdout
+    try:
+        run(
+            ca,
+            args.generations,
+            args.interval,
+            stats_file,
+            args.snapshots,
+            args.format,
+            args.stop_on_cycle,
+        )
+    finally:
+        if args.stats:
+            stats_file.close()
+        ca.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Filename: history.py
+Primary Author: Sean Nelson
+"""
+
+import numpy as np
+
+
+def _pack(grid: np.ndarray) -> np.ndarray:
+    """
+    Pack a grid into one bit per cell.
+    """
+    return np.packbits(np.asarray(grid) == 1)
+
+
+class GenerationHistory:
+    """
+    A class to remember recent generations of a grid so they can be returned
+    to without re-simulating.
+
+    Each generation is stored as the XOR of its bit-packed grid with the
+    generation before, keeping only the bytes that changed, so a settled grid
+    costs almost nothing per generation. Every `keyframe_interval`
+    generations the whole packed grid is kept as well, so any generation can
+    be rebuilt from a keyframe or from the newest generation with at most a
+    bounded number of deltas. Once the stored bytes exceed the memory budget
+    the oldest generations are forgotten.
+
+    Attributes
+    ----------
+    memory_budget : int
+        The most bytes of deltas and keyframes kept.
+    keyframe_interval : int
+        The number of generations between keyframes.
+    oldest : int or None
+        The oldest generation that can be returned to.
+    newest : int or None
+        The most recently recorded generation.
+    nbytes : int
+        The number of bytes of deltas and keyframes stored.
+
+    Methods
+    -------
+    clear()
+        Forget every generation.
+    record(grid, generation)
+        Record the grid of a generation.
+    rewind(generation)
+        Return to an earlier generation, forgetting those after it.
+    """
+
+    def __init__(
+        self, memory_budget: int = 64 * 1024 * 1024, keyframe_interval: int = 64
+    ) -> None:
+        """
+        Initialize the GenerationHistory class.
+
+        Parameters
+        ----------
+        memory_budget : int, default is 64 MiB
+            The most bytes of deltas and keyframes kept.
+        keyframe_interval : int, default is 64
+            The number of generations between keyframes.
+        """
+        self.memory_budget = memory_budget
+        self.keyframe_interval = keyframe_interval
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Forget every generation.
+        """
+        self.oldest = None
+        self.newest = None
+        self.nbytes = 0
+
+        self._shape = None
+        self._current = None
+        self._deltas = {}
+        self._keyframes = {}
+
+    def _store_delta(self, generation: int, delta: np.ndarray) -> None:
+        """
+        Store the changed bytes of an XOR delta against the generation before.
+        """
+        index = np.flatnonzero(delta)
+        index = index.astype(np.uint32 if delta.size < 2**32 else np.uint64)
+        self._deltas[generation] = (index, delta[index])
+        self.nbytes += index.nbytes + len(index)
+
+    def _drop_delta(self, generation: int) -> None:
+        """
+        Forget the delta of a generation.
+        """
+        index, values = self._deltas.pop(generation)
+        self.nbytes -= index.nbytes + values.nbytes
+
+    def _drop_keyframe(self, generation: int) -> None:
+        """
+        Forget the keyframe of a generation, if it has one.
+        """
+        keyframe = self._keyframes.pop(generation, None)
+        if keyframe is not None:
+            self.nbytes -= keyframe.nbytes
+
+    def _apply_delta(self, packed: np.ndarray, generation: int) -> None:
+        """
+        Move a packed grid across a generation's delta, in either direction.
+        """
+        index, values = self._deltas[generation]
+        packed[index] ^= values
+
+    def record(self, grid: np.ndarray, generation: int) -> None:
+        """
+        Record the grid of a generation.
+
+        Recording the next generation adds it to the history, and recording
+        the newest generation again replaces it, for example after cells
+        were edited. Recording any other generation, or a grid of a different
+        shape, starts a new history.
+
+        Parameters
+        ----------
+        grid : np.ndarray
+            The grid, where cells equal to 1 are alive.
+        generation : int
+            The generation of the grid.
+        """
+        packed = _pack(grid)
+        if self.newest is None or np.shape(grid) != self._shape:
+            self.clear()
+            self._shape = np.shape(grid)
+        elif generation == self.newest:
+            if np.array_equal(packed, self._current):
+                return
+            if generation > self.oldest:
+                # Fold the edit into the delta against the generation before
+                index, values = self._deltas[generation]
+                previous = self._current.copy()
+                previous[index] ^= values
+                self._drop_delta(generation)
+                self._store_delta(generation, packed ^ previous)
+            self._drop_keyframe(generation)
+            self._keep_keyframe(generation, packed)
+            self._current = packed
+            return
+        elif generation == self.newest + 1:
+            self._store_delta(generation, packed ^ self._current)
+            self._keep_keyframe(generation, packed)
+            self.newest = generation
+            self._current = packed
+            self._evict()
+            return
+        else:
+            self.clear()
+            self._shape = np.shape(grid)
+
+        self.oldest = self.newest = generation
+        self._current = packed
+        self._keep_keyframe(generation, packed)
+
+    def _keep_keyframe(self, generation: int, packed: np.ndarray) -> None:
+        """
+        Keep a copy of the packed grid if the generation is due a keyframe.
+        """
+        if generation % self.keyframe_interval == 0:
+            self._keyframes[generation] = packed.copy()
+            self.nbytes += packed.nbytes
+
+    def _evict(self) -> None:
+        """
+        Forget the oldest generations until the history fits its budget.
+        """
+        while self.nbytes > self.memory_budget and self.oldest < self.newest:
+            self._drop_keyframe(self.oldest)
+            self.oldest += 1
+            self._drop_delta(self.oldest)
+
+    def rewind(self, generation: int) -> np.ndarray:
+        """
+        Return to an earlier generation, forgetting those after it.
+
+        The grid is rebuilt from whichever of the newest generation or the
+        nearest keyframe before it needs fewer deltas.
+
+        Parameters
+        ----------
+        generation : int
+            The generation to return to, between `oldest` and `newest`.
+
+        Returns
+        -------
+        np.ndarray
+            The grid of the generation as a uint8 array of ones and zeros.
+        """
+        if self.newest is None or not self.oldest <= generation <= self.newest:
+            raise ValueError(f"Generation {generation} is not in the history")
+
+        keyframes = [key for key in self._keyframes if key <= generation]
+        keyframe = max(keyframes, default=None)
+
+        if keyframe is not None and generation - keyframe < self.newest - generation:
+            packed = self._keyframes[keyframe].copy()
+            for step in range(keyframe + 1, generation + 1):
+                self._apply_delta(packed, step)
+        else:
+            packed = self._current.copy()
+            for step in range(self.newest, generation, -1):
+                self._apply_delta(packed, step)
+
+        for step in range(self.newest, generation, -1):
+            self._drop_delta(step)
+            self._drop_keyframe(step)
+        self.newest = generation
+        self._current = packed
+
+        size = int(np.prod(self._shape))
+        return np.unpackbits(packed, count=size).reshape(self._shape)
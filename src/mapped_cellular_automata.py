@@ -0,0 +1,458 @@
+"""
+Filename: mapped_cellular_automata.py
+Primary Author: Sean Nelson
+"""
+
+import os
+
+import numpy as np
+
+from src.cellular_automata import CellularAutomata
+from src.cycle_detection import fingerprint_packed
+from src.engines import step_grid
+from src.engines.bitpacked import count_bits
+from src.rules import game_of_life_rule, get_rule
+from src.seeding import create_bit_generator, random_cells
+from src.state_io import packed_row_bytes, read_binary_header, write_binary_header
+
+
+class MappedCellularAutomata(CellularAutomata):
+    """
+    A cellular automaton whose grid lives in a binary state file on disk.
+
+    The packed rows of the file are memory-mapped rather than read, so
+    opening a file is instant whatever its size, and only the rows being
+    stepped or viewed are paged into memory. Grids far larger than RAM can
+    be run this way.
+
+    Each generation is stepped in place, a band of rows at a time. A band's
+    new rows are held back until the next band has read its top halo row,
+    and the first and last rows are copied before stepping starts, so every
+    band sees the previous generation without a second copy of the grid.
+
+    Attributes
+    ----------
+    file_path : str
+        The path to the binary state file.
+    cells : np.memmap
+        The packed rows of the file, a uint8 array of shape
+        (height, ceil(width / 8)).
+    band_rows : int
+        The number of rows stepped at a time.
+    grid : np.ndarray
+        A dense uint8 copy of the grid. Assigning a dense grid packs it into
+        the file.
+
+    Methods
+    -------
+    create(file_path, grid_size, rule, seed=None, band_rows=256, density=0.5)
+        Create a new, empty binary state file and open it.
+    clear_grid()
+        Replace the grid with an empty grid.
+    populate_grid_with_seed()
+        Populate the grid using the current seed and density.
+    advance_grid()
+        Update the grid based on the rule function.
+    get_grid()
+        Get a dense copy of the current grid.
+    get_population()
+        Count the live cells of the grid, a band at a time.
+    get_fingerprint()
+        Get a hash of the grid's live cells, reading the file a band at a
+        time.
+    get_window(top: int, left: int, height: int, width: int)
+        Get a rectangular window of the grid, reading only its bytes.
+    get_cell(row: int, col: int)
+        Get the state of a single cell.
+    set_cell(row: int, col: int, value: int)
+        Set the state of a single cell.
+    fill_mask(top: int, left: int, mask: np.ndarray, value: int)
+        Set the state of every cell covered by a mask.
+    save_grid_to_file(file_name: str, file_format: str | None = None)
+        Save the current grid to a file.
+    flush()
+        Write changes to the grid back to the file.
+    close()
+        Flush and unmap the file, and release the engine's resources.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        rule=None,
+        band_rows: int = 256,
+        density: float = 0.5,
+    ) -> None:
+        """
+        Open a binary state file as a cellular automaton.
+
+        The grid is not cleared or read, so the file's state is kept.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the binary state file.
+        rule : Callable, optional
+            The rule of the automaton. Defaults to the rule recorded in the
+            file, or the Game of Life.
+        band_rows : int, default is 256
+            The number of rows stepped at a time.
+        density : float, default is 0.5
+            The chance of each cell being alive when the grid is seeded.
+        """
+        header, offset = read_binary_header(file_path)
+        height, width = header["height"], header["width"]
+
+        if rule is None:
+            rule = get_rule(header["rule"]) if header["rule"] else game_of_life_rule
+
+        self.file_path = file_path
+        self.band_rows = band_rows
+        self.cells = np.memmap(
+            file_path,
+            dtype=np.uint8,
+            mode="r+",
+            offset=offset,
+            shape=(height, packed_row_bytes(width)),
+        )
+
+        self._init_attributes([height, width], rule, header["seed"], density, 1)
+
+    @classmethod
+    def create(
+        cls,
+        file_path: str,
+        grid_size: list,
+        rule,
+        seed: int | list[int] | None = None,
+        band_rows: int = 256,
+        density: float = 0.5,
+    ) -> "MappedCellularAutomata":
+        """
+        Create a new, empty binary state file and open it.
+
+        The file is extended rather than written, so on most file systems
+        creating even a huge grid is instant and takes no disk space until
+        cells come alive.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the binary state file, which is overwritten.
+        grid_size : list
+            The size of the grid.
+        rule : Callable
+            The rule of the automaton.
+        seed : int, list[int], optional
+            The seed used to fill the grid, or None to leave it empty.
+        band_rows : int, default is 256
+            The number of rows stepped at a time.
+        density : float, default is 0.5
+            The chance of each cell being alive when the grid is seeded.
+
+        Returns
+        -------
+        MappedCellularAutomata
+            The automaton.
+        """
+        height, width = grid_size
+        with open(file_path, "wb") as file:
+            write_binary_header(
+                file, height, width, rule=getattr(rule, "notation", None)
+            )
+            file.truncate(file.tell() + height * packed_row_bytes(width))
+
+        ca = cls(file_path, rule, band_rows, density)
+        if seed is not None:
+            ca.set_seed(seed)
+        return ca
+
+    @property
+    def grid(self) -> np.ndarray:
+        return np.unpackbits(self.cells, axis=1, count=self.grid_size[1])
+
+    @grid.setter
+    def grid(self, grid: np.ndarray) -> None:
+        self.cells[:] = np.packbits(np.asarray(grid) == 1, axis=1)
+        self._forget_changes()
+
+    def _grid_buffer(self) -> np.ndarray:
+        """
+        Get the mapped rows, which are only ever changed in place.
+        """
+        return self.cells
+
+    def _bands(self):
+        """
+        Iterate over the start and stop rows of each band.
+        """
+        height = self.grid_size[0]
+        for start in range(0, height, self.band_rows):
+            yield start, min(start + self.band_rows, height)
+
+    def _unpack_rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        Read and unpack a run of rows from the file.
+        """
+        return np.unpackbits(self.cells[start:stop], axis=1, count=self.grid_size[1])
+
+    def clear_grid(self) -> None:
+        """
+        Replace the grid with an empty grid.
+        """
+        for start, stop in self._bands():
+            self.cells[start:stop] = 0
+        self._forget_changes()
+
+    def populate_grid_with_seed(self) -> None:
+        """
+        Populate the grid using the current seed and density.
+
+        Rows are drawn a band at a time, which gives the same grid as drawing
+        the whole grid at once.
+        """
+        if self.bit_generator is None:
+            self.bit_generator = create_bit_generator(self.seed)
+        for start, stop in self._bands():
+            band = random_cells(
+                self.bit_generator, (stop - start, self.grid_size[1]), self.density
+            )
+            self.cells[start:stop] = np.packbits(band, axis=1)
+        self._forget_changes()
+
+    def advance_grid(self) -> None:
+        """
+        Update the grid based on the rule function.
+
+        Rules with a lookup table are stepped band by band through the file,
+        other rules fall back to calling the rule function for every cell.
+        """
+        table = self.get_rule_table()
+        if table is None:
+            super().advance_grid()
+            return
+
+        height = self.grid_size[0]
+        if height == 0:
+            return
+        table = table.astype(np.uint8)
+
+        # Rows the first and last bands wrap round to, before they change
+        first_row = self._unpack_rows(0, 1)
+        last_row = self._unpack_rows(height - 1, height)
+
+        births = deaths = 0
+        pending = None
+        for start, stop in self._bands():
+            above = last_row if start == 0 else self._unpack_rows(start - 1, start)
+            below = first_row if stop == height else self._unpack_rows(stop, stop + 1)
+            band = np.concatenate([above, self._unpack_rows(start, stop), below])
+            new_rows = np.packbits(step_grid(band, table)[1:-1], axis=1)
+            old_rows = self.cells[start:stop]
+            if self.count_changes:
+                births += count_bits(new_rows & ~old_rows)
+                deaths += count_bits(old_rows & ~new_rows)
+            if self.changed_tiles is not None:
+                self._record_step_tiles(new_rows != old_rows, (1, 8), start)
+
+            # The previous band is written only now its last row has been
+            # read as this band's top halo
+            if pending is not None:
+                self.cells[pending[0] : pending[0] + len(pending[1])] = pending[1]
+            pending = (start, new_rows)
+
+        self.cells[pending[0] : pending[0] + len(pending[1])] = pending[1]
+        if self.count_changes:
+            self.births, self.deaths = births, deaths
+
+    def get_grid(self) -> np.ndarray:
+        """
+        Get a dense copy of the current grid.
+
+        Returns
+        -------
+        np.ndarray
+            The current grid as a uint8 array of ones and zeros.
+        """
+        return self.grid
+
+    def get_population(self) -> int:
+        """
+        Count the live cells of the grid, a band at a time.
+
+        Returns
+        -------
+        int
+            The number of live cells.
+        """
+        return sum(
+            int(np.count_nonzero(self._unpack_rows(start, stop)))
+            for start, stop in self._bands()
+        )
+
+    def get_fingerprint(self) -> bytes:
+        """
+        Get a hash of the grid's live cells, reading the file a band at a
+        time.
+
+        Returns
+        -------
+        bytes
+            A fingerprint equal for equal grids.
+        """
+        return fingerprint_packed(
+            tuple(self.grid_size),
+            (self.cells[start:stop] for start, stop in self._bands()),
+        )
+
+    def get_window(self, top: int, left: int, height: int, width: int) -> np.ndarray:
+        """
+        Get a rectangular window of the grid, reading only its bytes.
+
+        Parameters
+        ----------
+        top : int
+            The row at the top of the window.
+        left : int
+            The column at the left of the window.
+        height : int
+            The number of rows in the window.
+        width : int
+            The number of columns in the window.
+
+        Returns
+        -------
+        np.ndarray
+            The cells inside the window as a uint8 array of ones and zeros.
+        """
+        left = max(left, 0)
+        right = min(left + width, self.grid_size[1])
+        first_byte = left // 8
+        packed = self.cells[max(top, 0) : top + height, first_byte : -(-right // 8)]
+        cells = np.unpackbits(packed, axis=1)
+        start = left - first_byte * 8
+        return cells[:, start : start + right - left]
+
+    def get_cell(self, row: int, col: int) -> int:
+        """
+        Get the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row index of the cell.
+        col : int
+            The column index of the cell.
+
+        Returns
+        -------
+        int
+            1 if the cell is alive, otherwise 0.
+        """
+        byte, bit = divmod(col, 8)
+        return int(self.cells[row, byte]) >> (7 - bit) & 1
+
+    def set_cell(self, row: int, col: int, value: int) -> None:
+        """
+        Set the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row index of the cell.
+        col : int
+            The column index of the cell.
+        value : int
+            The new state of the cell, stored as alive only if equal to 1.
+        """
+        if (value == 1) != self.get_cell(row, col):
+            self.reset_cycle_detection()
+
+        byte, bit = divmod(col, 8)
+        mask = 1 << (7 - bit)
+        if value == 1:
+            self.cells[row, byte] |= mask
+        else:
+            self.cells[row, byte] &= ~mask & 0xFF
+        self._mark_changed(row, col)
+
+    def fill_mask(self, top: int, left: int, mask: np.ndarray, value: int) -> None:
+        """
+        Set the state of every cell covered by a mask, unpacking and packing
+        only the bytes under it. Parts of the mask outside the grid are
+        ignored.
+
+        Parameters
+        ----------
+        top : int
+            The row of the grid under the top of the mask.
+        left : int
+            The column of the grid under the left of the mask.
+        mask : np.ndarray
+            A boolean array, true for the cells to set.
+        value : int
+            The new state of the cells, stored as alive only if equal to 1.
+        """
+        top, left, mask = self._clip_mask(top, left, mask)
+        if not mask.any():
+            return
+
+        height, width = mask.shape
+        first_byte = left // 8
+        packed = self.cells[top : top + height, first_byte : -(-(left + width) // 8)]
+        cells = np.unpackbits(packed, axis=1)
+        start = left - first_byte * 8
+        window = cells[:, start : start + width]
+        if (window[mask] != (value == 1)).any():
+            self.reset_cycle_detection()
+        window[mask] = value == 1
+        packed[:] = np.packbits(cells, axis=1)
+        self._mark_changed(top, left, height, width)
+
+    def save_grid_to_file(self, file_name: str, file_format: str | None = None) -> None:
+        """
+        Save the current grid to a file.
+
+        Binary files are copied a band of packed rows at a time, and saving
+        to the automaton's own file just flushes it. Text and RLE files need
+        the whole grid in memory.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file to which the grid should be saved.
+        file_format : str, optional
+            One of "text", "binary" or "rle". Defaults to "rle" for files
+            ending in .rle, and "text" otherwise.
+        """
+        if file_format != "binary":
+            super().save_grid_to_file(file_name, file_format)
+            return
+        if os.path.abspath(file_name) == os.path.abspath(self.file_path):
+            self.flush()
+            return
+
+        with open(file_name, "wb") as file:
+            write_binary_header(
+                file,
+                *self.grid_size,
+                seed=self.seed,
+                rule=getattr(self.rule, "notation", None),
+            )
+            for start, stop in self._bands():
+                file.write(self.cells[start:stop].tobytes())
+
+    def flush(self) -> None:
+        """
+        Write changes to the grid back to the file.
+        """
+        self.cells.flush()
+
+    def close(self) -> None:
+        """
+        Flush and unmap the file, and release the engine's resources. The
+        automaton cannot be used afterwards.
+        """
+        self.flush()
+        super().close()
+        self.cells = None
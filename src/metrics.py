@@ -0,0 +1,278 @@
+"""
+Filename: metrics.py
+Primary Author: Steven Taylor
+"""
+
+import csv
+import time
+
+import numpy as np
+import pygame
+
+from src import colours
+
+COLUMNS = [
+    "frame",
+    "time",
+    "simulate_ms",
+    "render_ms",
+    "ui_ms",
+    "generations",
+    "generations_per_second",
+    "population",
+    "births",
+    "deaths",
+]
+
+
+class FrameMetrics:
+    """
+    A class to record measurements of each frame in a rolling window.
+
+    Each frame is a row of `COLUMNS` in a fixed size array, overwriting the
+    oldest row once the window is full, so recording costs the same however
+    long the application runs.
+
+    Attributes
+    ----------
+    capacity : int
+        The number of frames kept.
+    frames : int
+        The number of frames recorded in total.
+
+    Methods
+    -------
+    record(**values)
+        Record the measurements of a frame.
+    latest()
+        Get the measurements of the most recent frame.
+    column(name: str)
+        Get one measurement of every frame kept, oldest first.
+    save_csv(file_path: str)
+        Save every frame kept to a CSV file.
+    """
+
+    def __init__(self, capacity: int = 3600) -> None:
+        """
+        Initialize the FrameMetrics class.
+
+        Parameters
+        ----------
+        capacity : int, default is 3600
+            The number of frames kept, a minute at 60 frames per second.
+        """
+        self.capacity = capacity
+        self.frames = 0
+        self.start_time = time.perf_counter()
+        self.rows = np.zeros((capacity, len(COLUMNS)))
+
+    def record(self, **values: float) -> None:
+        """
+        Record the measurements of a frame. The frame number and time are
+        filled in, and measurements not given are recorded as 0.
+
+        Parameters
+        ----------
+        **values : float
+            The measurements, named by `COLUMNS`.
+        """
+        row = self.rows[self.frames % self.capacity]
+        row[:] = 0
+        row[0] = self.frames
+        row[1] = time.perf_counter() - self.start_time
+        for name, value in values.items():
+            row[COLUMNS.index(name)] = value
+        self.frames += 1
+
+    def latest(self) -> dict:
+        """
+        Get the measurements of the most recent frame.
+
+        Returns
+        -------
+        dict
+            The measurements named by `COLUMNS`, all 0 if nothing has been
+            recorded.
+        """
+        if self.frames == 0:
+            return dict.fromkeys(COLUMNS, 0.0)
+        return dict(zip(COLUMNS, self.rows[(self.frames - 1) % self.capacity]))
+
+    def _ordered_rows(self) -> np.ndarray:
+        """
+        Get the frames kept, oldest first.
+        """
+        if self.frames <= self.capacity:
+            return self.rows[: self.frames]
+        return np.roll(self.rows, -(self.frames % self.capacity), axis=0)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get one measurement of every frame kept, oldest first.
+
+        Parameters
+        ----------
+        name : str
+            The name of the measurement, from `COLUMNS`.
+
+        Returns
+        -------
+        np.ndarray
+            The measurement of each frame.
+        """
+        return self._ordered_rows()[:, COLUMNS.index(name)]
+
+    def save_csv(self, file_path: str) -> None:
+        """
+        Save every frame kept to a CSV file.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the CSV file.
+        """
+        with open(file_path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(COLUMNS)
+            for row in self._ordered_rows():
+                writer.writerow(
+                    [int(row[0]), f"{row[1]:.4f}"]
+                    + [f"{value:.3f}" for value in row[2:5]]
+                    + [int(row[5]), f"{row[6]:.1f}"]
+                    + [int(value) for value in row[7:]]
+                )
+
+
+class MetricsHUD:
+    """
+    A class to draw a heads-up display of the latest frame metrics, with a
+    sparkline of recent generations per second and population.
+
+    Attributes
+    ----------
+    rect : pygame.Rect
+        The area of the window the display covers.
+    visible : bool
+        Whether the display is shown.
+    sparkline_frames : int
+        The number of recent frames plotted on each sparkline.
+
+    Methods
+    -------
+    toggle()
+        Show or hide the display.
+    draw(surface: pygame.Surface, metrics: FrameMetrics)
+        Draw the display onto a surface.
+    """
+
+    def __init__(self, rect: pygame.Rect, sparkline_frames: int = 240) -> None:
+        """
+        Initialize the MetricsHUD class.
+
+        Parameters
+        ----------
+        rect : pygame.Rect
+            The area of the window the display covers.
+        sparkline_frames : int, default is 240
+            The number of recent frames plotted on each sparkline.
+        """
+        self.rect = pygame.Rect(rect)
+        self.visible = False
+        self.sparkline_frames = sparkline_frames
+
+        self.font = pygame.font.Font(None, 20)
+        self.surface = pygame.Surface(self.rect.size)
+
+        self.background_colour = colours.BLACK
+        self.text_colour = colours.WHITE
+        self.rate_colour = colours.LIGHT_RED
+        self.population_colour = colours.RED
+
+    def toggle(self) -> None:
+        """
+        Show or hide the display.
+        """
+        self.visible = not self.visible
+
+    def draw_sparkline(
+        self, values: np.ndarray, area: pygame.Rect, colour: pygame.Color
+    ) -> None:
+        """
+        Plot values as a line scaled to fill an area of the display.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The values, oldest first.
+        area : pygame.Rect
+            The area of the display to plot in.
+        colour : pygame.Color
+            The colour of the line.
+        """
+        pygame.draw.rect(self.surface, colour, area, 1)
+        if len(values) < 2:
+            return
+
+        low, high = values.min(), values.max()
+        scale = (high - low) or 1
+        xs = area.left + np.arange(len(values)) * (area.width - 1) / (
+            self.sparkline_frames - 1
+        )
+        ys = area.bottom - 1 - (values - low) / scale * (area.height - 1)
+        pygame.draw.lines(self.surface, colour, False, np.column_stack([xs, ys]))
+
+    def draw(self, surface: pygame.Surface, metrics: FrameMetrics) -> pygame.Rect:
+        """
+        Draw the display onto a surface.
+
+        Parameters
+        ----------
+        surface : pygame.Surface
+            The surface to draw onto, normally the window.
+        metrics : FrameMetrics
+            The metrics to show.
+
+        Returns
+        -------
+        pygame.Rect
+            The area drawn over.
+        """
+        latest = metrics.latest()
+        lines = [
+            ("Simulate", f"{latest['simulate_ms']:.2f} ms"),
+            ("Render", f"{latest['render_ms']:.2f} ms"),
+            ("UI", f"{latest['ui_ms']:.2f} ms"),
+            ("Gen/s", f"{latest['generations_per_second']:.1f}"),
+            ("Alive", f"{int(latest['population'])}"),
+            ("Births", f"{int(latest['births'])}"),
+            ("Deaths", f"{int(latest['deaths'])}"),
+        ]
+
+        self.surface.fill(self.background_colour)
+        line_height = self.font.get_linesize()
+        for index, (label, value) in enumerate(lines):
+            y = 8 + index * line_height
+            text = self.font.render(label, True, self.text_colour)
+            self.surface.blit(text, (8, y))
+            # Values are right aligned so their digits line up
+            text = self.font.render(value, True, self.text_colour)
+            self.surface.blit(text, text.get_rect(topright=(self.rect.width - 8, y)))
+
+        # Sparklines of the most recent frames fill the rest of the display
+        top = 16 + len(lines) * line_height
+        height = (self.rect.height - top - 16) // 2
+        width = self.rect.width - 16
+        recent = slice(-self.sparkline_frames, None)
+        self.draw_sparkline(
+            metrics.column("generations_per_second")[recent],
+            pygame.Rect(8, top, width, height),
+            self.rate_colour,
+        )
+        self.draw_sparkline(
+            metrics.column("population")[recent],
+            pygame.Rect(8, top + height + 8, width, height),
+            self.population_colour,
+        )
+
+        surface.blit(self.surface, self.rect)
+        return self.rect
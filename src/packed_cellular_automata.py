@@ -0,0 +1,235 @@
+"""
+Filename: packed_cellular_automata.py
+Primary Author: Sean Nelson
+"""
+
+import numpy as np
+
+from src.cellular_automata import CellularAutomata
+from src.cycle_detection import fingerprint_packed
+from src.engines.bitpacked import (
+    WORD_BITS,
+    count_bits,
+    pack_grid,
+    packed_width,
+    step_packed,
+    unpack_grid,
+)
+
+
+class PackedCellularAutomata(CellularAutomata):
+    """
+    A cellular automaton that stores its grid packed 64 cells to a uint64 word.
+
+    Cells only hold alive (1) or dead (0), so a grid takes one bit per cell
+    instead of eight bytes, and rules with a lookup table are stepped with
+    bit-parallel adders over whole words.
+
+    Attributes
+    ----------
+    words : np.ndarray
+        The packed grid, a uint64 array of shape (height, ceil(width / 64)).
+    grid : np.ndarray
+        A dense uint8 copy of the grid. Assigning a dense grid packs it.
+
+    Methods
+    -------
+    clear_grid()
+        Replace the grid with an empty grid.
+    advance_grid()
+        Update the grid based on the rule function.
+    get_grid()
+        Get a dense copy of the current grid.
+    get_population()
+        Count the live cells of the grid from the packed words.
+    get_fingerprint()
+        Get a hash of the grid's live cells, straight from the packed words.
+    get_window(top: int, left: int, height: int, width: int)
+        Get a rectangular window of the grid, unpacking only its words.
+    get_cell(row: int, col: int)
+        Get the state of a single cell.
+    set_cell(row: int, col: int, value: int)
+        Set the state of a single cell.
+    fill_mask(top: int, left: int, mask: np.ndarray, value: int)
+        Set the state of every cell covered by a mask.
+    """
+
+    @property
+    def grid(self) -> np.ndarray:
+        return unpack_grid(self.words, self.grid_size[1])
+
+    @grid.setter
+    def grid(self, grid: np.ndarray) -> None:
+        self.words = pack_grid(np.asarray(grid))
+
+    def clear_grid(self) -> None:
+        """
+        Replace the grid with an empty grid.
+        """
+        self.words = np.zeros(
+            (self.grid_size[0], packed_width(self.grid_size[1])), dtype=np.uint64
+        )
+
+    def advance_grid(self) -> None:
+        """
+        Update the grid based on the rule function.
+
+        Rules with a lookup table are stepped on the packed words, and cells
+        born and died are counted on the words, other rules fall back to
+        calling the rule function for every cell.
+        """
+        table = self.get_rule_table()
+        if table is None:
+            super().advance_grid()
+            return
+
+        words = self.words
+        self.words = step_packed(words, self.grid_size[1], table)
+        if self.count_changes:
+            self.births = count_bits(self.words & ~words)
+            self.deaths = count_bits(words & ~self.words)
+        if self.changed_tiles is not None:
+            self._record_step_tiles(words != self.words, (1, WORD_BITS))
+
+    def get_grid(self) -> np.ndarray:
+        """
+        Get a dense copy of the current grid.
+
+        Returns
+        -------
+        np.ndarray
+            The current grid as a uint8 array of ones and zeros.
+        """
+        return self.grid
+
+    def _grid_buffer(self) -> np.ndarray:
+        """
+        Get the packed words, which stepping and assigning a grid replace.
+        """
+        return self.words
+
+    def get_population(self) -> int:
+        """
+        Count the live cells of the grid from the packed words.
+
+        Returns
+        -------
+        int
+            The number of live cells.
+        """
+        return count_bits(self.words)
+
+    def get_fingerprint(self) -> bytes:
+        """
+        Get a hash of the grid's live cells, straight from the packed words.
+
+        Returns
+        -------
+        bytes
+            A fingerprint equal for equal grids.
+        """
+        return fingerprint_packed(tuple(self.grid_size), [self.words])
+
+    def get_window(self, top: int, left: int, height: int, width: int) -> np.ndarray:
+        """
+        Get a rectangular window of the grid, unpacking only its words.
+
+        Parameters
+        ----------
+        top : int
+            The row at the top of the window.
+        left : int
+            The column at the left of the window.
+        height : int
+            The number of rows in the window.
+        width : int
+            The number of columns in the window.
+
+        Returns
+        -------
+        np.ndarray
+            The cells inside the window as a uint8 array of ones and zeros.
+        """
+        left = max(left, 0)
+        right = min(left + width, self.grid_size[1])
+        first_word = left // WORD_BITS
+        words = self.words[max(top, 0) : top + height, first_word : packed_width(right)]
+        cells = unpack_grid(words, words.shape[1] * WORD_BITS)
+        start = left - first_word * WORD_BITS
+        return cells[:, start : start + right - left]
+
+    def get_cell(self, row: int, col: int) -> int:
+        """
+        Get the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row index of the cell.
+        col : int
+            The column index of the cell.
+
+        Returns
+        -------
+        int
+            1 if the cell is alive, otherwise 0.
+        """
+        word, bit = divmod(col, WORD_BITS)
+        return int(self.words[row, word] >> np.uint64(bit) & np.uint64(1))
+
+    def set_cell(self, row: int, col: int, value: int) -> None:
+        """
+        Set the state of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row index of the cell.
+        col : int
+            The column index of the cell.
+        value : int
+            The new state of the cell, stored as alive only if equal to 1.
+        """
+        if (value == 1) != self.get_cell(row, col):
+            self.reset_cycle_detection()
+
+        word, bit = divmod(col, WORD_BITS)
+        mask = np.uint64(1) << np.uint64(bit)
+        if value == 1:
+            self.words[row, word] |= mask
+        else:
+            self.words[row, word] &= ~mask
+        self._mark_changed(row, col)
+
+    def fill_mask(self, top: int, left: int, mask: np.ndarray, value: int) -> None:
+        """
+        Set the state of every cell covered by a mask, unpacking and packing
+        only the words under it. Parts of the mask outside the grid are
+        ignored.
+
+        Parameters
+        ----------
+        top : int
+            The row of the grid under the top of the mask.
+        left : int
+            The column of the grid under the left of the mask.
+        mask : np.ndarray
+            A boolean array, true for the cells to set.
+        value : int
+            The new state of the cells, stored as alive only if equal to 1.
+        """
+        top, left, mask = self._clip_mask(top, left, mask)
+        if not mask.any():
+            return
+
+        height, width = mask.shape
+        first_word = left // WORD_BITS
+        words = self.words[top : top + height, first_word : packed_width(left + width)]
+        cells = unpack_grid(words, words.shape[1] * WORD_BITS)
+        start = left - first_word * WORD_BITS
+        window = cells[:, start : start + width]
+        if (window[mask] != (value == 1)).any():
+            self.reset_cycle_detection()
+        window[mask] = value == 1
+        words[:] = pack_grid(cells)
+        self._mark_changed(top, left, height, width)
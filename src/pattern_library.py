@@ -0,0 +1,360 @@
+"""
+Filename: pattern_library.py
+Primary Author: Sean Nelson
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+from src.engines import UnboundedUniverse
+from src.rules import game_of_life_rule
+from src.state_io import load_rle, save_rle
+
+INDEX_FILE = "index.json"
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(__file__), "shapes")
+
+
+def find_period(cells: np.ndarray, max_generations: int = 256) -> int | None:
+    """
+    Find how many generations a pattern takes to return to its own shape
+    under the Game of Life, wherever it has moved to.
+
+    Parameters
+    ----------
+    cells : np.ndarray
+        The pattern, where cells equal to 1 are alive.
+    max_generations : int, default is 256
+        The most generations run looking for a repeat.
+
+    Returns
+    -------
+    int or None
+        The period, 1 for still lifes, or None if the pattern dies out or
+        does not repeat within `max_generations`.
+    """
+    universe = UnboundedUniverse(game_of_life_rule)
+    universe.from_grid(cells)
+
+    def shape() -> np.ndarray | None:
+        box = universe.bounding_box()
+        if box is None:
+            return None
+        top, left, bottom, right = box
+        return universe.get_window(top, left, bottom - top + 1, right - left + 1)
+
+    start = shape()
+    for generation in range(1, max_generations + 1):
+        universe.update_grid()
+        current = shape()
+        if current is None:
+            return None
+        if current.shape == start.shape and np.array_equal(current, start):
+            return generation
+    return None
+
+
+def read_rle_name(file_path: str) -> str | None:
+    """
+    Read the name of a pattern from the "#N" line of an RLE file, without
+    reading the rest of the file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    str or None
+        The name, or None if the file does not give one.
+    """
+    with open(file_path, "r") as file:
+        for line in file:
+            if not line.startswith("#"):
+                return None
+            if line.startswith("#N"):
+                return line[2:].strip()
+    return None
+
+
+class PatternLibrary:
+    """
+    A class to look up stamp patterns by name from a directory of pattern
+    files, without reading the files until a pattern is used.
+
+    The directory holds an index of every pattern's name, file, size,
+    population and period, so listing the patterns reads one small file
+    however many patterns there are. Patterns are stored as RLE files, and
+    are decoded to boolean arrays on first use and kept in a bounded cache.
+
+    Attributes
+    ----------
+    directory : str
+        The directory of pattern files and the index.
+    index : dict
+        The metadata of each pattern, by name, in the order listed.
+    cache_size : int
+        The most decoded patterns kept in memory.
+
+    Methods
+    -------
+    names()
+        Get the name of every pattern.
+    get_metadata(name: str)
+        Get the size, population and period of a pattern.
+    get(name: str)
+        Get the cells of a pattern, reading it on first use.
+    add(name: str, cells: np.ndarray, period: int | None = None)
+        Save a pattern to the library.
+    save_index()
+        Write the index to the directory.
+    rebuild_index()
+        Index every pattern file in the directory.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, cache_size: int = 64):
+        """
+        Open a pattern library, reading only its index. A directory without
+        an index is indexed and the index written.
+
+        Parameters
+        ----------
+        directory : str, default is the shapes directory beside this module
+            The directory of pattern files and the index.
+        cache_size : int, default is 64
+            The most decoded patterns kept in memory.
+        """
+        self.directory = directory
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.isfile(index_path):
+            with open(index_path, "r") as index_file:
+                patterns = json.load(index_file)["patterns"]
+            self.index = {pattern["name"]: pattern for pattern in patterns}
+        else:
+            self.index = {}
+            self.rebuild_index()
+
+    def names(self) -> list[str]:
+        """
+        Get the name of every pattern.
+
+        Returns
+        -------
+        list[str]
+            The names, in the order of the index.
+        """
+        return list(self.index)
+
+    def get_metadata(self, name: str) -> dict:
+        """
+        Get the size, population and period of a pattern.
+
+        Parameters
+        ----------
+        name : str
+            The name of the pattern.
+
+        Returns
+        -------
+        dict
+            The "name", "file", "rows", "cols", "population" and "period" of
+            the pattern. The period is None if it is not known.
+        """
+        return self.index[name]
+
+    def get(self, name: str) -> np.ndarray:
+        """
+        Get the cells of a pattern, reading its file on first use.
+
+        Parameters
+        ----------
+        name : str
+            The name of the pattern.
+
+        Returns
+        -------
+        np.ndarray
+            A read only boolean array, true for live cells.
+        """
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return self._cache[name]
+
+        cells = self._read(self.index[name]["file"])
+        cells.setflags(write=False)
+        self._cache[name] = cells
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cells
+
+    def _read(self, file_name: str) -> np.ndarray:
+        """
+        Read the cells of a pattern file, in RLE or the older JSON format.
+        """
+        file_path = os.path.join(self.directory, file_name)
+        if file_name.endswith(".json"):
+            with open(file_path, "r") as shape_file:
+                return np.array(json.load(shape_file)["shape"]) == 1
+        return load_rle(file_path)[0] == 1
+
+    def add(self, name: str, cells: np.ndarray, period: int | None = None) -> None:
+        """
+        Save a pattern to the library as an RLE file and add it to the index,
+        replacing any pattern of the same name.
+
+        Parameters
+        ----------
+        name : str
+            The name of the pattern.
+        cells : np.ndarray
+            The pattern, where cells equal to 1 are alive.
+        period : int, optional
+            The period of the pattern, found by running it if not given.
+        """
+        cells = np.asarray(cells) == 1
+        if period is None:
+            period = find_period(cells)
+
+        file_name = self.index[name]["file"] if name in self.index else None
+        if file_name is not None and file_name.endswith(".json"):
+            # Patterns in the older format are replaced by an RLE file
+            os.remove(os.path.join(self.directory, file_name))
+            file_name = None
+        if file_name is None:
+            file_name = self._new_file_name(name)
+
+        save_rle(os.path.join(self.directory, file_name), cells, name=name)
+        self.index[name] = self._metadata(name, file_name, cells, period)
+        self._cache.pop(name, None)
+        self.save_index()
+
+    def _new_file_name(self, name: str) -> str:
+        """
+        Choose an unused RLE file name for a pattern from its name.
+        """
+        stem = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "pattern"
+        taken = {pattern["file"] for pattern in self.index.values()}
+        file_name = stem + ".rle"
+        suffix = 1
+        while file_name in taken or os.path.exists(
+            os.path.join(self.directory, file_name)
+        ):
+            suffix += 1
+            file_name = f"{stem}_{suffix}.rle"
+        return file_name
+
+    def _metadata(
+        self, name: str, file_name: str, cells: np.ndarray, period: int | None
+    ) -> dict:
+        """
+        Build the index entry of a pattern.
+        """
+        return {
+            "name": name,
+            "file": file_name,
+            "rows": int(cells.shape[0]),
+            "cols": int(cells.shape[1]),
+            "population": int(np.count_nonzero(cells)),
+            "period": period,
+        }
+
+    def save_index(self) -> None:
+        """
+        Write the index to the directory, a pattern to a line.
+        """
+        lines = [json.dumps(pattern) for pattern in self.index.values()]
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        with open(index_path, "w") as index_file:
+            index_file.write('{"patterns": [\n' + ",\n".join(lines) + "\n]}\n")
+
+    def rebuild_index(self) -> None:
+        """
+        Index every RLE and JSON pattern file in the directory, reading each
+        in full to measure it. Patterns already indexed keep their place
+        and period, and new ones are added in order of file name.
+        """
+        periods = {
+            pattern["file"]: pattern["period"] for pattern in self.index.values()
+        }
+        found = {
+            file_name
+            for file_name in os.listdir(self.directory)
+            if file_name.endswith((".rle", ".json")) and file_name != INDEX_FILE
+        }
+        files = [file_name for file_name in periods if file_name in found]
+        files += sorted(found - set(periods))
+
+        index = {}
+        for file_name in files:
+            file_path = os.path.join(self.directory, file_name)
+            name = None
+            if file_name.endswith(".json"):
+                with open(file_path, "r") as shape_file:
+                    name = json.load(shape_file).get("name")
+            else:
+                name = read_rle_name(file_path)
+            name = name or os.path.splitext(file_name)[0]
+
+            cells = self._read(file_name)
+            period = periods[file_name] if file_name in periods else find_period(cells)
+            index[name] = self._metadata(name, file_name, cells, period)
+
+        self.index = index
+        self._cache.clear()
+        self.save_index()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Rebuild the index of a pattern library from the command line, after
+    pattern files have been added to or removed from its directory.
+
+    Parameters
+    ----------
+    argv : list[str], optional
+        The command line arguments, defaulting to those of the process.
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.pattern_library",
+        description="Index the pattern files of a stamp pattern library.",
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default=DEFAULT_DIRECTORY,
+        help="the directory of pattern files (default the built in shapes)",
+    )
+    args = parser.parse_args(argv)
+
+    # A library without an index is indexed as it is opened
+    indexed = os.path.isfile(os.path.join(args.directory, INDEX_FILE))
+    library = PatternLibrary(args.directory)
+    if indexed:
+        library.rebuild_index()
+
+    for name in library.names():
+        pattern = library.get_metadata(name)
+        period = pattern["period"] or "-"
+        print(
+            f"{name}: {pattern['rows']}x{pattern['cols']}, "
+            f"{pattern['population']} cells, period {period}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
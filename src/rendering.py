@@ -0,0 +1,156 @@
+"""
+Filename: rendering.py
+Primary Author: Steven Taylor
+"""
+
+import numpy as np
+import pygame
+
+# Palette indices of each kind of pixel
+MARGIN = 0
+DEAD = 1
+ALIVE = 2
+HOVERED = 3
+
+
+def build_pixel_index(
+    cells: int, cell_size: int, margin: int, start: int = 0, stop: int | None = None
+) -> np.ndarray:
+    """
+    Map each pixel along one axis of the grid surface to the cell drawn there.
+
+    Parameters
+    ----------
+    cells : int
+        The number of cells along the axis.
+    cell_size : int
+        The size of a cell in pixels along the axis.
+    margin : int
+        The margin before each cell in pixels.
+    start : int, default is 0
+        The first pixel mapped.
+    stop : int, optional
+        The pixel after the last pixel mapped. Defaults to the end of the
+        margin after the last cell, and pixels past it are margin.
+
+    Returns
+    -------
+    np.ndarray
+        The cell index of every pixel, or -1 for pixels in a margin.
+    """
+    pitch = cell_size + margin
+    if stop is None:
+        stop = cells * pitch + margin
+    pixels = np.arange(start, stop)
+    index = pixels // pitch
+    in_margin = (pixels % pitch < margin) | (index >= cells)
+    index[in_margin] = -1
+    return index
+
+
+def cell_codes(cells: np.ndarray, hovered: np.ndarray | None = None) -> np.ndarray:
+    """
+    Convert cell states to palette indices.
+
+    The result has an extra row and column of margin codes, so that indexing
+    it with -1 from `build_pixel_index` selects the margin colour.
+
+    Parameters
+    ----------
+    cells : np.ndarray
+        The cell states, where 1 is alive.
+    hovered : np.ndarray, optional
+        A boolean array the shape of `cells`, true for the cells under a
+        preview, which are coded as hovered unless they are alive.
+
+    Returns
+    -------
+    np.ndarray
+        A uint8 array of palette indices one larger than `cells` each way.
+    """
+    height, width = cells.shape
+    codes = np.full((height + 1, width + 1), MARGIN, dtype=np.uint8)
+    codes[:height, :width] = DEAD
+    if hovered is not None:
+        codes[:height, :width][hovered] = HOVERED
+    codes[:height, :width][cells == 1] = ALIVE
+    return codes
+
+
+def render_cells(
+    surface: pygame.Surface,
+    codes: np.ndarray,
+    pixel_rows: np.ndarray,
+    pixel_cols: np.ndarray,
+    colours: list[tuple[int, int, int]],
+) -> None:
+    """
+    Draw every cell and margin of a grid onto a surface in a single blit.
+
+    Each pixel is looked up from the cell it belongs to, so the cost depends
+    on the size of the surface rather than on how many cells are alive.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+        The surface to draw onto, the same size as the pixel indices.
+    codes : np.ndarray
+        The palette index of each cell, from `cell_codes`.
+    pixel_rows : np.ndarray
+        The cell row of each pixel row, from `build_pixel_index`.
+    pixel_cols : np.ndarray
+        The cell column of each pixel column, from `build_pixel_index`.
+    colours : list[tuple[int, int, int]]
+        The margin, dead, alive and hovered colours, in palette order.
+    """
+    palette = np.array([surface.map_rgb(colour) for colour in colours], np.uint32)
+    mapped = palette[codes.T]
+
+    # Surface arrays are indexed by x then y. Gathering whole columns first
+    # and then rows is much faster than a single two dimensional gather.
+    pixels = mapped[pixel_cols][:, pixel_rows]
+    pygame.surfarray.blit_array(surface, pixels)
+
+
+def render_density(
+    surface: pygame.Surface,
+    counts: np.ndarray,
+    areas: np.ndarray,
+    pixel_rows: np.ndarray,
+    pixel_cols: np.ndarray,
+    colours: list[tuple[int, int, int]],
+) -> None:
+    """
+    Draw blocks of cells shaded by the share of their cells alive, without
+    grid lines, in a single blit.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+        The surface to draw onto, the same size as the pixel indices.
+    counts : np.ndarray
+        The number of live cells in each block.
+    areas : np.ndarray
+        The number of cells in each block.
+    pixel_rows : np.ndarray
+        The block row of each pixel row.
+    pixel_cols : np.ndarray
+        The block column of each pixel column.
+    colours : list[tuple[int, int, int]]
+        The colours of an empty and a full block, which are blended between.
+    """
+    empty, full = (np.array(colour[:3], dtype=float) for colour in colours)
+    shades = np.linspace(0, 1, 256)[:, None]
+    blended = np.rint(empty + (full - empty) * shades).astype(int)
+    palette = np.array([surface.map_rgb(colour) for colour in blended], np.uint32)
+
+    # Only the blocks in view are shaded
+    top, left = pixel_rows.min(), pixel_cols.min()
+    bottom, right = pixel_rows.max() + 1, pixel_cols.max() + 1
+    counts = counts[top:bottom, left:right]
+    areas = areas[top:bottom, left:right]
+    shade = counts * 255 // np.maximum(areas, 1)
+
+    mapped = palette[shade.T]
+    pixels = mapped[pixel_cols - left][:, pixel_rows - top]
+    pygame.surfarray.blit_array(surface, pixels)
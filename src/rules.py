@@ -3,194 +3,171 @@ Filename: rules.py
 Primary Author: Sean Nelson
 """
 
+import re
 
-def game_of_life_rule(grid: list[list[int]], i: int, j: int):
-    """
-    Apply the Game of Life rule to a cell in a given grid.
+from src.engines.vectorised import build_lookup_table
 
-    Parameters
-    ----------
-    grid : list[list[int]]
-        The grid of cells.
-    i : int
-        The row index of the cell.
-    j : int
-        The column index of the cell.
 
-    Returns
-    -------
-    int
-        The new state of the cell (0 for dead, 1 for alive) based on the Game of Life rule.
+class LifeLikeRule:
     """
-    neighbours = 0
-    # count number of neighbours
-    for x in range(-1, 2):
-        for y in range(-1, 2):
-            if x == 0 and y == 0:
-                continue
-            if grid[(i + x) % len(grid)][(j + y) % len(grid[0])] == 1:
-                neighbours += 1
-    if grid[i][j] == 1:  # if cell is alive
-        if neighbours < 2:  # if cell has less than 2 neighbours, it dies
-            return 0
-        elif neighbours > 3:  # if cell has more than 3 neighbours, it dies
-            return 0
-        else:  # if cell has 2 or 3 neighbours, it lives
-            return 1
-    else:  # if cell is dead
-        if neighbours == 3:  # if cell has 3 neighbours, it becomes alive
-            return 1
-        else:  # if cell has less than 3 or more than 3 neighbours, it stays dead
-            return 0
-
-
-def rule_30(grid: list[list[int]], i: int, j: int):
-    """
-    Apply Rule 30 to a cell in a given grid.
+    An outer-totalistic cellular automaton rule, defined by the neighbour
+    counts for which cells are born and survive.
 
-    Parameters
+    Attributes
     ----------
-    grid : list[list[int]]
-        The grid of cells.
-    i : int
-        The row index of the cell.
-    j : int
-        The column index of the cell.
-
-    Returns
+    name : str
+        The name of the rule.
+    birth : frozenset[int]
+        Neighbour counts for which a dead cell becomes alive.
+    survival : frozenset[int]
+        Neighbour counts for which a live cell stays alive.
+    table : np.ndarray
+        The precomputed 18 entry lookup table, indexed by
+        ``9 * alive + neighbours``.
+
+    Methods
     -------
-    int
-        The new state of the cell (0 for dead, 1 for alive) based on Rule 30.
+    from_notation(notation, name=None)
+        Create a rule from "B3/S23" style notation.
+    notation
+        The rule written in "B3/S23" style notation.
+    __call__(grid, i, j)
+        Apply the rule to a single cell in a given grid.
     """
-    neighbours = 0
-    # count number of neighbours
-    for x in range(-1, 2):
-        for y in range(-1, 2):
-            if x == 0 and y == 0:
-                continue
-            if grid[(i + x) % len(grid)][(j + y) % len(grid[0])] == 1:
-                neighbours += 1
-    if grid[i][j] == 1:
-        if neighbours == 3:
-            return 0
-        else:
-            return 1
-    else:
-        if neighbours == 1:
-            return 1
-        else:
-            return 0
-
 
-def rule_90(grid: list[list[int]], i: int, j: int):
-    """
-    Apply Rule 90 to a cell in a given grid.
-
-    Parameters
-    ----------
-    grid : list[list[int]]
-        The grid of cells.
-    i : int
-        The row index of the cell.
-    j : int
-        The column index of the cell.
-
-    Returns
-    -------
-    int
-        The new state of the cell (0 for dead, 1 for alive) based on Rule 90.
-    """
-    neighbours = 0
-    # count number of neighbours
-    for x in range(-1, 2):
-        for y in range(-1, 2):
-            if x == 0 and y == 0:
-                continue
-            if grid[(i + x) % len(grid)][(j + y) % len(grid[0])] == 1:
-                neighbours += 1
-    if grid[i][j] == 1:
-        if neighbours == 2:
-            return 0
-        else:
-            return 1
-    else:
-        if neighbours == 1:
-            return 1
-        else:
-            return 0
-
-
-def rule_110(grid: list[list[int]], i: int, j: int):
-    """
-    Apply Rule 110 to a cell in a given grid.
-
-    Parameters
-    ----------
-    grid : list[list[int]]
-        The grid of cells.
-    i : int
-        The row index of the cell.
-    j : int
-        The column index of the cell.
-
-    Returns
-    -------
-    int
-        The new state of the cell (0 for dead, 1 for alive) based on Rule 110.
-    """
-    neighbours = 0
-    # count number of neighbours
-    for x in range(-1, 2):
-        for y in range(-1, 2):
-            if x == 0 and y == 0:
-                continue
-            if grid[(i + x) % len(grid)][(j + y) % len(grid[0])] == 1:
-                neighbours += 1
-    if grid[i][j] == 1:
-        if neighbours == 1 or neighbours == 2:
-            return 0
-        else:
-            return 1
-    else:
-        if neighbours == 1:
-            return 1
+    def __init__(self, name: str, birth: set[int], survival: set[int]) -> None:
+        """
+        Initialize the LifeLikeRule class.
+
+        Parameters
+        ----------
+        name : str
+            The name of the rule.
+        birth : set[int]
+            Neighbour counts for which a dead cell becomes alive.
+        survival : set[int]
+            Neighbour counts for which a live cell stays alive.
+        """
+        counts = set(birth) | set(survival)
+        if not counts <= set(range(9)):
+            raise ValueError(f"Neighbour counts must be between 0 and 8: {counts}")
+
+        self.name = name
+        # Kept so rules can be used wherever a rule function was expected
+        self.__name__ = name
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+
+        self.table = build_lookup_table(self.birth, self.survival)
+        self.table.setflags(write=False)
+
+    @classmethod
+    def from_notation(cls, notation: str, name: str | None = None) -> "LifeLikeRule":
+        """
+        Create a rule from "B3/S23" style notation.
+
+        Parameters
+        ----------
+        notation : str
+            The birth and survival counts, e.g. "B3/S23" or "S23/B3".
+        name : str, optional
+            The name of the rule. Defaults to the notation.
+
+        Returns
+        -------
+        LifeLikeRule
+            The parsed rule.
+        """
+        match = re.fullmatch(
+            r"\s*B([0-8]*)\s*/\s*S([0-8]*)\s*|\s*S([0-8]*)\s*/\s*B([0-8]*)\s*",
+            notation,
+            flags=re.IGNORECASE,
+        )
+        if not match:
+            raise ValueError(f"Invalid rule notation: {notation!r}")
+
+        if match.group(1) is not None:
+            birth, survival = match.group(1), match.group(2)
         else:
-            return 0
-
-
-def rule_184(grid: list[list[int]], i: int, j: int):
+            birth, survival = match.group(4), match.group(3)
+
+        return cls(
+            name or notation.strip(),
+            {int(count) for count in birth},
+            {int(count) for count in survival},
+        )
+
+    @property
+    def notation(self) -> str:
+        """
+        The rule written in "B3/S23" style notation.
+        """
+        birth = "".join(str(count) for count in sorted(self.birth))
+        survival = "".join(str(count) for count in sorted(self.survival))
+        return f"B{birth}/S{survival}"
+
+    def __call__(self, grid: list[list[int]], i: int, j: int) -> int:
+        """
+        Apply the rule to a cell in a given grid.
+
+        Parameters
+        ----------
+        grid : list[list[int]]
+            The grid of cells.
+        i : int
+            The row index of the cell.
+        j : int
+            The column index of the cell.
+
+        Returns
+        -------
+        int
+            The new state of the cell (0 for dead, 1 for alive).
+        """
+        neighbours = 0
+        for x in range(-1, 2):
+            for y in range(-1, 2):
+                if x == 0 and y == 0:
+                    continue
+                if grid[(i + x) % len(grid)][(j + y) % len(grid[0])] == 1:
+                    neighbours += 1
+        alive = grid[i][j] == 1
+        return int(self.table[9 * alive + neighbours])
+
+    def __repr__(self) -> str:
+        return f"LifeLikeRule({self.name!r}, {self.notation!r})"
+
+
+game_of_life_rule = LifeLikeRule.from_notation("B3/S23", "game_of_life_rule")
+rule_30 = LifeLikeRule.from_notation("B1/S01245678", "rule_30")
+rule_90 = LifeLikeRule.from_notation("B1/S01345678", "rule_90")
+rule_110 = LifeLikeRule.from_notation("B1/S0345678", "rule_110")
+rule_184 = LifeLikeRule.from_notation("B1/S0245678", "rule_184")
+
+# Rules available by name in the application
+RULES = {
+    "Game of Life": game_of_life_rule,
+    "Rule 30": rule_30,
+    "Rule 90": rule_90,
+    "Rule 110": rule_110,
+    "Rule 184": rule_184,
+}
+
+
+def get_rule(rule_name: str) -> LifeLikeRule:
     """
-    Apply Rule 184 to a cell in a given grid.
+    Resolve a rule from its name or its "B3/S23" style notation.
 
     Parameters
     ----------
-    grid : list[list[int]]
-        The grid of cells.
-    i : int
-        The row index of the cell.
-    j : int
-        The column index of the cell.
+    rule_name : str
+        A name from `RULES`, or the notation of a Life-like rule.
 
     Returns
     -------
-    int
-        The new state of the cell (0 for dead, 1 for alive) based on Rule 184.
+    LifeLikeRule
+        The matching rule.
     """
-    neighbours = 0
-    # count number of neighbours
-    for x in range(-1, 2):
-        for y in range(-1, 2):
-            if x == 0 and y == 0:
-                continue
-            if grid[(i + x) % len(grid)][(j + y) % len(grid[0])] == 1:
-                neighbours += 1
-    if grid[i][j] == 1:
-        if neighbours == 1 or neighbours == 3:
-            return 0
-        else:
-            return 1
-    else:
-        if neighbours == 1:
-            return 1
-        else:
-            return 0
+    if rule_name in RULES:
+        return RULES[rule_name]
+    return LifeLikeRule.from_notation(rule_name)
@@ -0,0 +1,135 @@
+"""
+Filename: scheduler.py
+Primary Author: Steven Taylor
+"""
+
+import time
+from collections import deque
+from typing import Callable
+
+
+class FixedStepScheduler:
+    """
+    A class used to run generations at a fixed rate, independent of the frame
+    rate they are drawn at.
+
+    Each frame the time since the last frame is added to an accumulator, and
+    as many generations are run as the target rate calls for, so a 60 frames
+    per second display can show hundreds of generations per second. Steps
+    stop once a frame's time budget is used up, so a rate the machine cannot
+    reach slows the simulation rather than freezing the display.
+
+    Attributes
+    ----------
+    rate : float
+        The target number of generations per second.
+    frame_budget : float
+        The most time in seconds spent running generations in one frame.
+    window : float
+        The time in seconds the achieved rate is measured over.
+
+    Methods
+    -------
+    set_rate(rate):
+        Sets the target number of generations per second.
+    reset():
+        Discards owed generations and the achieved rate history.
+    run(step, time_delta):
+        Runs the generations owed for the time since the last frame.
+    """
+
+    def __init__(
+        self, rate: float, frame_budget: float = 1 / 90, window: float = 1.0
+    ) -> None:
+        """
+        Initialize the FixedStepScheduler class.
+
+        Parameters
+        ----------
+        rate : float
+            The target number of generations per second.
+        frame_budget : float, default is 1 / 90
+            The most time in seconds spent running generations in one frame.
+        window : float, default is 1.0
+            The time in seconds the achieved rate is measured over.
+        """
+        self.rate = rate
+        self.frame_budget = frame_budget
+        self.window = window
+
+        self._owed = 0.0
+        self._history = deque()
+
+    @property
+    def achieved_rate(self) -> float:
+        """
+        The number of generations per second run over the last window.
+        """
+        if len(self._history) < 2:
+            return 0.0
+
+        elapsed = self._history[-1][0] - self._history[0][0]
+        if elapsed <= 0:
+            return 0.0
+
+        # The oldest entry marks the start of the window, not generations in it
+        generations = sum(count for _, count in self._history) - self._history[0][1]
+        return generations / elapsed
+
+    def set_rate(self, rate: float) -> None:
+        """
+        Set the target number of generations per second.
+
+        Parameters
+        ----------
+        rate : float
+            The target number of generations per second.
+        """
+        self.rate = rate
+
+    def reset(self) -> None:
+        """
+        Discard owed generations and the achieved rate history, for example
+        after the simulation was paused.
+        """
+        self._owed = 0.0
+        self._history.clear()
+
+    def run(self, step: Callable[[], None], time_delta: float) -> int:
+        """
+        Run the generations owed for the time since the last frame.
+
+        Parameters
+        ----------
+        step : Callable[[], None]
+            The function that runs one generation.
+        time_delta : float
+            The time in seconds since the last frame.
+
+        Returns
+        -------
+        int
+            The number of generations run.
+        """
+        self._owed += time_delta * self.rate
+        owed = int(self._owed)
+
+        start = time.perf_counter()
+        deadline = start + self.frame_budget
+        count = 0
+        while count < owed:
+            step()
+            count += 1
+            if time.perf_counter() > deadline:
+                break
+
+        # Generations that did not fit in the budget are dropped rather than
+        # carried over, so falling behind never snowballs
+        self._owed = self._owed - owed if count == owed else 0.0
+
+        now = time.perf_counter()
+        self._history.append((now, count))
+        while now - self._history[0][0] > self.window:
+            self._history.popleft()
+
+        return count
@@ -0,0 +1,82 @@
+"""
+Filename: seeding.py
+Primary Author: Sean Nelson
+"""
+
+import numpy as np
+
+# The most random numbers drawn at once while filling a grid
+CHUNK_CELLS = 1 << 20
+
+
+def create_bit_generator(seed: int | list[int]) -> np.random.MT19937:
+    """
+    Create a random bit generator of its own for a seed.
+
+    The generator starts in the same state `np.random.seed(seed)` puts the
+    global generator in, so grids drawn from it match those drawn with the
+    global generator, without touching it. Automata and threads can then
+    seed independently.
+
+    Parameters
+    ----------
+    seed : int, list[int]
+        The seed, as accepted by `np.random.seed`.
+
+    Returns
+    -------
+    np.random.MT19937
+        The seeded bit generator.
+    """
+    bit_generator = np.random.MT19937()
+    bit_generator.state = np.random.RandomState(seed).get_state(legacy=False)
+    return bit_generator
+
+
+def random_cells(
+    bit_generator: np.random.MT19937,
+    shape: tuple[int, int],
+    density: float = 0.5,
+    dtype: type = np.uint8,
+) -> np.ndarray:
+    """
+    Draw a grid of random live and dead cells.
+
+    Every cell takes one 32 bit draw from the generator, so drawing a grid in
+    bands of rows gives the same cells as drawing it at once. With a density
+    of 0.5 each cell is the lowest bit of its draw, which is exactly what
+    `np.random.randint(2, size=shape)` gives, so seeded grids are unchanged.
+    Other densities compare the draw against a threshold. The cells are
+    written straight into an array of the chosen dtype, drawing a bounded
+    number at a time.
+
+    Parameters
+    ----------
+    bit_generator : np.random.MT19937
+        The generator, see `create_bit_generator`.
+    shape : tuple[int, int]
+        The number of rows and columns.
+    density : float, default is 0.5
+        The chance of each cell being alive.
+    dtype : type, default is np.uint8
+        The dtype of the grid.
+
+    Returns
+    -------
+    np.ndarray
+        The grid of ones and zeros.
+    """
+    if not 0 <= density <= 1:
+        raise ValueError(f"Density must be between 0 and 1, not {density}")
+
+    height, width = shape
+    cells = np.empty(height * width, dtype=dtype)
+    threshold = np.uint64(round(density * 2**32))
+    for start in range(0, cells.size, CHUNK_CELLS):
+        stop = min(start + CHUNK_CELLS, cells.size)
+        draws = bit_generator.random_raw(stop - start)
+        if density == 0.5:
+            cells[start:stop] = draws & np.uint64(1)
+        else:
+            cells[start:stop] = draws < threshold
+    return cells.reshape(height, width)
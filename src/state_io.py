@@ -0,0 +1,442 @@
+"""
+Filename: state_io.py
+Primary Author: Sean Nelson
+"""
+
+import ast
+import json
+import re
+
+import numpy as np
+
+# Binary state files start with this line, followed by a line of JSON holding
+# the seed, rule and dimensions, followed by the packed rows of the grid
+BINARY_MAGIC = b"CASTATE1\n"
+
+# Rows are encoded and decoded this many at a time, so large grids are
+# streamed rather than converted in one piece
+BAND_ROWS = 4096
+
+# The most characters on a line of pattern data in an RLE file
+RLE_LINE_LENGTH = 70
+
+_RLE_HEADER = re.compile(
+    r"x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*([^\s,]+))?", re.I
+)
+
+
+def detect_format(file_path: str) -> str:
+    """
+    Detect the format of a state file from its first bytes.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    str
+        "binary" for bit-packed state files, "rle" for run length encoded
+        patterns, or "text" for state files of one digit per cell.
+    """
+    with open(file_path, "rb") as file:
+        start = file.read(len(BINARY_MAGIC))
+
+    if start == BINARY_MAGIC:
+        return "binary"
+    if start.startswith(b"Seed:"):
+        return "text"
+    if start.lstrip()[:1] in (b"#", b"x", b"X"):
+        return "rle"
+    return "text"
+
+
+def load_state(file_path: str) -> tuple[np.ndarray, object, str | None]:
+    """
+    Load a grid from a state file of any supported format.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    tuple[np.ndarray, int or list[int] or None, str or None]
+        The grid as a uint8 array of ones and zeros, the seed it was created
+        with and the notation of its rule, where the file records them.
+    """
+    file_format = detect_format(file_path)
+    if file_format == "binary":
+        return load_binary_state(file_path)
+    if file_format == "rle":
+        grid, rule = load_rle(file_path)
+        return grid, None, rule
+    grid, seed = load_text_state(file_path)
+    return grid, seed, None
+
+
+def save_state(
+    file_path: str,
+    grid: np.ndarray,
+    seed=None,
+    rule: str | None = None,
+    file_format: str = "text",
+) -> None:
+    """
+    Save a grid to a state file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    grid : np.ndarray
+        The grid, where cells equal to 1 are alive.
+    seed : int or list[int] or None, optional
+        The seed the grid was created with.
+    rule : str, optional
+        The notation of the rule, recorded by the binary and RLE formats.
+    file_format : str, default is "text"
+        One of "text", "binary" or "rle".
+    """
+    if file_format == "binary":
+        save_binary_state(file_path, grid, seed, rule)
+    elif file_format == "rle":
+        save_rle(file_path, grid, rule)
+    elif file_format == "text":
+        save_text_state(file_path, grid, seed)
+    else:
+        raise ValueError(f"Unknown state file format: {file_format!r}")
+
+
+def parse_seed(seed_str: str):
+    """
+    Parse the seed from the header line of a text state file.
+
+    Parameters
+    ----------
+    seed_str : str
+        The header line, such as "Seed:42".
+
+    Returns
+    -------
+    int or list[int] or None
+        The seed.
+    """
+    return ast.literal_eval(seed_str.split(":", 1)[1].strip())
+
+
+def load_text_state(file_path: str) -> tuple[np.ndarray, object]:
+    """
+    Load a grid from a text state file of one digit per cell.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    tuple[np.ndarray, int or list[int] or None]
+        The grid as a uint8 array of ones and zeros, and its seed.
+    """
+    with open(file_path, "rb") as file:
+        header = file.readline().decode()
+        rows = file.read().splitlines()
+
+    while rows and not rows[-1]:
+        rows.pop()
+
+    width = max((len(row) for row in rows), default=0)
+    if all(len(row) == width for row in rows):
+        data = np.frombuffer(b"".join(rows), dtype=np.uint8)
+    else:
+        data = np.frombuffer(b"".join(row.ljust(width, b"0") for row in rows), np.uint8)
+
+    grid = (data == ord("1")).view(np.uint8).reshape(len(rows), width)
+    return grid, parse_seed(header)
+
+
+def save_text_state(file_path: str, grid: np.ndarray, seed=None) -> None:
+    """
+    Save a grid to a text state file of one digit per cell.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    grid : np.ndarray
+        The grid, where cells equal to 1 are alive.
+    seed : int or list[int] or None, optional
+        The seed the grid was created with.
+    """
+    height, width = grid.shape
+    with open(file_path, "wb") as file:
+        file.write(f"Seed:{seed}\n".encode())
+        for start in range(0, height, BAND_ROWS):
+            band = grid[start : start + BAND_ROWS]
+            text = np.full((len(band), width + 1), ord("\n"), dtype=np.uint8)
+            text[:, :width] = ord("0") + (band == 1)
+            file.write(text.tobytes())
+
+
+def read_binary_header(file_path: str) -> tuple[dict, int]:
+    """
+    Read the header of a binary state file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    tuple[dict, int]
+        The header, holding "height", "width", "seed" and "rule", and the
+        offset in bytes of the packed rows.
+    """
+    with open(file_path, "rb") as file:
+        if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{file_path} is not a binary state file")
+        header = json.loads(file.readline())
+        return header, file.tell()
+
+
+def write_binary_header(
+    file, height: int, width: int, seed=None, rule: str | None = None
+) -> None:
+    """
+    Write the header of a binary state file.
+
+    Parameters
+    ----------
+    file : file
+        The file, opened for binary writing at its start.
+    height : int
+        The number of rows of the grid.
+    width : int
+        The number of columns of the grid.
+    seed : int or list[int] or None, optional
+        The seed the grid was created with.
+    rule : str, optional
+        The notation of the rule.
+    """
+    header = {"height": height, "width": width, "seed": seed, "rule": rule}
+    file.write(BINARY_MAGIC)
+    file.write(json.dumps(header, default=int).encode() + b"\n")
+
+
+def packed_row_bytes(width: int) -> int:
+    """
+    Get the number of bytes each row of a grid takes in a binary state file.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the grid.
+
+    Returns
+    -------
+    int
+        The number of bytes, one bit per cell rounded up to whole bytes.
+    """
+    return -(-width // 8)
+
+
+def load_binary_state(file_path: str) -> tuple[np.ndarray, object, str | None]:
+    """
+    Load a grid from a bit-packed binary state file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    tuple[np.ndarray, int or list[int] or None, str or None]
+        The grid as a uint8 array of ones and zeros, its seed and the
+        notation of its rule.
+    """
+    header, offset = read_binary_header(file_path)
+    height, width = header["height"], header["width"]
+    row_bytes = packed_row_bytes(width)
+
+    grid = np.empty((height, width), dtype=np.uint8)
+    with open(file_path, "rb") as file:
+        file.seek(offset)
+        for start in range(0, height, BAND_ROWS):
+            rows = min(BAND_ROWS, height - start)
+            packed = np.fromfile(file, dtype=np.uint8, count=rows * row_bytes)
+            if len(packed) != rows * row_bytes:
+                raise ValueError(f"{file_path} is truncated")
+            grid[start : start + rows] = np.unpackbits(
+                packed.reshape(rows, row_bytes), axis=1, count=width
+            )
+    return grid, header["seed"], header["rule"]
+
+
+def save_binary_state(
+    file_path: str, grid: np.ndarray, seed=None, rule: str | None = None
+) -> None:
+    """
+    Save a grid to a bit-packed binary state file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    grid : np.ndarray
+        The grid, where cells equal to 1 are alive.
+    seed : int or list[int] or None, optional
+        The seed the grid was created with.
+    rule : str, optional
+        The notation of the rule.
+    """
+    height, width = grid.shape
+    with open(file_path, "wb") as file:
+        write_binary_header(file, height, width, seed, rule)
+        for start in range(0, height, BAND_ROWS):
+            band = grid[start : start + BAND_ROWS] == 1
+            file.write(np.packbits(band, axis=1).tobytes())
+
+
+def load_rle(file_path: str) -> tuple[np.ndarray, str | None]:
+    """
+    Load a grid from a run length encoded pattern file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    tuple[np.ndarray, str or None]
+        The grid as a uint8 array of ones and zeros, and the rule given in
+        the header, if any.
+    """
+    with open(file_path, "r") as file:
+        lines = [line.strip() for line in file if not line.startswith("#")]
+
+    header = _RLE_HEADER.match(lines[0]) if lines else None
+    if header is None:
+        raise ValueError(f"{file_path} has no RLE header")
+    width, height = int(header.group(1)), int(header.group(2))
+    rule = header.group(3)
+
+    grid = np.zeros((height, width), dtype=np.uint8)
+    data = "".join(lines[1:]).split("!", 1)[0].encode()
+    chars = np.frombuffer(data, dtype=np.uint8)
+    chars = chars[~np.isin(chars, np.frombuffer(b" \t\r\n", dtype=np.uint8))]
+
+    # Every character other than a digit is a tag, repeated by the number
+    # written in the digits before it, or once if there are none
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    tag_positions = np.flatnonzero(~is_digit)
+    if not len(tag_positions):
+        return grid, rule
+    tags = chars[tag_positions]
+
+    digit_positions = np.flatnonzero(is_digit)
+    digit_tags = np.searchsorted(tag_positions, digit_positions)
+    in_count = digit_tags < len(tag_positions)
+    digit_positions, digit_tags = digit_positions[in_count], digit_tags[in_count]
+    place = 10 ** (tag_positions[digit_tags] - 1 - digit_positions).astype(np.float64)
+    digits = chars[digit_positions] - ord("0")
+    counts = np.bincount(digit_tags, digits * place, len(tag_positions))
+    counts = np.round(counts).astype(np.int64)
+    has_count = np.diff(tag_positions, prepend=-1) > 1
+    counts[~has_count] = 1
+
+    new_line = tags == ord("$")
+
+    # Each run starts on the row reached by the "$" tokens before it, and at
+    # the column reached by the runs since the last "$"
+    line_counts = np.where(new_line, counts, 0)
+    run_rows = np.cumsum(line_counts) - line_counts
+    moves = np.where(new_line, 0, counts)
+    moved = np.cumsum(moves) - moves
+    run_cols = moved - np.maximum.accumulate(np.where(new_line, moved, 0))
+
+    alive = ~new_line & (tags != ord("b")) & (tags != ord("."))
+    lengths = counts[alive]
+
+    # Expand the runs of live cells into the coordinates of every cell
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    rows = np.repeat(run_rows[alive], lengths)
+    cols = np.repeat(run_cols[alive], lengths) + offsets
+
+    inside = (rows < height) & (cols < width)
+    grid[rows[inside], cols[inside]] = 1
+    return grid, rule
+
+
+def save_rle(
+    file_path: str, grid: np.ndarray, rule: str | None = None, name: str | None = None
+) -> None:
+    """
+    Save a grid to a run length encoded pattern file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    grid : np.ndarray
+        The grid, where cells equal to 1 are alive.
+    rule : str, optional
+        The notation of the rule, written to the header.
+    name : str, optional
+        The name of the pattern, written on a "#N" line before the header.
+    """
+    height, width = grid.shape
+    alive = np.asarray(grid == 1, dtype=np.int8)
+
+    # Runs start at the start of every row and wherever a cell differs from
+    # the one before it
+    flat = alive.ravel()
+    run_start = np.ones(flat.size, dtype=bool)
+    run_start[1:] = flat[1:] != flat[:-1]
+    run_start[::width] = True
+    starts = np.flatnonzero(run_start)
+    lengths = np.diff(starts, append=flat.size)
+
+    values = flat[starts].astype(bool)
+
+    # Dead runs reaching the end of a row are implied by the next "$"
+    keep = values | ((starts % width) + lengths != width)
+    starts, lengths, values = starts[keep], lengths[keep], values[keep]
+    gaps = np.diff(starts // width, prepend=0)
+
+    new_lines = {0: "", 1: "$"}
+    tokens = [
+        (new_lines[gap] if gap < 2 else f"{gap}$")
+        + (str(length) if length > 1 else "")
+        + ("o" if value else "b")
+        for gap, length, value in zip(gaps.tolist(), lengths.tolist(), values.tolist())
+    ]
+    tokens.append("!")
+
+    lines = []
+    line = []
+    line_length = 0
+    for token in tokens:
+        if line_length + len(token) > RLE_LINE_LENGTH:
+            lines.append("".join(line))
+            line = []
+            line_length = 0
+        line.append(token)
+        line_length += len(token)
+    lines.append("".join(line))
+
+    with open(file_path, "w") as file:
+        if name:
+            file.write(f"#N {name}\n")
+        header = f"x = {width}, y = {height}"
+        if rule:
+            header += f", rule = {rule}"
+        file.write(header + "\n")
+        file.write("\n".join(lines) + "\n")
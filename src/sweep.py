@@ -0,0 +1,399 @@
+"""
+Filename: sweep.py
+Primary Author: Sean Nelson
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from src.batch import BatchCellularAutomata
+from src.rules import get_rule
+
+FIELDS = [
+    "seed",
+    "population",
+    "stabilised_at",
+    "period",
+    "min_row",
+    "min_col",
+    "max_row",
+    "max_col",
+]
+
+
+def parse_seeds(specs: list[str]) -> list[int]:
+    """
+    Parse seeds given as single seeds or inclusive ranges such as "1-1000".
+
+    Parameters
+    ----------
+    specs : list[str]
+        The seeds and ranges.
+
+    Returns
+    -------
+    list[int]
+        The seeds in the order given, without repeats.
+    """
+    seeds = []
+    for spec in specs:
+        first, _, last = spec.partition("-")
+        seeds.extend(range(int(first), int(last or first) + 1))
+    return list(dict.fromkeys(seeds))
+
+
+def bounding_boxes(grids: np.ndarray) -> np.ndarray:
+    """
+    Find the bounding box of the live cells of each grid of a stack.
+
+    Parameters
+    ----------
+    grids : np.ndarray
+        A stack of grids of shape (B, H, W), where cells equal to 1 are alive.
+
+    Returns
+    -------
+    np.ndarray
+        An array of shape (B, 4) of the first row, first column, last row and
+        last column of each grid's live cells, or -1 for empty grids.
+    """
+    alive = grids == 1
+    rows = alive.any(axis=2)
+    cols = alive.any(axis=1)
+    boxes = np.stack(
+        [
+            rows.argmax(axis=1),
+            cols.argmax(axis=1),
+            rows.shape[1] - 1 - rows[:, ::-1].argmax(axis=1),
+            cols.shape[1] - 1 - cols[:, ::-1].argmax(axis=1),
+        ],
+        axis=1,
+    )
+    boxes[~rows.any(axis=1)] = -1
+    return boxes
+
+
+def sweep_seeds(
+    seeds: list[int],
+    grid_size: list,
+    rule_name: str,
+    generations: int,
+    max_period: int = 64,
+    density: float = 0.5,
+) -> list[dict]:
+    """
+    Run a grid for each seed and measure how it ended up.
+
+    The grids are run together as a batch, and each grid's result depends
+    only on its seed and the other arguments, never on the other seeds run
+    alongside it.
+
+    Parameters
+    ----------
+    seeds : list[int]
+        The seeds, each filling a grid as `CellularAutomata.set_seed` does.
+    grid_size : list
+        The size of each grid.
+    rule_name : str
+        The name or B/S notation of the rule.
+    generations : int
+        The number of generations to run.
+    max_period : int, default is 64
+        The longest cycle period detected.
+    density : float, default is 0.5
+        The chance of each cell being alive when the grids are seeded.
+
+    Returns
+    -------
+    list[dict]
+        A result per seed with the keys of `FIELDS`: the final population,
+        the generation the grid settled into a still life or cycle and its
+        period, and the bounding box of the final live cells. Values which
+        were not found are None.
+    """
+    batch = BatchCellularAutomata(
+        grid_size, get_rule(rule_name), seeds, max_period, density
+    )
+    batch.run(generations)
+    boxes = bounding_boxes(batch.grids)
+
+    results = []
+    for index, seed in enumerate(seeds):
+        settled = batch.cycle_period[index] > 0
+        box = [int(value) if value >= 0 else None for value in boxes[index]]
+        results.append(
+            dict(
+                zip(
+                    FIELDS,
+                    [
+                        seed,
+                        int(batch.populations[index]),
+                        int(batch.cycle_start[index]) if settled else None,
+                        int(batch.cycle_period[index]) if settled else None,
+                        *box,
+                    ],
+                )
+            )
+        )
+    return results
+
+
+def _sweep_chunk(arguments: tuple) -> list[dict]:
+    """
+    Run `sweep_seeds` in a worker process, unpacking its arguments.
+    """
+    return sweep_seeds(*arguments)
+
+
+def read_completed_seeds(file_path: str) -> set[int]:
+    """
+    Read the seeds already in a results file, so an interrupted sweep can
+    carry on where it stopped.
+
+    A line cut off part way through by the interruption is removed from the
+    file, so its seed is run again.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the CSV or JSONL results file, which need not exist.
+
+    Returns
+    -------
+    set[int]
+        The seeds with results in the file.
+    """
+    if not os.path.isfile(file_path):
+        return set()
+
+    with open(file_path, "rb") as file:
+        content = file.read()
+    complete = content[: content.rfind(b"\n") + 1]
+    if len(complete) != len(content):
+        with open(file_path, "wb") as file:
+            file.write(complete)
+
+    lines = complete.decode().splitlines()
+    if file_path.endswith(".jsonl"):
+        return {json.loads(line)["seed"] for line in lines if line}
+    return {int(row["seed"]) for row in csv.DictReader(lines)}
+
+
+class ResultWriter:
+    """
+    A class to append sweep results to a CSV or JSONL file as they arrive.
+
+    Attributes
+    ----------
+    file_path : str
+        The path to the results file, written as JSONL if it ends in .jsonl,
+        and as CSV otherwise.
+
+    Methods
+    -------
+    write(results: list[dict])
+        Append results to the file and flush them to disk.
+    close()
+        Close the file.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        """
+        Open a results file for appending, writing a CSV header if the file
+        is new.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the results file.
+        """
+        self.file_path = file_path
+        is_new = not os.path.isfile(file_path) or os.path.getsize(file_path) == 0
+        self.file = open(file_path, "a", newline="")
+
+        self.writer = None
+        if not file_path.endswith(".jsonl"):
+            self.writer = csv.DictWriter(self.file, FIELDS)
+            if is_new:
+                self.writer.writeheader()
+
+    def write(self, results: list[dict]) -> None:
+        """
+        Append results to the file and flush them to disk.
+
+        Parameters
+        ----------
+        results : list[dict]
+            The results, with the keys of `FIELDS`.
+        """
+        if self.writer is not None:
+            self.writer.writerows(results)
+        else:
+            self.file.writelines(json.dumps(result) + "\n" for result in results)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self.file.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line parser.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+        The parser for the seed sweep's arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.sweep",
+        description="Run a grid for each of many seeds and record how each ended.",
+    )
+    parser.add_argument(
+        "--seeds",
+        nargs="+",
+        required=True,
+        help='the seeds, as single seeds or inclusive ranges such as "1-1000"',
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help=(
+            "a CSV file, or a JSONL file if it ends in .jsonl, to append results "
+            "to. Seeds already in the file are skipped, so rerunning an "
+            "interrupted sweep resumes it"
+        ),
+    )
+    parser.add_argument(
+        "--rule",
+        default="Game of Life",
+        help='a rule name, or B/S notation such as B36/S23 (default "Game of Life")',
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        nargs=2,
+        default=[64, 64],
+        metavar=("ROWS", "COLS"),
+        help="the grid size (default 64 64)",
+    )
+    parser.add_argument(
+        "-n",
+        "--generations",
+        type=int,
+        required=True,
+        help="the number of generations to run each seed for",
+    )
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=0.5,
+        help="the chance of each cell being alive when seeding (default 0.5)",
+    )
+    parser.add_argument(
+        "--max-period",
+        type=int,
+        default=64,
+        help="the longest cycle period detected (default 64)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="the number of worker processes (default one per CPU)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=256,
+        help=(
+            "the number of seeds a worker runs at once, which bounds its "
+            "memory use (default 256)"
+        ),
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the seed sweep from the command line.
+
+    Parameters
+    ----------
+    argv : list[str], optional
+        The command line arguments, defaulting to those of the process.
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error("--chunk-size and --workers must be at least 1")
+    if min(args.size) < 1:
+        parser.error("--size must be at least 1 by 1")
+    if args.generations < 0:
+        parser.error("--generations must not be negative")
+    if not 0 <= args.density <= 1:
+        parser.error("--density must be between 0 and 1")
+
+    try:
+        seeds = parse_seeds(args.seeds)
+        get_rule(args.rule)
+    except ValueError as error:
+        parser.error(str(error))
+
+    completed = read_completed_seeds(args.output)
+    seeds = [seed for seed in seeds if seed not in completed]
+    chunks = [
+        (
+            seeds[start : start + args.chunk_size],
+            args.size,
+            args.rule,
+            args.generations,
+            args.max_period,
+            args.density,
+        )
+        for start in range(0, len(seeds), args.chunk_size)
+    ]
+    print(
+        f"Running {len(seeds)} seeds, {len(completed)} already in {args.output}",
+        file=sys.stderr,
+    )
+
+    writer = ResultWriter(args.output)
+    # Workers are replaced now and then so memory cannot build up in them
+    pool = multiprocessing.Pool(args.workers, maxtasksperchild=64)
+    try:
+        for results in pool.imap_unordered(_sweep_chunk, chunks):
+            writer.write(results)
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        print("Interrupted, run the same command again to resume", file=sys.stderr)
+        return 130
+    except BaseException:
+        # Stop the other workers, so joining them cannot hide the error
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        writer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
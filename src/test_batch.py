@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+from src import rules
+from src.batch import BatchCellularAutomata
+from src.cellular_automata import CellularAutomata
+from src.engines import ParallelEngine, SparseTileEngine
+from src.packed_cellular_automata import PackedCellularAutomata
+from src.seeding import create_bit_generator, random_cells
+
+
+class TestBatch(unittest.TestCase):
+    """
+    A class used to test running many grids at once.
+
+    ...
+
+    Methods
+    -------
+    test_matches_individual_automata():
+        Tests each grid of a batch evolves like an automaton with its seed.
+
+    test_seed_zero():
+        Tests a seed of 0 fills its grid, and only None leaves it empty.
+
+    test_statistics():
+        Tests extinction and cycles are reported for each grid.
+    """
+
+    def test_matches_individual_automata(self) -> None:
+        """
+        Tests each grid of a batch evolves like an automaton with its seed,
+        dense or packed, and that dense grids stay one byte a cell.
+
+        Returns
+        -------
+        None
+        """
+        seeds = [1, 2, [3, 4], 5]
+        batch = BatchCellularAutomata([12, 17], rules.rule_30, seeds)
+        automata = [CellularAutomata([12, 17], rules.rule_30, seed) for seed in seeds]
+        packed = [
+            PackedCellularAutomata([12, 17], rules.rule_30, seed) for seed in seeds
+        ]
+        automata[1].set_engine(ParallelEngine(2, 4))
+        automata[2].set_engine(SparseTileEngine(tile_size=4))
+
+        for _ in range(10):
+            for index, ca in enumerate(automata):
+                np.testing.assert_array_equal(batch.get_grid(index), ca.grid)
+                np.testing.assert_array_equal(packed[index].grid, ca.grid)
+                self.assertEqual(batch.populations[index], ca.get_population())
+                self.assertEqual(ca.grid.dtype, np.int8)
+            batch.update_grids()
+            for ca in automata + packed:
+                ca.update_grid()
+        automata[1].set_engine(None)
+
+    def test_seed_zero(self) -> None:
+        """
+        Tests a seed of 0 fills its grid like any other seed, and only a
+        seed of None leaves its grid empty.
+
+        Returns
+        -------
+        None
+        """
+        batch = BatchCellularAutomata([12, 17], rules.game_of_life_rule, [0, None])
+        expected = random_cells(create_bit_generator(0), (12, 17))
+        self.assertGreater(batch.populations[0], 0)
+        np.testing.assert_array_equal(batch.get_grid(0), expected)
+        self.assertEqual(batch.populations[1], 0)
+
+    def test_statistics(self) -> None:
+        """
+        Tests extinction and cycles are reported for each grid, and that a
+        run stops once every grid has settled.
+
+        Returns
+        -------
+        None
+        """
+        # A lone cell, a blinker and an L tromino which becomes a block
+        grids = np.zeros((3, 8, 8), dtype=int)
+        grids[0, 2, 2] = 1
+        grids[1, 3, 2:5] = 1
+        grids[2, 2:4, 2] = 1
+        grids[2, 2, 3] = 1
+        batch = BatchCellularAutomata([8, 8], rules.game_of_life_rule, [])
+        batch.set_grids(grids)
+
+        batch.run(100, stop_when_settled=True)
+
+        statistics = batch.get_statistics()
+        self.assertEqual(batch.generation, 2)
+        self.assertEqual(list(statistics["extinct_at"]), [1, -1, -1])
+        self.assertEqual(list(statistics["cycle_start"]), [1, 0, 1])
+        self.assertEqual(list(statistics["cycle_period"]), [1, 2, 1])
+        self.assertEqual(list(statistics["population"]), [0, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from src import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    A class used to test the benchmark harness.
+
+    ...
+
+    Methods
+    -------
+    test_results_are_named_by_engine_rule_and_size():
+        Tests each stepping and state file combination gets a result.
+
+    test_compare_finds_regressions():
+        Tests only results worse than the baseline by more than the tolerance
+        are reported.
+    """
+
+    def test_results_are_named_by_engine_rule_and_size(self) -> None:
+        """
+        Tests each stepping and state file combination gets a result.
+
+        Returns
+        -------
+        None
+        """
+        results = benchmark.bench_stepping(
+            [16], ["Game of Life", "Rule 30"], ["vectorised", "packed"], 0
+        )
+        results.update(benchmark.bench_state_io([16], ["binary", "rle"], 0))
+
+        self.assertEqual(
+            sorted(results),
+            [
+                "load/binary/16",
+                "load/rle/16",
+                "save/binary/16",
+                "save/rle/16",
+                "step/packed/game_of_life/16",
+                "step/packed/rule_30/16",
+                "step/vectorised/game_of_life/16",
+                "step/vectorised/rule_30/16",
+            ],
+        )
+        self.assertTrue(all(result["value"] > 0 for result in results.values()))
+
+    def test_compare_finds_regressions(self) -> None:
+        """
+        Tests only results worse than the baseline by more than the tolerance
+        are reported, for both rates and times.
+
+        Returns
+        -------
+        None
+        """
+        baseline = {
+            "step/a": benchmark.result(100.0, "gen/s"),
+            "step/b": benchmark.result(100.0, "gen/s"),
+            "draw/a": benchmark.result(10.0, "ms", False),
+            "draw/b": benchmark.result(10.0, "ms", False),
+        }
+        results = {
+            "step/a": benchmark.result(95.0, "gen/s"),
+            "step/b": benchmark.result(50.0, "gen/s"),
+            "draw/a": benchmark.result(5.0, "ms", False),
+            "draw/b": benchmark.result(20.0, "ms", False),
+            "draw/new": benchmark.result(1.0, "ms", False),
+        }
+
+        regressions = benchmark.compare(results, baseline, tolerance=0.1)
+
+        self.assertEqual([r["name"] for r in regressions], ["step/b", "draw/b"])
+        self.assertAlmostEqual(regressions[0]["change"], -0.5)
+        self.assertAlmostEqual(regressions[1]["change"], -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,375 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pygame
+
+from src import rules
+from src.cell_grid import CellGrid
+from src.engines import UnboundedUniverse, UniverseViewport
+from src.mapped_cellular_automata import MappedCellularAutomata
+
+
+class TestCellGrid(unittest.TestCase):
+    """
+    A class used to test drawing the grid.
+
+    ...
+
+    Methods
+    -------
+    setUp():
+        Sets up a seeded grid to draw.
+
+    test_incremental_draw_matches_full_draw():
+        Tests redrawing only changed cells gives the same surface as a full draw.
+
+    test_zoomed_draw_matches_scaled_full_draw():
+        Tests drawing only the zoomed view matches scaling a full draw.
+
+    test_hover_preview_is_not_written_to_grid():
+        Tests a stamp preview is drawn over the grid without changing it.
+
+    test_surfaces_sized_by_window():
+        Tests nothing drawn is sized by a grid much larger than the window.
+
+    test_set_ca_closes_replaced_automaton():
+        Tests replacing the automaton shuts down its worker threads.
+
+    test_set_ca_shows_mapped_automaton():
+        Tests a memory-mapped automaton is shown by reading only the cells
+        in view.
+
+    test_set_ca_shows_unbounded_universe():
+        Tests an unbounded universe is shown and edited through a viewport.
+    """
+
+    def setUp(self) -> None:
+        self.cell_grid = CellGrid(rules.game_of_life_rule, (20, 30), (20, 30))
+        self.cell_grid.set_seed(7)
+
+    def assert_drawn(self, cells: np.ndarray) -> None:
+        """
+        Assert each cell of the grid surface is drawn in the colour of a cell.
+        """
+        for row, col in np.ndindex(cells.shape):
+            colour = self.cell_grid.grid_surface.get_at(
+                self.cell_grid.get_cell_rect(row, col).topleft
+            )
+            self.assertEqual(
+                colour,
+                (
+                    self.cell_grid.cell_colour
+                    if cells[row, col] == 1
+                    else self.cell_grid.empty_space_colour
+                ),
+            )
+
+    def full_draw(self) -> np.ndarray:
+        """
+        Draw the grid from scratch onto a new surface and return its pixels.
+        """
+        surface = pygame.Surface(self.cell_grid.window_size)
+        self.cell_grid.draw(surface)
+        return pygame.surfarray.array3d(surface)
+
+    def test_incremental_draw_matches_full_draw(self) -> None:
+        """
+        Tests redrawing only changed cells gives the same surface as a full draw.
+
+        Only the areas of the changed cells are reported as dirty, unless
+        more cells changed than are worth drawing one by one.
+
+        Returns
+        -------
+        None
+        """
+        self.assertEqual(
+            self.cell_grid.draw(), [self.cell_grid.grid_surface.get_rect()]
+        )
+        for generation in range(3):
+            previous = self.cell_grid.ca.grid.copy()
+            was_hovered = generation % 2 == 1
+            self.cell_grid.update()
+            # Show a preview over the top left cell every other generation
+            if was_hovered:
+                self.cell_grid.reset_hovered()
+            else:
+                self.cell_grid.set_hover(0, 0, np.array([[True]]))
+
+            dirty_rects = self.cell_grid.draw()
+            grid = self.cell_grid.ca.grid
+            changed = np.count_nonzero(previous != grid)
+            if previous[0, 0] != 1 and grid[0, 0] != 1:
+                # The preview shows or hides over a cell which stayed empty
+                changed += 1
+            self.assertEqual(len(dirty_rects), changed)
+            np.testing.assert_array_equal(
+                pygame.surfarray.array3d(self.cell_grid.grid_surface),
+                self.full_draw(),
+            )
+
+        self.assertEqual(self.cell_grid.draw(), [])
+
+        self.cell_grid.max_dirty_cells = 0
+        self.cell_grid.update()
+        self.assertEqual(
+            self.cell_grid.draw(), [self.cell_grid.grid_surface.get_rect()]
+        )
+        self.assertEqual(
+            self.cell_grid.grid_surface.get_at((0, 0)), self.cell_grid.bg_colour
+        )
+
+    def test_zoomed_draw_matches_scaled_full_draw(self) -> None:
+        """
+        Tests drawing only the zoomed view matches scaling a full draw.
+
+        The scaled view is kept until the view or a cell in it changes, and
+        screen positions map to the cells shown there.
+
+        Returns
+        -------
+        None
+        """
+        self.cell_grid.toggle_zoom()
+        for _ in range(8):
+            self.cell_grid.zoom_in()
+        self.cell_grid.pan(-1000, 1000)
+        view = self.cell_grid.zoom_area
+        self.assertEqual(view.left, 0)
+        self.assertEqual(view.bottom, self.cell_grid.get_grid_pixel_size()[1])
+
+        self.assertEqual(len(self.cell_grid.draw()), 1)
+        full = pygame.Surface(self.cell_grid.window_size)
+        self.cell_grid.draw(full)
+        expected = pygame.transform.scale(
+            full.subsurface(view), self.cell_grid.window_size
+        )
+        np.testing.assert_array_equal(
+            pygame.surfarray.array3d(self.cell_grid.visible_surface),
+            pygame.surfarray.array3d(expected),
+        )
+
+        # Cells outside the view do not cause a redraw
+        self.assertEqual(self.cell_grid.draw(), [])
+        self.cell_grid.ca.set_cell(0, 29, 1 - self.cell_grid.ca.get_cell(0, 29))
+        self.assertEqual(self.cell_grid.draw(), [])
+
+        row, col = self.cell_grid.screen_to_cell((10, 10), (10, 10))
+        self.assertEqual((row, col), (view.top // 6, view.left // 6))
+        self.cell_grid.ca.set_cell(row, col, 1 - self.cell_grid.ca.get_cell(row, col))
+        self.assertEqual(len(self.cell_grid.draw()), 1)
+
+    def test_hover_preview_is_not_written_to_grid(self) -> None:
+        """
+        Tests a stamp preview is drawn over the empty cells under it without
+        changing the automaton, and removing it redraws the cells it covered.
+
+        Returns
+        -------
+        None
+        """
+        grid = self.cell_grid.ca.grid.copy()
+        self.cell_grid.draw()
+
+        # A glider hanging off the bottom right corner of the grid
+        self.cell_grid.painter.stamp_tool(
+            (266 + 28 * 6, 50 + 18 * 6), (266, 50), "Glider", True
+        )
+        np.testing.assert_array_equal(self.cell_grid.ca.grid, grid)
+        self.assertEqual(self.cell_grid.hover_origin, (18, 28))
+
+        hovered = [(18, 28), (19, 29)]
+        dirty_rects = self.cell_grid.draw()
+        expected = [
+            self.cell_grid.get_cell_rect(row, col)
+            for row, col in hovered
+            if grid[row, col] != 1
+        ]
+        self.assertCountEqual(dirty_rects, expected)
+        for row, col in hovered:
+            colour = self.cell_grid.grid_surface.get_at(
+                self.cell_grid.get_cell_rect(row, col).topleft
+            )
+            if grid[row, col] == 1:
+                self.assertEqual(colour, self.cell_grid.cell_colour)
+            else:
+                self.assertEqual(colour, self.cell_grid.hovered_colour)
+
+        self.cell_grid.reset_hovered()
+        self.assertCountEqual(self.cell_grid.draw(), expected)
+        np.testing.assert_array_equal(
+            pygame.surfarray.array3d(self.cell_grid.grid_surface), self.full_draw()
+        )
+
+    def test_surfaces_sized_by_window(self) -> None:
+        """
+        Tests the surfaces and pixel indices are the size of the window for a
+        grid much larger than it, unzoomed, zoomed and zoomed out to its
+        density, while the zoom still covers the whole grid.
+
+        Returns
+        -------
+        None
+        """
+        cell_grid = CellGrid(rules.game_of_life_rule, (20, 30), (1200, 1500))
+        cell_grid.set_seed(7)
+        window_width, window_height = cell_grid.window_size
+        self.assertEqual(cell_grid.get_grid_pixel_size(), (9001, 7201))
+        self.assertEqual(len(cell_grid.pixel_rows), window_height)
+        self.assertEqual(len(cell_grid.pixel_cols), window_width)
+
+        self.assertEqual(cell_grid.draw(), [cell_grid.grid_surface.get_rect()])
+        self.assertEqual(cell_grid.grid_surface.get_size(), cell_grid.window_size)
+        for row, col in [(0, 0), (19, 29), (5, 17)]:
+            colour = cell_grid.grid_surface.get_at(
+                cell_grid.get_cell_rect(row, col).topleft
+            )
+            alive = cell_grid.ca.get_cell(row, col) == 1
+            self.assertEqual(
+                colour,
+                cell_grid.cell_colour if alive else cell_grid.empty_space_colour,
+            )
+
+        cell_grid.toggle_zoom()
+        for _ in range(60):
+            cell_grid.zoom_out()
+        self.assertEqual(cell_grid.zoom_area.size, cell_grid.get_grid_pixel_size())
+        cell_grid.draw()
+        for _ in range(45):
+            cell_grid.zoom_in()
+        cell_grid.draw()
+        for surface in (cell_grid.visible_surface, cell_grid.scaled_window):
+            self.assertEqual(surface.get_size(), cell_grid.window_size)
+        self.assertLessEqual(cell_grid.view_source.get_width(), window_width * 6 // 3)
+
+    def test_set_ca_closes_replaced_automaton(self) -> None:
+        """
+        Tests replacing the automaton shuts down the worker threads of the
+        one it replaces.
+
+        Returns
+        -------
+        None
+        """
+        replaced = self.cell_grid.ca
+        replaced.set_workers(2)
+        pool = replaced.engine._pool
+
+        self.cell_grid.set_ca()
+        self.assertIsNot(self.cell_grid.ca, replaced)
+        self.assertIsNone(replaced.engine)
+        self.assertTrue(pool._shutdown)
+
+    def test_set_ca_shows_mapped_automaton(self) -> None:
+        """
+        Tests a memory-mapped automaton given to the grid is shown as it is,
+        with the grid taking its size, and that drawing unzoomed and zoomed
+        only reads the cells in view from it.
+
+        Returns
+        -------
+        None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            mapped = MappedCellularAutomata.create(
+                os.path.join(directory, "grid.state"),
+                [400, 500],
+                rules.game_of_life_rule,
+                seed=3,
+            )
+            windows = []
+            get_window = mapped.get_window
+
+            def recorded_get_window(top, left, height, width):
+                windows.append((top, left, height, width))
+                return get_window(top, left, height, width)
+
+            mapped.get_window = recorded_get_window
+            self.cell_grid.set_ca(mapped)
+            self.assertIs(self.cell_grid.ca, mapped)
+            self.assertEqual(
+                (self.cell_grid.grid_height, self.cell_grid.grid_width), (400, 500)
+            )
+
+            self.cell_grid.update()
+            self.cell_grid.draw()
+            self.assertEqual(windows, [(0, 0, 20, 30)])
+            for row, col in [(0, 0), (19, 29), (7, 11)]:
+                colour = self.cell_grid.grid_surface.get_at(
+                    self.cell_grid.get_cell_rect(row, col).topleft
+                )
+                alive = get_window(row, col, 1, 1)[0, 0] == 1
+                self.assertEqual(
+                    colour,
+                    (
+                        self.cell_grid.cell_colour
+                        if alive
+                        else self.cell_grid.empty_space_colour
+                    ),
+                )
+
+            windows.clear()
+            self.cell_grid.toggle_zoom()
+            for _ in range(40):
+                self.cell_grid.zoom_in()
+            self.cell_grid.draw()
+            ((top, left, height, width),) = windows
+            self.assertLess(height * width, 400 * 500 // 100)
+
+            self.cell_grid.set_ca()
+            self.assertIsNone(mapped.cells)
+
+    def test_set_ca_shows_unbounded_universe(self) -> None:
+        """
+        Tests an unbounded universe shown through a viewport is drawn from
+        its window, that a glider leaving the window carries on outside it
+        rather than wrapping round, and that painting edits the universe.
+
+        Returns
+        -------
+        None
+        """
+        universe = UnboundedUniverse(rules.game_of_life_rule)
+        glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+        universe.from_grid(glider, 2, 2)
+        viewport = UniverseViewport(universe, (20, 30))
+        self.cell_grid.set_ca(viewport)
+        self.assertIs(self.cell_grid.ca, viewport)
+
+        self.cell_grid.draw()
+        self.assert_drawn(universe.get_window(0, 0, 20, 30))
+
+        # The glider moves a cell diagonally every 4 generations
+        for _ in range(120):
+            self.cell_grid.update()
+        self.cell_grid.draw()
+        self.assertEqual(universe.population, 5)
+        self.assertEqual(universe.bounding_box(), (32, 32, 34, 34))
+        self.assert_drawn(np.zeros((20, 30), dtype=np.uint8))
+
+        viewport.move_to(25, 20)
+        self.cell_grid.draw()
+        cells = universe.get_window(25, 20, 20, 30)
+        np.testing.assert_array_equal(cells[7:10, 12:15], glider)
+        self.assert_drawn(cells)
+
+        # Only the part of a stroke inside the window is painted
+        self.cell_grid.ca.fill_mask(-1, 0, np.ones((2, 3), dtype=bool), 1)
+        self.assertEqual(universe.population, 8)
+        self.assertEqual(universe.get_window(24, 20, 2, 3).tolist(), [[0] * 3, [1] * 3])
+
+        # A larger window zoomed out is shaded by the density of its cells
+        self.cell_grid.set_ca(UniverseViewport(universe, (400, 500), -200, -250))
+        self.assertEqual(
+            (self.cell_grid.grid_height, self.cell_grid.grid_width), (400, 500)
+        )
+        self.cell_grid.toggle_zoom()
+        self.cell_grid.zoom_out()
+        self.cell_grid.draw()
+        self.assertEqual(self.cell_grid.density_pyramid.shape, (400, 500))
+
+
+if __name__ == "__main__":
+    unittest.main()
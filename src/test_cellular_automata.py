@@ -1,4 +1,8 @@
 import unittest
+
+import numpy as np
+
+from src import rules
 from src.cellular_automata import CellularAutomata
 
 
@@ -18,6 +22,9 @@ class TestCellularAutomata(unittest.TestCase):
 
     test_create_grid():
         Tests the creation of a grid in the CellularAutomata class.
+
+    test_seeding_is_independent():
+        Tests each automaton seeds from its own generator.
     """
 
     def setUp(self) -> None:
@@ -82,6 +89,28 @@ class TestCellularAutomata(unittest.TestCase):
             ],
         )
 
+    def test_seeding_is_independent(self) -> None:
+        """
+        Tests each automaton seeds from its own generator, matching the grids
+        the global generator gave, and leaving the global generator alone.
+
+        Returns
+        -------
+        None
+        """
+        np.random.seed(5)
+        expected = np.random.randint(2, size=(40, 30))
+        state = np.random.get_state()
+
+        ca = CellularAutomata([40, 30], rules.game_of_life_rule, 5)
+        np.testing.assert_array_equal(ca.grid, expected)
+        self.assertEqual(ca.grid.dtype, np.int8)
+        np.testing.assert_array_equal(np.random.get_state()[1], state[1])
+
+        sparse = CellularAutomata([200, 200], rules.game_of_life_rule, density=0.1)
+        sparse.set_seed(5)
+        self.assertAlmostEqual(sparse.get_population() / 200**2, 0.1, delta=0.01)
+
 
 if __name__ == "__main__":
     unittest.main()
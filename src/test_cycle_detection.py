@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from src import rules
+from src.cellular_automata import CellularAutomata
+from src.packed_cellular_automata import PackedCellularAutomata
+
+
+class TestCycleDetection(unittest.TestCase):
+    """
+    A class used to test detecting still lifes and cycles.
+
+    ...
+
+    Methods
+    -------
+    test_detects_period_and_start():
+        Tests a blinker reached after a few generations is reported with its
+        period and first generation.
+
+    test_edits_restart_detection():
+        Tests editing a cell forgets generations checked before the edit.
+    """
+
+    def test_detects_period_and_start(self) -> None:
+        """
+        Tests a blinker reached after a few generations is reported with its
+        period and first generation, and a block as a still life.
+
+        Returns
+        -------
+        None
+        """
+        # An L tromino becomes a block at generation 1
+        for ca_class in (CellularAutomata, PackedCellularAutomata):
+            ca = ca_class([10, 70], rules.game_of_life_rule)
+            ca.set_cell(4, 4, 1)
+            ca.set_cell(4, 5, 1)
+            ca.set_cell(5, 4, 1)
+            ca.enable_cycle_detection()
+            for _ in range(3):
+                ca.update_grid()
+            self.assertEqual(ca.cycle, (1, 1))
+
+        # Three cells in a row becoming a blinker two generations on
+        ca = CellularAutomata([12, 12], rules.game_of_life_rule)
+        ca.grid[5, 4:7] = 1
+        ca.enable_cycle_detection()
+        ca.update_grid()
+        self.assertIsNone(ca.cycle)
+        ca.update_grid()
+        self.assertEqual(ca.cycle, (0, 2))
+
+    def test_edits_restart_detection(self) -> None:
+        """
+        Tests editing a cell forgets generations checked before the edit,
+        while marking a dead cell as hovered does not.
+
+        Returns
+        -------
+        None
+        """
+        ca = CellularAutomata([12, 12], rules.game_of_life_rule)
+        ca.grid[5, 4:7] = 1
+        ca.enable_cycle_detection()
+        ca.update_grid()
+        ca.set_cell(0, 0, -1)
+        ca.update_grid()
+        self.assertEqual(ca.cycle, (0, 2))
+
+        # The lone cell dies, after which the blinker repeats from generation 3
+        ca.set_cell(0, 0, 1)
+        self.assertIsNone(ca.cycle)
+        for _ in range(2):
+            ca.update_grid()
+            self.assertIsNone(ca.cycle)
+        ca.update_grid()
+        self.assertEqual(ca.cycle, (3, 2))
+        self.assertEqual(int(np.count_nonzero(ca.grid == 1)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
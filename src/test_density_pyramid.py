@@ -0,0 +1,152 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src import rules
+from src.cellular_automata import CellularAutomata
+from src.density_pyramid import DensityPyramid
+from src.engines import ParallelEngine, SparseTileEngine
+from src.mapped_cellular_automata import MappedCellularAutomata
+from src.packed_cellular_automata import PackedCellularAutomata
+
+
+class TestDensityPyramid(unittest.TestCase):
+    """
+    A class used to test counting live cells at several resolutions.
+
+    ...
+
+    Methods
+    -------
+    test_update_matches_build():
+        Tests updating only changed tiles gives the same counts as building
+        the pyramid from scratch.
+
+    test_get_level():
+        Tests the level chosen has blocks at least a pixel across.
+
+    test_update_tiles_from_automaton():
+        Tests the tiles each kind of automaton records as changed keep the
+        pyramid up to date without comparing the whole grid.
+    """
+
+    def test_update_matches_build(self) -> None:
+        """
+        Tests updating only changed tiles gives the same counts as building
+        the pyramid from scratch, on a grid not a whole number of tiles.
+
+        Returns
+        -------
+        None
+        """
+        rng = np.random.default_rng(5)
+        cells = rng.integers(0, 2, size=(100, 70)).astype(np.int8)
+        pyramid = DensityPyramid(tile_size=16)
+        pyramid.update(cells)
+        self.assertEqual(pyramid.levels[-1].item(), np.count_nonzero(cells))
+        self.assertEqual(pyramid.areas[-1].item(), cells.size)
+        self.assertFalse(pyramid.update(cells.copy()))
+
+        # Few changes update single tiles, and many update whole levels
+        for changes in (1, 3, 40):
+            rows = rng.integers(0, 100, size=changes)
+            cols = rng.integers(0, 70, size=changes)
+            cells[rows, cols] = 1 - cells[rows, cols]
+            cells[5, 5] = -1
+            self.assertTrue(pyramid.update(cells))
+
+            expected = DensityPyramid(tile_size=16)
+            expected.build(cells)
+            for level, counts in enumerate(expected.levels):
+                np.testing.assert_array_equal(pyramid.levels[level], counts)
+        self.assertEqual(pyramid.get_blocks(3), (13, 9))
+
+    def test_get_level(self) -> None:
+        """
+        Tests the level chosen has blocks at least a pixel across, and no
+        higher than the top of the pyramid.
+
+        Returns
+        -------
+        None
+        """
+        pyramid = DensityPyramid()
+        pyramid.build(np.zeros((1000, 1000)))
+        self.assertEqual(pyramid.get_level(0.5), 0)
+        self.assertEqual(pyramid.get_level(1), 0)
+        self.assertEqual(pyramid.get_level(1.5), 1)
+        self.assertEqual(pyramid.get_level(8), 3)
+        self.assertEqual(pyramid.get_level(10), 4)
+        self.assertEqual(pyramid.get_level(10**6), len(pyramid.levels) - 1)
+
+    def test_update_tiles_from_automaton(self) -> None:
+        """
+        Tests the tiles each kind of automaton records as changed, by
+        stepping and editing, cover every cell which changed and keep the
+        pyramid up to date, and that nothing is known after the grid is
+        replaced.
+
+        Returns
+        -------
+        None
+        """
+        # Two gliders and a blinker on a grid not a whole number of tiles
+        grid = np.zeros((300, 140), dtype=np.int8)
+        grid[10:13, 10:13] = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        grid[200:203, 100:103] = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        grid[150, 60:63] = 1
+
+        with tempfile.TemporaryDirectory() as directory:
+            mapped = MappedCellularAutomata.create(
+                os.path.join(directory, "grid.state"),
+                list(grid.shape),
+                rules.game_of_life_rule,
+                band_rows=100,
+            )
+            automata = [
+                CellularAutomata(list(grid.shape), rules.game_of_life_rule),
+                PackedCellularAutomata(list(grid.shape), rules.game_of_life_rule),
+                mapped,
+            ]
+            for engine in (SparseTileEngine(tile_size=32), ParallelEngine(2, 16)):
+                ca = CellularAutomata(list(grid.shape), rules.game_of_life_rule)
+                ca.set_engine(engine)
+                automata.append(ca)
+
+            for ca in automata:
+                ca.grid = grid.copy()
+                ca.enable_change_tracking(16)
+                self.assertIsNone(ca.take_changed_tiles())
+                pyramid = DensityPyramid(tile_size=16)
+                pyramid.update(np.asarray(ca.get_window(0, 0, *grid.shape)))
+
+                for _ in range(5):
+                    before = ca.get_grid().copy()
+                    ca.update_grid()
+                    ca.set_cell(290, 130, 1 - ca.get_cell(290, 130))
+                    after = ca.get_grid()
+
+                    tiles = ca.take_changed_tiles()
+                    differs = np.zeros((304, 144), dtype=bool)
+                    differs[:300, :140] = before != after
+                    expected = differs.reshape(19, 16, 9, 16).any(axis=(1, 3))
+                    self.assertFalse((expected & ~tiles).any())
+                    self.assertLess(np.count_nonzero(tiles), 30)
+
+                    self.assertTrue(pyramid.update_tiles(tiles, ca.get_window))
+                    built = DensityPyramid(tile_size=16)
+                    built.build(after)
+                    for level, counts in enumerate(built.levels):
+                        np.testing.assert_array_equal(pyramid.levels[level], counts)
+
+                ca.grid = grid.copy()
+                ca.update_grid()
+                self.assertIsNone(ca.take_changed_tiles())
+                ca.set_engine(None)
+            mapped.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
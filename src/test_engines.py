@@ -0,0 +1,475 @@
+import gc
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src import rules
+from src.cellular_automata import CellularAutomata
+from src.engines import (
+    HashLifeUniverse,
+    ParallelEngine,
+    SparseTileEngine,
+    UnboundedUniverse,
+)
+from src.mapped_cellular_automata import MappedCellularAutomata
+from src.packed_cellular_automata import PackedCellularAutomata
+from src.pattern_library import PatternLibrary
+
+
+def step_per_cell(grid: np.ndarray, rule) -> np.ndarray:
+    """
+    Step a grid by calling the rule function for every cell.
+    """
+    new_grid = np.zeros(grid.shape, dtype=int)
+    for i in range(grid.shape[0]):
+        for j in range(grid.shape[1]):
+            new_grid[i, j] = rule(grid, i, j)
+    return new_grid
+
+
+class TestEngines(unittest.TestCase):
+    """
+    A class used to test the stepping engines against the per-cell rules.
+
+    ...
+
+    Methods
+    -------
+    setUp():
+        Sets up the grids the engines are tested on.
+
+    test_vectorised_matches_per_cell():
+        Tests the vectorised engine gives the same grids as the rule functions.
+
+    test_custom_rule_falls_back_to_per_cell():
+        Tests a rule without a lookup table is applied cell by cell.
+
+    test_packed_matches_vectorised():
+        Tests the bit-packed engine gives the same grids as the vectorised engine.
+
+    test_packed_cell_access():
+        Tests single cells are read and written on a bit-packed grid.
+
+    test_mapped_matches_vectorised():
+        Tests stepping a memory-mapped file gives the same grids as in memory.
+
+    test_parallel_matches_vectorised():
+        Tests stepping in parallel row bands gives the same grids as one thread.
+
+    test_parallel_releases_threads():
+        Tests the worker threads are shut down when the engine is closed or
+        dropped.
+
+    test_hashlife_matches_vectorised():
+        Tests HashLife gives the same grids as the vectorised engine.
+
+    test_hashlife_far_future():
+        Tests HashLife advances a glider a million generations within its cache cap.
+
+    test_hashlife_cache_cap_within_step():
+        Tests the cache stays within its cap during a single large step.
+
+    test_hashlife_loads_stamp_shapes():
+        Tests HashLife stamps the bundled shapes from their RLE files.
+
+    test_sparse_matches_vectorised():
+        Tests stepping only active tiles gives the same grids as the whole grid.
+
+    test_sparse_tracks_active_tiles():
+        Tests only the tiles around an oscillator stay active.
+
+    test_unbounded_matches_hashlife():
+        Tests the unbounded engine lets gliders escape as HashLife does.
+    """
+
+    def setUp(self) -> None:
+        self.rules = [
+            rules.game_of_life_rule,
+            rules.rule_30,
+            rules.rule_90,
+            rules.rule_110,
+            rules.rule_184,
+        ]
+        rng = np.random.RandomState(5400)
+        self.grids = [
+            rng.randint(2, size=shape) for shape in [(12, 12), (7, 13), (2, 3), (1, 1)]
+        ]
+
+    def test_vectorised_matches_per_cell(self) -> None:
+        """
+        Tests the vectorised engine gives the same grids as the rule functions.
+
+        Each rule is run for several generations on square, rectangular and
+        tiny toroidal grids, where neighbours wrap onto the same cells.
+
+        Returns
+        -------
+        None
+        """
+        for rule in self.rules:
+            for grid in self.grids:
+                ca = CellularAutomata(grid.shape, rule)
+                ca.grid = grid.copy()
+                expected = grid.copy()
+                for _ in range(4):
+                    ca.update_grid()
+                    expected = step_per_cell(expected, rule)
+                    self.assertListEqual(ca.grid.tolist(), expected.tolist())
+
+    def test_custom_rule_falls_back_to_per_cell(self) -> None:
+        """
+        Tests a rule without a lookup table is applied cell by cell.
+
+        Returns
+        -------
+        None
+        """
+
+        def invert_rule(grid, i, j):
+            return 1 - grid[i][j]
+
+        ca = CellularAutomata((7, 13), invert_rule)
+        ca.grid = self.grids[1].copy()
+        ca.update_grid()
+        self.assertListEqual(ca.grid.tolist(), (1 - self.grids[1]).tolist())
+
+    def test_packed_matches_vectorised(self) -> None:
+        """
+        Tests the bit-packed engine gives the same grids as the vectorised engine.
+
+        Widths either side of the 64 cell word size are used so wrapping
+        across partially filled words is covered.
+
+        Returns
+        -------
+        None
+        """
+        rng = np.random.RandomState(64)
+        for rule in self.rules:
+            for shape in [(5, 1), (9, 63), (6, 64), (7, 65), (4, 130)]:
+                grid = rng.randint(2, size=shape)
+                ca = CellularAutomata(shape, rule)
+                ca.grid = grid.copy()
+                packed = PackedCellularAutomata(shape, rule)
+                packed.grid = grid
+                for _ in range(6):
+                    ca.update_grid()
+                    packed.update_grid()
+                    self.assertListEqual(packed.get_grid().tolist(), ca.grid.tolist())
+
+    def test_packed_cell_access(self) -> None:
+        """
+        Tests single cells are read and written on a bit-packed grid.
+
+        Returns
+        -------
+        None
+        """
+        packed = PackedCellularAutomata((3, 100), rules.game_of_life_rule)
+        packed.set_cell(1, 70, 1)
+        packed.set_cell(2, 63, 1)
+        packed.set_cell(2, 63, 0)
+        self.assertEqual(packed.get_cell(1, 70), 1)
+        self.assertEqual(packed.get_cell(2, 63), 0)
+        self.assertEqual(packed.get_grid().sum(), 1)
+        self.assertEqual(packed.words.nbytes, 3 * 2 * 8)
+        self.assertListEqual(
+            packed.get_window(1, 68, 2, 4).tolist(), [[0, 0, 1, 0], [0, 0, 0, 0]]
+        )
+
+    def test_mapped_matches_vectorised(self) -> None:
+        """
+        Tests stepping a memory-mapped file gives the same grids as in memory.
+
+        Bands of a few rows are used so cells wrap across band edges, and the
+        file is reopened to check the state was written to it.
+
+        Returns
+        -------
+        None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "mapped.state")
+            for rule in self.rules:
+                for shape in [(1, 5), (7, 13), (17, 30)]:
+                    mapped = MappedCellularAutomata.create(
+                        path, list(shape), rule, seed=11, band_rows=3
+                    )
+                    ca = CellularAutomata(list(shape), rule, seed=11)
+                    self.assertListEqual(mapped.get_grid().tolist(), ca.grid.tolist())
+                    for _ in range(5):
+                        mapped.update_grid()
+                        ca.update_grid()
+                        self.assertListEqual(
+                            mapped.get_grid().tolist(), ca.grid.tolist()
+                        )
+                    mapped.set_cell(0, 3, 1)
+                    ca.set_cell(0, 3, 1)
+                    self.assertListEqual(
+                        mapped.get_window(0, 2, 4, 3).tolist(),
+                        ca.get_window(0, 2, 4, 3).tolist(),
+                    )
+                    mapped.close()
+
+                    reopened = MappedCellularAutomata(path)
+                    self.assertEqual(reopened.rule.notation, rule.notation)
+                    self.assertListEqual(reopened.get_grid().tolist(), ca.grid.tolist())
+                    reopened.close()
+
+    def test_parallel_matches_vectorised(self) -> None:
+        """
+        Tests stepping in parallel row bands gives the same grids as one thread.
+
+        Bands of a few rows are used so cells wrap across band edges and
+        across the top and bottom of the torus.
+
+        Returns
+        -------
+        None
+        """
+        rng = np.random.RandomState(4)
+        grid = rng.randint(2, size=(23, 17))
+        for rule in self.rules:
+            ca = CellularAutomata(grid.shape, rule)
+            ca.grid = grid.copy()
+            parallel = CellularAutomata(grid.shape, rule, workers=4)
+            parallel.engine.min_band_rows = 3
+            parallel.grid = grid.copy()
+            for _ in range(6):
+                ca.update_grid()
+                parallel.update_grid()
+                self.assertListEqual(parallel.grid.tolist(), ca.grid.tolist())
+            parallel.set_workers(1)
+            self.assertIsNone(parallel.engine)
+
+        engine = ParallelEngine(2)
+        first = engine.step(grid, rules.game_of_life_rule.table)
+        second = engine.step(first, rules.game_of_life_rule.table)
+        self.assertIsNot(first, second)
+        self.assertIs(engine.step(second, rules.game_of_life_rule.table), first)
+        engine.close()
+
+    def test_parallel_releases_threads(self) -> None:
+        """
+        Tests the worker threads are shut down when the automaton is closed,
+        when its engine is replaced, and when an engine is dropped without
+        being closed.
+
+        Returns
+        -------
+        None
+        """
+        grid = np.random.RandomState(5).randint(2, size=(16, 16))
+        ca = CellularAutomata(grid.shape, rules.game_of_life_rule, workers=2)
+        ca.engine.min_band_rows = 4
+        ca.update_grid()
+        pool = ca.engine._pool
+        ca.close()
+        self.assertTrue(pool._shutdown)
+        self.assertIsNone(ca.engine)
+
+        ca.set_workers(2)
+        pool = ca.engine._pool
+        ca.set_engine(SparseTileEngine())
+        self.assertTrue(pool._shutdown)
+
+        engine = ParallelEngine(2, 4)
+        engine.step(grid, rules.game_of_life_rule.table)
+        pool = engine._pool
+        del engine
+        gc.collect()
+        self.assertTrue(pool._shutdown)
+
+    def test_hashlife_matches_vectorised(self) -> None:
+        """
+        Tests HashLife gives the same grids as the vectorised engine.
+
+        The pattern starts in the middle of a grid large enough that it never
+        reaches the edges, so the torus and the infinite plane agree.
+
+        Returns
+        -------
+        None
+        """
+        rng = np.random.RandomState(3)
+        for rule in self.rules:
+            grid = np.zeros((96, 96), dtype=int)
+            grid[40:56, 40:56] = rng.randint(2, size=(16, 16))
+            ca = CellularAutomata(grid.shape, rule)
+            ca.grid = grid.copy()
+            universe = HashLifeUniverse(rule)
+            universe.from_grid(grid)
+
+            for generations in (1, 2, 3, 7, 10):
+                for _ in range(generations):
+                    ca.update_grid()
+                universe.advance(generations)
+                exported = CellularAutomata(grid.shape, rule)
+                universe.to_cellular_automata(exported)
+                self.assertListEqual(exported.grid.tolist(), ca.grid.tolist())
+
+    def test_hashlife_far_future(self) -> None:
+        """
+        Tests HashLife advances a glider a million generations within its cache cap.
+
+        Returns
+        -------
+        None
+        """
+        universe = HashLifeUniverse(rules.game_of_life_rule, max_cache_entries=500)
+        universe.stamp([[1, 0, 0], [0, 1, 1], [1, 1, 0]], 0, 0)
+        universe.advance(1_000_000)
+
+        # A glider moves one cell diagonally every four generations
+        shift = 1_000_000 // 4
+        self.assertEqual(universe.generation, 1_000_000)
+        self.assertEqual(universe.population, 5)
+        self.assertListEqual(
+            universe.to_grid(shift, shift, 3, 3).tolist(),
+            [[1, 0, 0], [0, 1, 1], [1, 1, 0]],
+        )
+        self.assertLessEqual(universe.cache_size, 500)
+
+    def test_hashlife_cache_cap_within_step(self) -> None:
+        """
+        Tests the cache stays within its cap throughout a single step of 256
+        generations of a soup, which needs more entries than the cap, and
+        that trimming the cache part way through does not change the result.
+
+        Returns
+        -------
+        None
+        """
+        grid = np.random.RandomState(1).randint(2, size=(16, 16))
+        expected = HashLifeUniverse(rules.game_of_life_rule)
+        expected.from_grid(grid)
+        expected.advance(256)
+        self.assertGreater(expected.cache_size, 1000)
+
+        universe = HashLifeUniverse(rules.game_of_life_rule, max_cache_entries=1000)
+        universe.from_grid(grid)
+        peak = 0
+        join = universe._join
+
+        def measured_join(*children):
+            nonlocal peak
+            node = join(*children)
+            peak = max(peak, universe.cache_size)
+            return node
+
+        universe._join = measured_join
+        universe.advance(256)
+
+        self.assertLessEqual(peak, 1000)
+        self.assertEqual(universe.population, expected.population)
+        np.testing.assert_array_equal(
+            universe.to_grid(-200, -200, 432, 432),
+            expected.to_grid(-200, -200, 432, 432),
+        )
+
+    def test_hashlife_loads_stamp_shapes(self) -> None:
+        """
+        Tests HashLife stamps the bundled shapes from their RLE files, placing
+        the same cells as the pattern library reads.
+
+        Returns
+        -------
+        None
+        """
+        library = PatternLibrary()
+        for name in ("Glider", "Glider Gun"):
+            cells = library.get(name)
+            universe = HashLifeUniverse(rules.game_of_life_rule)
+            universe.load_shape_file(
+                os.path.join(library.directory, library.get_metadata(name)["file"]),
+                10,
+                20,
+            )
+            self.assertEqual(universe.population, np.count_nonzero(cells))
+            np.testing.assert_array_equal(universe.to_grid(10, 20, *cells.shape), cells)
+
+    def test_sparse_matches_vectorised(self) -> None:
+        """
+        Tests stepping only active tiles gives the same grids as the whole grid.
+
+        The grid is not a multiple of the tile size, and cells are edited
+        between steps through set_cell.
+
+        Returns
+        -------
+        None
+        """
+        rng = np.random.RandomState(6)
+        for rule in self.rules:
+            grid = np.zeros((45, 38), dtype=int)
+            grid[30:42, 25:37] = rng.randint(2, size=(12, 12))
+            ca = CellularAutomata(grid.shape, rule)
+            ca.grid = grid.copy()
+            sparse = CellularAutomata(grid.shape, rule)
+            sparse.set_engine(SparseTileEngine(tile_size=8))
+            sparse.grid = grid.copy()
+            for generation in range(12):
+                if generation == 6:
+                    for automaton in (ca, sparse):
+                        automaton.set_cell(2, 3, 1)
+                        automaton.set_cell(2, 4, 1)
+                        automaton.set_cell(2, 5, 1)
+                ca.update_grid()
+                sparse.update_grid()
+                self.assertListEqual(sparse.grid.tolist(), ca.grid.tolist())
+
+    def test_sparse_tracks_active_tiles(self) -> None:
+        """
+        Tests only the tiles around an oscillator stay active.
+
+        Returns
+        -------
+        None
+        """
+        ca = CellularAutomata((256, 256), rules.game_of_life_rule)
+        ca.set_engine(SparseTileEngine(tile_size=32))
+        ca.grid[100, 100:103] = 1
+        ca.update_grid()
+        ca.update_grid()
+
+        self.assertEqual(ca.grid[99:102, 101].tolist(), [0, 1, 0])
+        self.assertEqual(ca.grid[100, 100:103].tolist(), [1, 1, 1])
+        self.assertEqual(int(ca.engine.changed_tiles.sum()), 1)
+        self.assertEqual(int(ca.active_tiles.sum()), 9)
+
+    def test_unbounded_matches_hashlife(self) -> None:
+        """
+        Tests the unbounded engine lets gliders escape as HashLife does.
+
+        A glider is run long enough that it would have wrapped round the
+        default 150x150 grid.
+
+        Returns
+        -------
+        None
+        """
+        glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+
+        universe = UnboundedUniverse(rules.game_of_life_rule)
+        universe.from_grid(glider, top=-4, left=-4)
+        hashlife = HashLifeUniverse(rules.game_of_life_rule)
+        hashlife.from_grid(glider, top=-4, left=-4)
+
+        universe.advance(600)
+        hashlife.advance(600)
+
+        top, left, bottom, right = universe.bounding_box()
+        self.assertGreater(top, 140)
+        self.assertGreater(left, 140)
+        self.assertEqual(universe.population, 5)
+        self.assertEqual(hashlife.population, 5)
+        self.assertListEqual(
+            universe.get_window(top, left, bottom - top + 1, right - left + 1).tolist(),
+            hashlife.get_window(top, left, bottom - top + 1, right - left + 1).tolist(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
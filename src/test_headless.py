@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src import headless
+
+
+class TestHeadless(unittest.TestCase):
+    """
+    A class used to test the headless command line runner.
+
+    ...
+
+    Methods
+    -------
+    test_does_not_import_pygame():
+        Tests the runner can be imported without pygame.
+
+    test_run_from_state_file():
+        Tests a state file is run and reported on at the chosen interval.
+
+    test_seed_zero_and_conflicting_options():
+        Tests a seed of 0 fills the grid and ignored options are rejected.
+    """
+
+    def test_does_not_import_pygame(self) -> None:
+        """
+        Tests the runner can be imported without pygame.
+
+        Returns
+        -------
+        None
+        """
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, src.headless; print('pygame' in sys.modules)",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_run_from_state_file(self) -> None:
+        """
+        Tests a state file is run and reported on at the chosen interval.
+
+        A blinker keeps its population of three, and a snapshot is saved at
+        each report.
+
+        Returns
+        -------
+        None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            state_path = os.path.join(directory, "blinker.state")
+            with open(state_path, "w") as file:
+                file.write("Seed:None\n00000\n00000\n01110\n00000\n00000\n")
+
+            snapshot_dir = os.path.join(directory, "snapshots")
+            stats_path = os.path.join(directory, "stats.csv")
+            headless.main(
+                [
+                    "--state",
+                    state_path,
+                    "--rule",
+                    "B3/S23",
+                    "-n",
+                    "5",
+                    "--interval",
+                    "2",
+                    "--stats",
+                    stats_path,
+                    "--snapshots",
+                    snapshot_dir,
+                    "--format",
+                    "text",
+                ]
+            )
+
+            with open(stats_path) as file:
+                rows = [line.split(",") for line in file.read().splitlines()]
+            self.assertEqual([row[0] for row in rows[1:]], ["0", "2", "4", "5"])
+            self.assertEqual({row[1] for row in rows[1:]}, {"3"})
+            self.assertEqual(len(os.listdir(snapshot_dir)), 4)
+
+            with open(os.path.join(snapshot_dir, "generation_00000005.state")) as file:
+                self.assertEqual(
+                    file.read().splitlines()[1:4], ["00000", "00100", "00100"]
+                )
+
+    def test_seed_zero_and_conflicting_options(self) -> None:
+        """
+        Tests a seed of 0 fills the grid rather than leaving it empty, and
+        that asking for worker threads with a packed or mapped grid is
+        rejected instead of running on one thread.
+
+        Returns
+        -------
+        None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            stats_path = os.path.join(directory, "stats.csv")
+            headless.main(
+                ["--seed", "0", "-n", "3", "--size", "20", "20", "--stats", stats_path]
+            )
+            with open(stats_path) as file:
+                rows = [line.split(",") for line in file.read().splitlines()]
+            self.assertTrue(all(int(row[1]) > 0 for row in rows[1:]))
+
+        for storage in ("--packed", "--mapped"):
+            with self.assertRaises(SystemExit):
+                headless.main(["--seed", "1", "-n", "1", "--workers", "2", storage])
+
+
+if __name__ == "__main__":
+    unittest.main()
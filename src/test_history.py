@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from src import rules
+from src.cellular_automata import CellularAutomata
+from src.history import GenerationHistory
+
+
+class TestHistory(unittest.TestCase):
+    """
+    A class used to test rewinding generations from the history.
+
+    ...
+
+    Methods
+    -------
+    test_rewind_matches_simulation():
+        Tests rewound generations match those originally simulated.
+
+    test_memory_budget_forgets_oldest():
+        Tests the history stays within its budget by forgetting old generations.
+    """
+
+    def test_rewind_matches_simulation(self) -> None:
+        """
+        Tests rewound generations match those originally simulated.
+
+        A cell is edited part way through, and generations are reached both
+        from keyframes and from the newest generation.
+
+        Returns
+        -------
+        None
+        """
+        ca = CellularAutomata([30, 45], rules.game_of_life_rule, seed=3)
+        ca.enable_history(keyframe_interval=8)
+        grids = [ca.grid.copy()]
+        for generation in range(60):
+            if generation == 25:
+                ca.set_cell(3, 3, 1)
+                grids[-1] = ca.grid.copy()
+            ca.update_grid()
+            grids.append(ca.grid.copy())
+
+        self.assertTrue(ca.step_back())
+        self.assertEqual(ca.generation, 59)
+        self.assertListEqual(ca.grid.tolist(), grids[59].tolist())
+
+        for generation in [50, 26, 25, 3, 0]:
+            ca.jump_to_generation(generation)
+            self.assertEqual(ca.generation, generation)
+            self.assertListEqual(ca.grid.tolist(), grids[generation].tolist())
+        self.assertFalse(ca.step_back())
+
+        ca.jump_to_generation(20)
+        self.assertListEqual(ca.grid.tolist(), grids[20].tolist())
+
+    def test_memory_budget_forgets_oldest(self) -> None:
+        """
+        Tests the history stays within its budget by forgetting old generations.
+
+        Returns
+        -------
+        None
+        """
+        history = GenerationHistory(memory_budget=2000, keyframe_interval=4)
+        rng = np.random.RandomState(0)
+        grids = [rng.randint(2, size=(40, 40)) for _ in range(30)]
+        for generation, grid in enumerate(grids):
+            history.record(grid, generation)
+
+        self.assertLessEqual(history.nbytes, 2000)
+        self.assertGreater(history.oldest, 0)
+        self.assertEqual(history.newest, 29)
+        self.assertListEqual(
+            history.rewind(history.oldest).tolist(), grids[history.oldest].tolist()
+        )
+        with self.assertRaises(ValueError):
+            history.rewind(history.oldest - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src import rules
+from src.cellular_automata import CellularAutomata
+from src.engines import SparseTileEngine
+from src.mapped_cellular_automata import MappedCellularAutomata
+from src.metrics import FrameMetrics
+from src.packed_cellular_automata import PackedCellularAutomata
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    A class used to test recording frame metrics.
+
+    ...
+
+    Methods
+    -------
+    test_rolling_window_export():
+        Tests only the most recent frames are kept and exported in order.
+
+    test_births_and_deaths():
+        Tests the cells born and died each generation are counted.
+    """
+
+    def test_rolling_window_export(self) -> None:
+        """
+        Tests only the most recent frames are kept and exported in order.
+
+        Returns
+        -------
+        None
+        """
+        metrics = FrameMetrics(capacity=4)
+        for frame in range(6):
+            metrics.record(population=frame * 10, births=frame)
+
+        self.assertEqual(list(metrics.column("population")), [20, 30, 40, 50])
+        self.assertEqual(metrics.latest()["births"], 5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.csv")
+            metrics.save_csv(path)
+            with open(path, newline="") as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual([row["frame"] for row in rows], ["2", "3", "4", "5"])
+        self.assertEqual(rows[-1]["population"], "50")
+
+    def test_births_and_deaths(self) -> None:
+        """
+        Tests the cells born and died each generation are counted, and add up
+        to the change in population, for dense and packed grids.
+
+        Returns
+        -------
+        None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            mapped = MappedCellularAutomata.create(
+                os.path.join(directory, "grid.state"),
+                [30, 70],
+                rules.game_of_life_rule,
+                seed=4,
+                band_rows=8,
+            )
+            for ca in (
+                CellularAutomata([30, 70], rules.game_of_life_rule, seed=4),
+                PackedCellularAutomata([30, 70], rules.game_of_life_rule, seed=4),
+                mapped,
+            ):
+                ca.enable_change_counts()
+                for _ in range(5):
+                    before = ca.get_grid().copy()
+                    ca.update_grid()
+                    after = ca.get_grid()
+                    self.assertGreater(ca.births, 0)
+                    self.assertEqual(
+                        (ca.births, ca.deaths),
+                        (
+                            np.count_nonzero(after > before),
+                            np.count_nonzero(before > after),
+                        ),
+                    )
+            mapped.close()
+
+        # A blinker turns two cells on and two off every generation, which
+        # the sparse engine counts as it steps its tiles in place
+        for engine in (None, SparseTileEngine(tile_size=8)):
+            ca = CellularAutomata([64, 64], rules.game_of_life_rule)
+            ca.set_engine(engine)
+            ca.grid[3, 2:5] = 1
+            ca.enable_change_counts()
+            for _ in range(3):
+                ca.update_grid()
+                self.assertEqual((ca.births, ca.deaths), (2, 2))
+
+        # A second blinker would double the counts if they were still counted
+        ca.disable_change_counts()
+        ca.fill_mask(20, 20, np.ones((1, 3), dtype=bool), 1)
+        ca.update_grid()
+        self.assertEqual((ca.births, ca.deaths), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src import rules
+from src.cellular_automata import CellularAutomata
+from src.engines import SparseTileEngine
+from src.mapped_cellular_automata import MappedCellularAutomata
+from src.packed_cellular_automata import PackedCellularAutomata
+from src.painter import capsule_mask
+
+
+class TestPainter(unittest.TestCase):
+    """
+    A class used to test painting brush strokes.
+
+    ...
+
+    Methods
+    -------
+    test_capsule_mask():
+        Tests a stroke covers the cells near the line between its ends.
+
+    test_fill_mask_clips_to_grid():
+        Tests filling a mask overlapping the edge of the grid sets the same
+        cells in every kind of automaton.
+    """
+
+    def test_capsule_mask(self) -> None:
+        """
+        Tests a stroke covers the cells near the line between its ends, and
+        a stroke without length is a disc.
+
+        Returns
+        -------
+        None
+        """
+        top, left, mask = capsule_mask((2, 3), (2, 3), 0.5)
+        self.assertEqual((top, left), (2, 3))
+        np.testing.assert_array_equal(mask, [[True]])
+
+        top, left, mask = capsule_mask((2, 3), (2, 3), 1)
+        self.assertEqual((top, left), (1, 2))
+        np.testing.assert_array_equal(
+            mask, [[False, True, False], [True, True, True], [False, True, False]]
+        )
+
+        # A diagonal line one cell wide is a staircase of single cells
+        top, left, mask = capsule_mask((4, 0), (0, 4), 0.5)
+        self.assertEqual((top, left), (0, 0))
+        np.testing.assert_array_equal(mask, np.eye(5, dtype=bool)[::-1])
+
+        top, left, mask = capsule_mask((0, 0), (0, 10), 1)
+        self.assertEqual(mask.shape, (3, 13))
+        self.assertTrue(mask[:, 1:-1].all())
+        self.assertFalse(mask[[0, 0, 2, 2], [0, -1, 0, -1]].any())
+
+    def test_fill_mask_clips_to_grid(self) -> None:
+        """
+        Tests filling a mask overlapping the edge of the grid sets the same
+        cells in every kind of automaton, and marks them changed for engines
+        which only step changed tiles.
+
+        Returns
+        -------
+        None
+        """
+        top, left, mask = capsule_mask((1, 68), (8, 75), 2)
+        canvas = np.zeros((20, 80), dtype=np.uint8)
+        canvas[top + 5 : top + 5 + mask.shape[0], left : left + mask.shape[1]] = mask
+        expected = canvas[5:15, :70]
+
+        with tempfile.TemporaryDirectory() as directory:
+            automata = [
+                CellularAutomata([10, 70], rules.game_of_life_rule),
+                PackedCellularAutomata([10, 70], rules.game_of_life_rule),
+                MappedCellularAutomata.create(
+                    os.path.join(directory, "grid.state"),
+                    [10, 70],
+                    rules.game_of_life_rule,
+                ),
+            ]
+            for ca in automata:
+                ca.fill_mask(top, left, mask, 1)
+                np.testing.assert_array_equal(ca.get_window(0, 0, 10, 70), expected)
+                ca.fill_mask(top, left, mask, 0)
+                self.assertEqual(ca.get_population(), 0)
+            automata[2].close()
+
+        ca = CellularAutomata([64, 64], rules.game_of_life_rule)
+        ca.set_engine(SparseTileEngine(tile_size=16))
+        ca.update_grid()
+        # An L tromino only becomes a block if its tile is stepped
+        ca.fill_mask(30, 30, np.array([[True, True], [True, False]]), 1)
+        ca.update_grid()
+        self.assertEqual(ca.get_population(), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.pattern_library import INDEX_FILE, PatternLibrary
+
+
+class TestPatternLibrary(unittest.TestCase):
+    """
+    A class used to test the pattern library.
+
+    ...
+
+    Methods
+    -------
+    test_built_in_shapes():
+        Tests the built in shapes are listed from the index and read on use.
+
+    test_add_and_rebuild_index():
+        Tests added patterns are saved, measured and found again when the
+        index is rebuilt.
+    """
+
+    def test_built_in_shapes(self) -> None:
+        """
+        Tests the built in shapes are listed from the index, and each is only
+        read when first used and then kept.
+
+        Returns
+        -------
+        None
+        """
+        library = PatternLibrary()
+        self.assertEqual(library.names()[:4], ["Block", "Beehive", "Blinker", "Glider"])
+        self.assertIn("Glider Gun", library.names())
+        self.assertEqual(library._cache, {})
+
+        glider = library.get("Glider")
+        np.testing.assert_array_equal(
+            glider, [[True, False, False], [False, True, True], [True, True, False]]
+        )
+        self.assertIs(library.get("Glider"), glider)
+        self.assertFalse(glider.flags.writeable)
+
+        for name in library.names():
+            metadata = library.get_metadata(name)
+            cells = library.get(name)
+            self.assertEqual(cells.shape, (metadata["rows"], metadata["cols"]))
+            self.assertEqual(np.count_nonzero(cells), metadata["population"])
+        self.assertEqual(library.get_metadata("Blinker")["period"], 2)
+        self.assertEqual(library.get_metadata("Glider")["period"], 4)
+
+    def test_add_and_rebuild_index(self) -> None:
+        """
+        Tests added patterns are saved as RLE, measured and found again when
+        the index is rebuilt, and that the least recently used pattern is
+        dropped from the cache.
+
+        Returns
+        -------
+        None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            library = PatternLibrary(directory, cache_size=1)
+            self.assertEqual(library.names(), [])
+
+            library.add("Toad", [[0, 1, 1, 1], [1, 1, 1, 0]])
+            library.add(
+                "Pond", [[0, 1, 1, 0], [1, 0, 0, 1], [1, 0, 0, 1], [0, 1, 1, 0]]
+            )
+            self.assertEqual(
+                library.get_metadata("Toad"),
+                {
+                    "name": "Toad",
+                    "file": "toad.rle",
+                    "rows": 2,
+                    "cols": 4,
+                    "population": 6,
+                    "period": 2,
+                },
+            )
+            self.assertEqual(library.get_metadata("Pond")["period"], 1)
+
+            library.get("Toad")
+            library.get("Pond")
+            self.assertEqual(list(library._cache), ["Pond"])
+
+            # A new library reads the index, and a rebuilt index finds the
+            # same patterns in the same order
+            os.remove(os.path.join(directory, INDEX_FILE))
+            reopened = PatternLibrary(directory)
+            self.assertEqual(sorted(reopened.names()), ["Pond", "Toad"])
+            reopened.rebuild_index()
+            self.assertEqual(reopened.index, PatternLibrary(directory).index)
+            np.testing.assert_array_equal(
+                reopened.get("Toad"), [[0, 1, 1, 1], [1, 1, 1, 0]]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from src import rules
+from src.rules import LifeLikeRule
+
+
+class TestRules(unittest.TestCase):
+    """
+    A class used to test the LifeLikeRule class and the bundled rules.
+
+    ...
+
+    Methods
+    -------
+    test_bundled_rule_tables():
+        Tests the bundled rules map each cell state and count to the right state.
+
+    test_from_notation():
+        Tests rules are parsed from birth/survival notation.
+
+    test_get_rule():
+        Tests rules are resolved from names and notation.
+    """
+
+    def test_bundled_rule_tables(self) -> None:
+        """
+        Tests the bundled rules map each cell state and count to the right state.
+
+        The expected states are the outcomes of the original per-cell rule
+        functions for every cell state and neighbour count.
+
+        Returns
+        -------
+        None
+        """
+        expected = {
+            rules.game_of_life_rule: lambda alive, n: int(n == 3 or (alive and n == 2)),
+            rules.rule_30: lambda alive, n: int(n != 3) if alive else int(n == 1),
+            rules.rule_90: lambda alive, n: int(n != 2) if alive else int(n == 1),
+            rules.rule_110: lambda alive, n: (
+                int(n not in (1, 2)) if alive else int(n == 1)
+            ),
+            rules.rule_184: lambda alive, n: (
+                int(n not in (1, 3)) if alive else int(n == 1)
+            ),
+        }
+        for rule, outcome in expected.items():
+            for alive in (0, 1):
+                for neighbours in range(9):
+                    self.assertEqual(
+                        rule.table[9 * alive + neighbours],
+                        outcome(alive, neighbours),
+                        f"{rule.name}: alive={alive}, neighbours={neighbours}",
+                    )
+
+    def test_from_notation(self) -> None:
+        """
+        Tests rules are parsed from birth/survival notation.
+
+        Returns
+        -------
+        None
+        """
+        highlife = LifeLikeRule.from_notation("b36/s23")
+        self.assertEqual(highlife.birth, {3, 6})
+        self.assertEqual(highlife.survival, {2, 3})
+        self.assertEqual(highlife.notation, "B36/S23")
+        self.assertEqual(LifeLikeRule.from_notation("S23/B36").notation, "B36/S23")
+        self.assertEqual(len(highlife.table), 18)
+
+        with self.assertRaises(ValueError):
+            LifeLikeRule.from_notation("B9/S23")
+        with self.assertRaises(ValueError):
+            LifeLikeRule.from_notation("Rule 31")
+
+    def test_get_rule(self) -> None:
+        """
+        Tests rules are resolved from names and notation.
+
+        Returns
+        -------
+        None
+        """
+        self.assertIs(rules.get_rule("Game of Life"), rules.game_of_life_rule)
+        self.assertEqual(
+            rules.get_rule("B3/S23").table.tolist(),
+            rules.game_of_life_rule.table.tolist(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
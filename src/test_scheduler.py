@@ -0,0 +1,53 @@
+import unittest
+
+from src.scheduler import FixedStepScheduler
+
+
+class TestScheduler(unittest.TestCase):
+    """
+    A class used to test running generations at a fixed rate.
+
+    ...
+
+    Methods
+    -------
+    test_runs_generations_owed():
+        Tests the number of generations run follows the rate, not the frames.
+
+    test_frame_budget_drops_backlog():
+        Tests generations that do not fit in a frame are not carried over.
+    """
+
+    def test_runs_generations_owed(self) -> None:
+        """
+        Tests the number of generations run follows the rate, not the frames.
+
+        Returns
+        -------
+        None
+        """
+        scheduler = FixedStepScheduler(600, frame_budget=10.0)
+        steps = []
+        counts = [scheduler.run(lambda: steps.append(1), 1 / 60) for _ in range(6)]
+        self.assertEqual(sum(counts), 60)
+        self.assertEqual(len(steps), 60)
+
+        scheduler.set_rate(30)
+        counts = [scheduler.run(lambda: None, 1 / 60) for _ in range(4)]
+        self.assertEqual(counts, [0, 1, 0, 1])
+
+    def test_frame_budget_drops_backlog(self) -> None:
+        """
+        Tests generations that do not fit in a frame are not carried over.
+
+        Returns
+        -------
+        None
+        """
+        scheduler = FixedStepScheduler(10_000, frame_budget=0.0)
+        self.assertEqual(scheduler.run(lambda: None, 1.0), 1)
+        self.assertEqual(scheduler.run(lambda: None, 0.0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src import rules, state_io
+from src.cellular_automata import CellularAutomata
+
+
+class TestStateIO(unittest.TestCase):
+    """
+    A class used to test saving and loading grid states.
+
+    ...
+
+    Methods
+    -------
+    setUp():
+        Sets up a temporary directory and a random grid.
+
+    test_formats_round_trip():
+        Tests each format loads back the grid, seed and rule it saved.
+
+    test_loads_rle_pattern():
+        Tests a standard RLE pattern with comments and wrapped lines loads.
+
+    test_detects_format_when_loading():
+        Tests an automaton loads text, binary and RLE files alike.
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.grid = np.random.RandomState(12).randint(2, size=(21, 75))
+
+    def path(self, name: str) -> str:
+        """
+        Get the path of a file in the temporary directory.
+        """
+        return os.path.join(self.directory.name, name)
+
+    def test_formats_round_trip(self) -> None:
+        """
+        Tests each format loads back the grid, seed and rule it saved.
+
+        Returns
+        -------
+        None
+        """
+        expected = {
+            "text": ([3, 4], None),
+            "binary": ([3, 4], "B3/S23"),
+            "rle": (None, "B3/S23"),
+        }
+        for file_format, (seed, rule) in expected.items():
+            path = self.path(f"grid.{file_format}")
+            state_io.save_state(path, self.grid, [3, 4], "B3/S23", file_format)
+            self.assertEqual(state_io.detect_format(path), file_format)
+
+            grid, loaded_seed, loaded_rule = state_io.load_state(path)
+            self.assertListEqual(grid.tolist(), self.grid.tolist())
+            self.assertEqual(loaded_seed, seed)
+            self.assertEqual(loaded_rule, rule)
+
+        # One bit per cell, with rows rounded up to whole bytes
+        header, offset = state_io.read_binary_header(self.path("grid.binary"))
+        self.assertEqual(os.path.getsize(self.path("grid.binary")), offset + 21 * 10)
+
+    def test_loads_rle_pattern(self) -> None:
+        """
+        Tests a standard RLE pattern with comments and wrapped lines loads.
+
+        Returns
+        -------
+        None
+        """
+        with open(self.path("glider.rle"), "w") as file:
+            file.write("#N Glider\n#C A comment\nx = 4, y = 4, rule = B3/S23\n")
+            file.write("bo$2bo$3o\n2$1\n0b!\n")
+
+        grid, rule = state_io.load_rle(self.path("glider.rle"))
+        self.assertEqual(rule, "B3/S23")
+        self.assertListEqual(
+            grid.tolist(), [[0, 1, 0, 0], [0, 0, 1, 0], [1, 1, 1, 0], [0, 0, 0, 0]]
+        )
+
+    def test_detects_format_when_loading(self) -> None:
+        """
+        Tests an automaton loads text, binary and RLE files alike.
+
+        The rule is only taken from the file when asked for.
+
+        Returns
+        -------
+        None
+        """
+        ca = CellularAutomata([21, 75], rules.rule_30)
+        ca.grid = self.grid.copy()
+        ca.seed = 99
+        for name in ("grid.state", "grid.rle"):
+            ca.save_grid_to_file(self.path(name))
+        ca.save_grid_to_file(self.path("packed.state"), "binary")
+
+        for name in ("grid.state", "packed.state", "grid.rle"):
+            loaded = CellularAutomata([21, 75], rules.game_of_life_rule)
+            loaded.populate_grid_with_state_file(self.path(name))
+            self.assertListEqual(loaded.grid.tolist(), self.grid.tolist())
+            self.assertIs(loaded.rule, rules.game_of_life_rule)
+
+        loaded.populate_grid_with_state_file(self.path("packed.state"), load_rule=True)
+        self.assertEqual(loaded.seed, 99)
+        self.assertEqual(loaded.rule.notation, rules.rule_30.notation)
+
+
+if __name__ == "__main__":
+    unittest.main()
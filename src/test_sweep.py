@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src import rules, sweep
+from src.cellular_automata import CellularAutomata
+
+
+class TestSweep(unittest.TestCase):
+    """
+    A class used to test the seed sweep.
+
+    ...
+
+    Methods
+    -------
+    test_results_match_single_automata():
+        Tests each seed's result matches running an automaton with that seed.
+
+    test_interrupted_sweep_resumes():
+        Tests rerunning a sweep skips seeds already recorded and reruns a
+        seed whose line was cut off.
+    """
+
+    def test_results_match_single_automata(self) -> None:
+        """
+        Tests each seed's result matches running an automaton with that seed,
+        whichever seeds it is run alongside.
+
+        Returns
+        -------
+        None
+        """
+        results = sweep.sweep_seeds([3, 1, 2], [20, 24], "Game of Life", 40)
+        self.assertEqual(results[1:], sweep.sweep_seeds([1, 2], [20, 24], "B3/S23", 40))
+
+        for result in results:
+            ca = CellularAutomata([20, 24], rules.game_of_life_rule, result["seed"])
+            for _ in range(40):
+                ca.update_grid()
+            rows, cols = np.nonzero(ca.grid == 1)
+
+            self.assertEqual(result["population"], ca.get_population())
+            self.assertEqual(
+                [result["min_row"], result["min_col"]], [rows.min(), cols.min()]
+            )
+            self.assertEqual(
+                [result["max_row"], result["max_col"]], [rows.max(), cols.max()]
+            )
+
+    def test_interrupted_sweep_resumes(self) -> None:
+        """
+        Tests rerunning a sweep skips seeds already recorded and reruns a
+        seed whose line was cut off.
+
+        Returns
+        -------
+        None
+        """
+        arguments = ["--seeds", "1-6", "--size", "12", "12", "-n", "20"]
+        arguments += ["--workers", "1", "--chunk-size", "2"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sweep.jsonl")
+            sweep.main(arguments + ["-o", path])
+            with open(path) as file:
+                lines = sorted(file.readlines())
+
+            with open(path, "w") as file:
+                file.writelines(lines[:3])
+                file.write(lines[3][:10])
+            self.assertEqual(len(sweep.read_completed_seeds(path)), 3)
+
+            sweep.main(arguments + ["-o", path])
+            with open(path) as file:
+                self.assertEqual(sorted(file.readlines()), lines)
+
+            # Arguments no grid can be run with are rejected before any work
+            for bad in (["--size", "0", "5"], ["-n", "-1"]):
+                with self.assertRaises(SystemExit):
+                    sweep.main(arguments + bad + ["-o", path])
+
+
+if __name__ == "__main__":
+    unittest.main()